@@ -4,9 +4,15 @@ import random
 import subprocess
 import threading
 import queue
-from pydub import AudioSegment
 import pygame
 from usb_sound_controller import USB_SoundController
+from sound_bank import sound_key
+from sound_channels import MUSIC
+from timer_wheel import TimerWheel
+from robot_logging import get_logger, setup_logging
+from robot_config import config
+
+log = get_logger("ambient")
 
 ################################################################
 # USB Sound Controller for ND Robotics Course
@@ -147,62 +153,154 @@ from usb_sound_controller import USB_SoundController
 
 # ---------------- Ambient Sound Routine ---------------- #
 class AmbientSoundRoutine:
-    def __init__(self, sound_controller, sound_list):
+    # Plays the ambient clips one after another on the ambient channels, each for a random
+    # time, crossfading into the next. Everything runs from timers on a TimerWheel, so no
+    # thread sleeps through a clip: stop() fades the ambient sound out at once, and start()
+    # picks up again straight away. Other channel groups and queued sounds are left alone.
+    # Clips are loaded on the sound controller's worker; the timers only pick from the clips
+    # that have loaded, so the wheel thread never reads or decodes a file.
+    def __init__(self, sound_controller, sound_list, weights=None, play_range=None, fade_ms=None, wheel=None):
         """
         sound_controller: Instance of USB_SoundController.
         sound_list: List of at least 5 sound file paths.
+        weights: Optional {file name: weight}; clips not listed weigh 1 (default: sound.ambient_weights).
+        play_range: (shortest, longest) seconds each clip plays (default: sound.ambient_play_range).
+        fade_ms: Crossfade length (default: sound.ambient_fade_ms).
+        wheel: TimerWheel to schedule on; one is made if not given.
         """
+        cfg = config().sound
+        weights = cfg.ambient_weights if weights is None else weights
         self.sound_controller = sound_controller
         self.sound_list = sound_list
-        self.running = False  # Controls if the routine is active.
-        self.thread = None
-        self.lock = threading.Lock()
+        self.weights = [weights.get(os.path.basename(path), 1.0) for path in sound_list]
+        self.play_range = tuple(play_range or cfg.ambient_play_range)
+        self.fade_ms = cfg.ambient_fade_ms if fade_ms is None else fade_ms
+        self.stop_fade_ms = min(self.fade_ms, 250)
+        self.own_wheel = wheel is None
+        self.wheel = wheel or TimerWheel(name="ambient")
+        self.enabled = threading.Event()  # Set while the routine is running
+        self.current = None  # Playback of the clip playing now
+        self.last = None  # Last clip picked, so it isn't picked twice in a row
+        self.timer = None
+        self.keys = {}  # path -> key of each clip that has loaded
+        self.loading = {}  # path -> Future of a load in progress
+        self.starved = False  # Set when no clip had loaded yet; the next load starts one
+        # Re-entrant: starting a clip can end the previous one, whose callback takes the lock
+        self.lock = threading.RLock()
+
+    @property
+    def running(self):
+        return self.enabled.is_set()
 
     def start(self):
         with self.lock:
-            if not self.running:
-                self.running = True
-                # (Re)create and start the thread if not alive.
-                self.thread = threading.Thread(target=self._run, daemon=True)
-                self.thread.start()
-                print("Ambient sound routine started.")
+            if not self.enabled.is_set():
+                self.enabled.set()
+                self._load_clips()
+                self._schedule(0, self._next)
+                log.info("Ambient sound routine started.")
 
     def stop(self):
         with self.lock:
-            if self.running:
-                self.running = False
-                print("Ambient sound routine suspended.")
+            if self.enabled.is_set():
+                self.enabled.clear()
+                if self.timer is not None:
+                    self.timer.cancel()
+                if self.current is not None:
+                    self.sound_controller.fade_out(self.current, self.stop_fade_ms)
+                    self.current = None
+                log.info("Ambient sound routine suspended.")
+
+    def close(self):
+        self.stop()
+        if self.own_wheel:
+            self.wheel.close()
+
+    def _schedule(self, delay, callback, *args):
+        # Replaces the pending timer. Call with the lock held.
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = self.wheel.schedule(delay, callback, *args)
+
+    def _load_clips(self):
+        # Loads the clips that haven't loaded yet (e.g. MP3s still transcoding last time) on
+        # the sound controller's worker. Call with the lock held.
+        for path in self.sound_list:
+            if path not in self.keys and path not in self.loading:
+                future = self.sound_controller.load_async(path)
+                self.loading[path] = future
+                future.add_done_callback(lambda f, path=path: self._loaded(path, f))
+
+    def _loaded(self, path, future):
+        # Runs on the sound controller's worker when a clip has loaded, or couldn't yet.
+        key = None if future.cancelled() or future.exception() else future.result()
+        with self.lock:
+            self.loading.pop(path, None)
+            if key is None:
+                return
+            self.keys[path] = key
+            if self.starved and self.enabled.is_set():
+                self.starved = False
+                self._schedule(0, self._next)
+
+    def _choose(self):
+        # Weighted random clip among those loaded, never the previous one (unless it is the
+        # only one).
+        loaded = [path for path in self.sound_list if path in self.keys]
+        choices = [(path, weight) for path, weight in zip(self.sound_list, self.weights)
+                   if weight > 0 and path in self.keys and (path != self.last or len(loaded) == 1)]
+        if not choices:
+            return None
+        paths, weights = zip(*choices)
+        self.last = random.choices(paths, weights)[0]
+        return self.last
 
-    def _run(self):
-        while self.running:
-#             # Random wait time between 1 and 5 seconds.
-#             wait_time = random.uniform(5, 10)
-#             time.sleep(wait_time)
-#             # Check if still running before playing a sound.
-#             if not self.running:
-#                 break
-#             # Choose a random sound file from the list.
-#             sound_file = random.choice(self.sound_list)
-#             print(f"Playing: {sound_file}")
-#             self.sound_controller.play_audio(sound_file)
+    def _next(self, sound_file=None):
+        # Timer: starts the next clip (fading in) and schedules its crossfade.
+        with self.lock:
+            if not self.enabled.is_set():
+                return
+            sound_file = sound_file or self._choose()
+            if sound_file is None:
+                # Nothing has loaded yet; _loaded() starts the first clip that does
+                self.starved = True
+                self._load_clips()
+                self._schedule(1.0, self._next)
+                return
+            playback = self.sound_controller.play(self.keys[sound_file], group="ambient", fade_ms=self.fade_ms)
+            if playback is None:
+                self._schedule(1.0, self._next)  # Try another clip shortly
+                return
+            self.starved = False
+            self._load_clips()  # Retry any clip that wasn't ready (e.g. while MP3s transcode)
+            self.current = playback
+            play_duration = min(random.uniform(*self.play_range), playback.length)
+            log.info("Playing: %s for %.2f seconds", sound_file, play_duration)
+            self._schedule(max(0.0, play_duration - self.fade_ms / 1000), self._crossfade, playback)
+            playback.add_done_callback(self._ended)
 
-            # Choose a random play duration between 5 and 10 seconds.
-            play_duration = random.uniform(5, 10)
-            
-            # Choose a random sound file from the list.
-            sound_file = random.choice(self.sound_list)
-            print(f"Playing: {sound_file} for {play_duration:.2f} seconds")
-            
-            # Start playing the sound.
-            self.sound_controller.play_audio(sound_file)
-            
-            # Wait for the random duration.
-            time.sleep(play_duration)
-            
-            # Stop the sound if it's still playing.
-            self.sound_controller.stop_sound()
+    def _crossfade(self, playback):
+        # Timer: fades the current clip out while the next one fades in. Two streamed (long)
+        # clips can't overlap, so the next one then starts once the first has faded out.
+        with self.lock:
+            if not self.enabled.is_set() or playback is not self.current:
+                return
+            sound_file = self._choose()
+            self.sound_controller.fade_out(playback, self.fade_ms)
+            self.current = None
+            streams = self.sound_controller.streams
+            if playback.channel == MUSIC and sound_file and sound_key(sound_file) in streams:
+                self._schedule(self.fade_ms / 1000, self._next, sound_file)
+            else:
+                self._schedule(0, self._next, sound_file)
 
-            
+    def _ended(self, playback):
+        # The clip ended before its crossfade (stopped by someone else, or shorter than the
+        # fade); move on to the next one.
+        with self.lock:
+            if playback is self.current and self.enabled.is_set():
+                self.current = None
+                self._schedule(0, self._next)
 
 
 # ---------------- PS5 Controller Handling ---------------- #
@@ -211,10 +309,10 @@ def initialize_controller():
     if pygame.joystick.get_count() > 0:
         controller = pygame.joystick.Joystick(0)
         controller.init()
-        print(f"Controller '{controller.get_name()}' initialized.")
+        log.info("Controller '%s' initialized.", controller.get_name())
         return controller
     else:
-        print("No PS5 controller detected. Ambient routine control disabled.")
+        log.info("No PS5 controller detected. Ambient routine control disabled.")
         return None
 
 def process_controller_events(ambient_routine):
@@ -233,17 +331,13 @@ def process_controller_events(ambient_routine):
 
 # ---------------- Main Routine ---------------- #
 if __name__ == "__main__":
+    setup_logging()
+
     # Initialize the sound controller.
-    sound_ctrl = USB_SoundController(volume=0.7)
+    sound_ctrl = USB_SoundController()
 
-    # List of at least 5 different background ambient sounds.
-    ambient_sounds = [
-        "/home/ndrobotics/code/Pi Only Files /sounds/boxbox.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/f1.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/italiananthem.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/SmoothOperator.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/kimisteeringwheel.mp3"
-    ]
+    # List of at least 5 different background ambient sounds (see robot.toml).
+    ambient_sounds = config().paths.ambient_sound_paths()
 
     # Create the AmbientSoundRoutine instance.
     ambient_routine = AmbientSoundRoutine(sound_ctrl, ambient_sounds)
@@ -260,7 +354,7 @@ if __name__ == "__main__":
             process_controller_events(ambient_routine)
             time.sleep(0.1)  # Small delay to avoid busy-waiting.
     except KeyboardInterrupt:
-        print("Exiting ambient routine...")
+        log.info("Exiting ambient routine...")
     finally:
-        ambient_routine.stop()
+        ambient_routine.close()
         sound_ctrl.close()
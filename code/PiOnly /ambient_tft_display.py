@@ -3,8 +3,8 @@
 # 3-7-2025
 # Professor McLaughlin
 ################################################################
-import spidev            # For SPI communications
-import RPi.GPIO as GPIO  # For controlling GPIO pins
+from hal import spidev   # For SPI communications
+from hal import GPIO     # For controlling GPIO pins
 import threading         # For managing threads
 import time              # For sleep/delay functions
 from PIL import Image, ImageDraw, ImageFont  # For image manipulation
@@ -12,11 +12,21 @@ import math              # For geometric calculations
 from queue import Queue  # For thread-safe queue
 
 import random
+from metrics import metrics
+from robot_logging import get_logger, RATE_LIMITED
+from robot_config import config
 
-# Define TFT display pins (GPIO numbers) based on your wiring.
-TFT_CS_PIN = 5     # Chip Select (GPIO5)
-TFT_RESET_PIN = 6  # Reset (GPIO6)
-TFT_DC_PIN = 26    # Data/Command (GPIO26)
+log = get_logger("tft")
+
+# Runtime metrics (see metrics.py)
+frame_count = metrics.counter("tft.frames")
+frame_bytes = metrics.counter("tft.bytes")
+frame_time = metrics.histogram("tft.frame_us")
+
+# TFT display pins (GPIO numbers) from the [tft] section of the robot config.
+TFT_CS_PIN = config().tft.cs_pin        # Chip Select (GPIO5 by default)
+TFT_RESET_PIN = config().tft.reset_pin  # Reset (GPIO6 by default)
+TFT_DC_PIN = config().tft.dc_pin        # Data/Command (GPIO26 by default)
 
 # Display specifications for the 1.8" TFT (ST7735R):
 SCREEN_WIDTH = 128
@@ -41,8 +51,8 @@ class TFTDisplay:
 
         # Initialize SPI.
         self.spi = spidev.SpiDev()
-        self.spi.open(0, 0)
-        self.spi.max_speed_hz = 4000000  # 4 MHz for reliability.
+        self.spi.open(config().tft.spi_bus, config().tft.spi_device)
+        self.spi.max_speed_hz = config().tft.spi_speed_hz  # 4 MHz by default for reliability.
         self.spi.mode = 0
 
         # Create an image buffer using Pillow.
@@ -133,16 +143,26 @@ class TFTDisplay:
         # Clear screen with blue for test.
         self.clear_screen("blue")
 
-    def _update_display(self):
+    def _update_display(self, box=None):
         # Update the physical display with the current image buffer
-        self._set_address_window(0, 0, SCREEN_WIDTH - 1, SCREEN_HEIGHT - 1)
-        raw_data = self.image.tobytes("raw", "RGB")
+        # param box: Only send this rectangle, (x0, y0, x1, y1) inclusive.
+        start = time.perf_counter_ns()
+        if box is None:
+            self._set_address_window(0, 0, SCREEN_WIDTH - 1, SCREEN_HEIGHT - 1)
+            raw_data = self.image.tobytes("raw", "RGB")
+        else:
+            x0, y0, x1, y1 = box
+            self._set_address_window(x0, y0, x1, y1)
+            raw_data = self.image.crop((x0, y0, x1 + 1, y1 + 1)).tobytes("raw", "RGB")
         chunk_size = 4096
         GPIO.output(TFT_CS_PIN, GPIO.LOW)
         GPIO.output(TFT_DC_PIN, GPIO.HIGH)
         for i in range(0, len(raw_data), chunk_size):
             self.spi.xfer2(list(raw_data[i:i+chunk_size]))
         GPIO.output(TFT_CS_PIN, GPIO.HIGH)
+        frame_time.observe((time.perf_counter_ns() - start) // 1000)
+        frame_count.inc()
+        frame_bytes.inc(len(raw_data))
 
     # Task functions that perform the drawing operations.
     def _task_clear_screen(self, color):
@@ -239,6 +259,19 @@ class TFTDisplay:
     def draw_octagon(self, center, size, line_color=(255, 255, 255), fill_color=None):
         self._enqueue(self._task_draw_octagon, center, size, line_color, fill_color)
 
+    def show_region(self, region, position):
+        # Pastes a small image at 'position' and sends only that rectangle to the screen, from
+        # the calling thread, so it isn't held up behind queued drawing. The lock keeps its SPI
+        # transfer from interleaving with the worker's.
+        # param region: PIL RGB image.
+        # return: Seconds the update took.
+        x, y = position
+        with self.lock:
+            start = time.perf_counter()
+            self.image.paste(region, position)
+            self._update_display((x, y, x + region.width - 1, y + region.height - 1))
+            return time.perf_counter() - start
+
     def start_non_blocking_demo(self, func, *args, **kwargs):
         t = threading.Thread(target=func, args=args, kwargs=kwargs)
         t.start()
@@ -262,13 +295,24 @@ class TFTDisplay:
         print("Display closed gracefully.")
         
 class TFTRoutine:
-    def __init__(self, display, image_list):
+    # "random" mode flips through the images on a random timer. "lip_sync" mode shows the face
+    # from paths.lip_sync_images and moves its mouth with the sound that is playing, using the
+    # clip's envelope from audio_analysis.py. Each TFT frame it picks the mouth image for the
+    # level being heard and sends just the mouth region (tft.mouth_box) over SPI.
+    def __init__(self, display, image_list, sound_controller=None, mode=None):
         """
         bmp_list: List of at least 5 bmp file paths.
+        sound_controller: USB_SoundController to follow in "lip_sync" mode.
+        mode: "random" or "lip_sync" (default: tft.routine in the robot config).
         """
         self.display = display
         self.bmp_list = image_list
+        self.sound_controller = sound_controller
+        self.mode = mode or config().tft.routine
+        if self.mode == "lip_sync" and sound_controller is None:
+            raise ValueError("Lip-sync mode needs the sound controller.")
         self.running = False  # Controls if the routine is active.
+        self.wake = threading.Event()  # Set by stop() to end a frame wait early
         self.thread = None
         self.lock = threading.Lock()
 
@@ -276,16 +320,75 @@ class TFTRoutine:
         with self.lock:
             if not self.running:
                 self.running = True
+                self.wake.clear()
                 # (Re)create and start the thread if not alive.
-                self.thread = threading.Thread(target=self._run, daemon=True)
+                target = self._run_lip_sync if self.mode == "lip_sync" else self._run
+                self.thread = threading.Thread(target=target, daemon=True)
                 self.thread.start()
-                print("Image sound routine started.")
+                log.info("Image sound routine started.")
 
     def stop(self):
         with self.lock:
             if self.running:
                 self.running = False
-                print("Image sound routine suspended.")
+                self.wake.set()
+                log.info("Image sound routine suspended.")
+
+    def _audible_level(self, lead):
+        # Envelope level (0.0 to 1.0) of the clip being heard 'lead' seconds from now. Speech
+        # is followed first, else the most recently started clip that has been analysed. Speech
+        # is analysed as it is rendered (see tts_cache.py), which needs NumPy; without it the
+        # mouth only follows analysed clips.
+        ctrl = self.sound_controller
+        playbacks = [p for p in ctrl.tracker.playing() if p.key in ctrl.analyses]
+        if not playbacks:
+            return 0.0
+        voice = [p for p in playbacks if p.group == "voice"]
+        playback = (voice or playbacks)[-1]
+        # The mixer plays a buffer behind the playback position
+        return ctrl.analyses[playback.key].level(playback.position - ctrl.buffer_latency + lead)
+
+    @staticmethod
+    def _mouth_frame(level, count, threshold):
+        # Mouth image for 'level': the closed one (0) below the threshold, then wider ones
+        if level < threshold or count < 2:
+            return 0
+        return min(count - 1, 1 + int((level - threshold) / (1.0 - threshold) * (count - 1)))
+
+    def _run_lip_sync(self):
+        cfg = config().tft
+        x0, y0, x1, y1 = cfg.mouth_box
+        paths = config().paths.lip_sync_image_paths()
+        try:
+            # Cut the mouth out of each face image once, so a frame costs one small SPI transfer
+            mouths = [Image.open(path).convert("RGB").crop((x0, y0, x1 + 1, y1 + 1)) for path in paths]
+        except OSError as e:
+            log.error("Can't load the lip-sync images: %s", e)
+            return
+        self.display.clear_screen("black")
+        self.display.display_bmp(paths[0], position=(0, 0))
+        self.display.queue.join()
+
+        period = 1.0 / cfg.lip_sync_fps
+        push_time = 0.0  # Recent time to send a mouth update, so frames are picked that far ahead
+        shown = 0
+        next_frame = time.monotonic()
+        while self.running:
+            frame = self._mouth_frame(self._audible_level(push_time), len(mouths), cfg.mouth_threshold)
+            if frame != shown:
+                elapsed = self.display.show_region(mouths[frame], (x0, y0))
+                push_time = elapsed if not push_time else 0.8 * push_time + 0.2 * elapsed
+                shown = frame
+                if push_time > period:
+                    log.warning("Mouth update takes %.1f ms, longer than a %.1f ms frame",
+                                push_time * 1000, period * 1000, extra=RATE_LIMITED)
+            next_frame += period
+            delay = next_frame - time.monotonic()
+            if delay <= 0:
+                next_frame = time.monotonic()  # Fell behind; pick up from now, don't race to catch up
+            elif self.wake.wait(delay):
+                break
+        self.display.clear_screen("black")
 
     def _run(self):
         while self.running:
@@ -294,7 +397,7 @@ class TFTRoutine:
             
             # Choose a random sound file from the list.
             bmp_file = random.choice(self.bmp_list)
-            print(f"Displaying: {bmp_file} for {play_duration:.2f} seconds")
+            log.info("Displaying: %s for %.2f seconds", bmp_file, play_duration)
             
             # Start playing the sound.
             self.display.clear_screen("black")
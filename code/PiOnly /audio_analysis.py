@@ -0,0 +1,244 @@
+################################################################
+# Audio Analysis for ND Robotics Course
+# 10-19-2026
+################################################################
+# Measures the sound clips offline and keeps the results beside the transcoded clips, so
+# nothing is analysed while the robot runs:
+#
+#   python audio_analysis.py                  # every ambient sound in the robot config
+#   python audio_analysis.py a.mp3 b.wav      # just these
+#
+# For each clip it records:
+#  - integrated loudness in LUFS (ITU-R BS.1770: K-weighted, gated 400 ms blocks)
+#  - sample peak in dBFS
+#  - an RMS envelope, sound.envelope_rate levels per second, one byte (0-255) each
+# in a small JSON sidecar in the audio cache, named by the clip's content hash. The sound
+# controller reads it when it loads a clip to even out loudness, and the TFT lip-sync mode
+# follows the envelope. Only the analysis needs NumPy; reading a sidecar doesn't.
+import base64
+import json
+import math
+import os
+import wave
+from audio_cache import AudioCache, wav_format
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("audio_analysis")
+
+SIDECAR_VERSION = 1
+
+# K-weighting (BS.1770): a high shelf for the head's effect, then a high-pass
+# (gain dB, Q, corner Hz)
+K_SHELF = (4.0, 0.7071752369554193, 1681.974450955533)
+K_HIGHPASS = (0.5003270373253953, 38.13547087613982)
+
+
+class ClipAnalysis:
+    def __init__(self, loudness, peak, envelope, envelope_rate, envelope_scale):
+        self.loudness = loudness  # LUFS, or None for a silent clip
+        self.peak = peak  # dBFS, or None for a silent clip
+        self.envelope = envelope  # bytes, one level (0-255) per envelope frame
+        self.envelope_rate = envelope_rate  # Envelope frames per second
+        self.envelope_scale = envelope_scale  # RMS level that 255 stands for
+
+    def gain(self, target):
+        # Volume (0.0 to 1.0) that brings the clip to 'target' LUFS. A Sound's volume can only
+        # turn it down, so clips quieter than the target stay at 1.0.
+        if self.loudness is None:
+            return 1.0
+        return min(1.0, 10 ** ((target - self.loudness) / 20))
+
+    def level(self, seconds):
+        # Envelope level (0.0 to 1.0) 'seconds' into the clip; 0.0 outside it.
+        i = int(seconds * self.envelope_rate)
+        if not 0 <= i < len(self.envelope):
+            return 0.0
+        return self.envelope[i] / 255
+
+    def save(self, path):
+        data = {
+            "version": SIDECAR_VERSION,
+            "loudness": self.loudness,
+            "peak": self.peak,
+            "envelope_rate": self.envelope_rate,
+            "envelope_scale": self.envelope_scale,
+            "envelope": base64.b64encode(self.envelope).decode("ascii"),
+        }
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        # The analysis stored at 'path', or None if there is none (or it is from an older version).
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != SIDECAR_VERSION:
+            return None
+        return cls(data["loudness"], data["peak"], base64.b64decode(data["envelope"]),
+                   data["envelope_rate"], data["envelope_scale"])
+
+
+def read_wav(path):
+    # (samples as float32 in -1..1 with shape (frames, channels), sample rate)
+    import numpy as np
+    with wave.open(path, "rb") as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        data = f.readframes(f.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(data, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(data, "<i2").astype(np.float32) / 32768
+    elif width == 3:
+        raw = np.frombuffer(data, np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = (np.where(values >= 1 << 23, values - (1 << 24), values) / float(1 << 23)).astype(np.float32)
+    else:
+        samples = (np.frombuffer(data, "<i4") / float(1 << 31)).astype(np.float32)
+    return samples.reshape(-1, channels), rate
+
+
+def _biquad_response(b, a, freqs, rate):
+    import numpy as np
+    z = np.exp(-2j * np.pi * freqs / rate)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+def k_weight(samples, rate):
+    # Applies the K-weighting filters. Only the filters' effect on each frequency's level
+    # matters for loudness, so they are applied to the whole clip at once with an FFT.
+    import numpy as np
+    gain_db, q, fc = K_SHELF
+    a_gain = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * fc / rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0, root = math.cos(w0), 2 * math.sqrt(a_gain) * alpha
+    shelf_b = (a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 + root),
+               -2 * a_gain * ((a_gain - 1) + (a_gain + 1) * cos_w0),
+               a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 - root))
+    shelf_a = ((a_gain + 1) - (a_gain - 1) * cos_w0 + root,
+               2 * ((a_gain - 1) - (a_gain + 1) * cos_w0),
+               (a_gain + 1) - (a_gain - 1) * cos_w0 - root)
+    q, fc = K_HIGHPASS
+    w0 = 2 * math.pi * fc / rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    highpass_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    highpass_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+
+    frames = len(samples)
+    freqs = np.fft.rfftfreq(frames, 1 / rate)
+    response = _biquad_response(shelf_b, shelf_a, freqs, rate) * _biquad_response(highpass_b, highpass_a, freqs, rate)
+    spectrum = np.fft.rfft(samples, axis=0) * response[:, None]
+    return np.fft.irfft(spectrum, n=frames, axis=0)
+
+
+def integrated_loudness(samples, rate):
+    # LUFS per BS.1770: mean power of 400 ms blocks (75% overlap) summed over channels, gated
+    # at -70 LUFS and then at 10 LU below the level of the blocks that passed. None if silent.
+    import numpy as np
+    power = np.square(k_weight(samples, rate)).sum(axis=1)
+    block, step = int(0.4 * rate), int(0.1 * rate)
+    if len(power) < block:
+        block = len(power)
+    if block == 0:
+        return None
+    sums = np.concatenate(([0.0], np.cumsum(power)))
+    starts = np.arange(0, len(power) - block + 1, step)
+    blocks = (sums[starts + block] - sums[starts]) / block
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[levels > -70]
+    if not len(gated):
+        return None
+    relative = -0.691 + 10 * math.log10(gated.mean()) - 10
+    gated = blocks[(levels > -70) & (levels > relative)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+
+def rms_envelope(samples, frame):
+    # (bytes with one level per 'frame' samples, RMS level that 255 stands for)
+    import numpy as np
+    mono = samples.mean(axis=1)
+    count = math.ceil(len(mono) / frame)
+    padded = np.zeros(count * frame, np.float32)
+    padded[:len(mono)] = mono
+    rms = np.sqrt(np.square(padded.reshape(count, frame)).mean(axis=1))
+    scale = float(rms.max()) if count else 0.0
+    if scale <= 0:
+        return bytes(count), 0.0
+    return np.round(rms / scale * 255).astype(np.uint8).tobytes(), scale
+
+
+def analyze(samples, rate, envelope_rate=None):
+    import numpy as np
+    envelope_rate = envelope_rate or config().sound.envelope_rate
+    frame = max(1, round(rate / envelope_rate))  # Whole samples per level; the rate is adjusted to fit
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    envelope, scale = rms_envelope(samples, frame)
+    return ClipAnalysis(integrated_loudness(samples, rate) if peak > 0 else None,
+                        20 * math.log10(peak) if peak > 0 else None,
+                        envelope, rate / frame, scale)
+
+
+def analyze_file(path, envelope_rate=None):
+    samples, rate = read_wav(path)
+    return analyze(samples, rate, envelope_rate)
+
+
+def analyze_sources(sources, cache, envelope_rate=None, force=False):
+    # Transcodes the sources if needed, analyses each and writes its sidecar.
+    # param cache: The AudioCache the clips are played from.
+    # param force: Analyse again even if a sidecar exists.
+    # return: {source: ClipAnalysis, or None if it couldn't be analysed}
+    results = {}
+    for source, wav_path in cache.prepare(sources).items():
+        results[source] = None
+        if wav_path is None or wav_format(wav_path) is None:
+            log.error("Can't analyse '%s': no WAV for it", source)
+            continue
+        sidecar = cache.sidecar_path(source)
+        analysis = None if force else ClipAnalysis.load(sidecar)
+        if analysis is None:
+            try:
+                analysis = analyze_file(wav_path, envelope_rate)
+            except (wave.Error, EOFError, OSError) as e:
+                log.error("Error analysing '%s': %s", source, e)
+                continue
+            analysis.save(sidecar)
+        results[source] = analysis
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from robot_logging import setup_logging
+    parser = argparse.ArgumentParser(description="Measure loudness and envelopes of sound clips.")
+    parser.add_argument("sources", nargs="*", help="Audio files (default: the configured ambient sounds)")
+    parser.add_argument("--force", action="store_true", help="Analyse clips that already have a sidecar")
+    args = parser.parse_args()
+
+    setup_logging()
+    cfg = config().sound
+    # Analyse the WAVs the mixer will play, in its format
+    cache = AudioCache(rate=cfg.sample_rate)
+    try:
+        results = analyze_sources(args.sources or config().paths.ambient_sound_paths(), cache, force=args.force)
+    finally:
+        cache.close()
+    print(f"{'clip':<30} {'LUFS':>7} {'peak dB':>8} {'gain':>6}")
+    for source, analysis in results.items():
+        name = os.path.basename(source)
+        if analysis is None:
+            print(f"{name:<30} {'failed':>7}")
+            continue
+        loudness = "-" if analysis.loudness is None else f"{analysis.loudness:.1f}"
+        peak = "-" if analysis.peak is None else f"{analysis.peak:.1f}"
+        print(f"{name:<30} {loudness:>7} {peak:>8} {analysis.gain(cfg.loudness_target):>6.2f}")
+    sys.exit(0 if all(results.values()) else 1)
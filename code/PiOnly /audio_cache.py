@@ -0,0 +1,198 @@
+################################################################
+# Audio Transcoding Cache for ND Robotics Course
+# 10-19-2026
+################################################################
+# Converts MP3s, and WAVs whose rate or format differ from the mixer's, to WAVs in the mixer's
+# format ahead of time, so nothing is transcoded or resampled while the robot is playing sound:
+#
+#   cache = AudioCache("~/.cache/robot/sounds", rate=44100, channels=2, bits=16)
+#   cache.prepare(["/home/ndrobotics/sounds/boxbox.mp3"])     # transcodes in a process pool
+#   cache.lookup("/home/ndrobotics/sounds/boxbox.mp3")        # -> cached WAV path, or None
+#
+# Cached files are named by a hash of the source's contents and the target format, so an
+# edited clip or a different mixer format gets a new file, and identical clips share one.
+# Run this file to fill the cache offline for every sound in the robot config:
+#
+#   python audio_cache.py
+import hashlib
+import multiprocessing
+import os
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("audio_cache")
+
+# Files the mixer can load without ffmpeg; everything else must be transcoded to WAV first
+NATIVE_EXTENSIONS = (".wav", ".ogg")
+
+
+def content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def wav_format(path):
+    # (rate, channels, bits, seconds) from a WAV file's header. None for other formats.
+    if not path.lower().endswith(".wav"):
+        return None
+    try:
+        with wave.open(path, "rb") as f:
+            return f.getframerate(), f.getnchannels(), f.getsampwidth() * 8, f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+def clip_length(path):
+    # Seconds of audio in a WAV file, read from its header. None for other formats.
+    fmt = wav_format(path)
+    return None if fmt is None else fmt[3]
+
+
+def transcode(source, dest, rate, channels, bits):
+    # Decodes 'source' with pydub/ffmpeg and writes a WAV in the given format. Runs in a pool
+    # worker. The file is written under a temporary name and renamed, so a half-written WAV
+    # is never picked up.
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(source)
+    audio = audio.set_frame_rate(rate).set_channels(channels).set_sample_width(bits // 8)
+    temp_path = f"{dest}.{os.getpid()}.tmp"
+    audio.export(temp_path, format="wav")
+    os.replace(temp_path, dest)
+    return dest
+
+
+class AudioCache:
+    def __init__(self, cache_dir=None, rate=44100, channels=2, bits=16, max_workers=None):
+        # param cache_dir: Where transcoded WAVs are kept (default: sound.cache_dir in the config).
+        # param rate, channels, bits: Target format; use the mixer's (pygame.mixer.get_init()).
+        # param max_workers: Transcoding processes (default: sound.transcode_workers).
+        cfg = config().sound
+        self.cache_dir = os.path.expanduser(cache_dir or cfg.cache_dir)
+        self.rate = rate
+        self.channels = channels
+        self.bits = bits
+        self.max_workers = max_workers or cfg.transcode_workers
+        self.hashes = {}  # path -> (mtime, size, hash), so unchanged files are hashed once
+        self.pending = {}  # cached path -> Future of a transcode in progress
+        self.failed = set()  # cached paths whose transcode failed
+        self.lock = threading.Lock()
+        self.executor = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_name(self, source):
+        # "<file name>-<content hash>"
+        stat = os.stat(source)
+        known = self.hashes.get(source)
+        if known is None or known[:2] != (stat.st_mtime, stat.st_size):
+            known = (stat.st_mtime, stat.st_size, content_hash(source))
+            self.hashes[source] = known
+        return f"{os.path.splitext(os.path.basename(source))[0]}-{known[2]}"
+
+    def cached_path(self, source):
+        # Where the transcoded copy of 'source' is (or will be) stored.
+        name = self._cache_name(source)
+        return os.path.join(self.cache_dir, f"{name}-{self.rate}hz-{self.bits}bit-{self.channels}ch.wav")
+
+    def sidecar_path(self, source):
+        # Where the analysis of 'source' is stored (see audio_analysis.py). It doesn't depend on
+        # the mixer format, so it is named by the source's contents alone.
+        return os.path.join(self.cache_dir, f"{self._cache_name(source)}.analysis.json")
+
+    def needs_transcode(self, source):
+        # MP3s and the like always; WAVs at another sample rate. (Channel count and sample width
+        # are cheap for the mixer to convert as it loads; resampling is not.) OGGs are left alone.
+        if not source.lower().endswith(NATIVE_EXTENSIONS):
+            return True
+        fmt = wav_format(source)
+        return fmt is not None and fmt[0] != self.rate
+
+    def lookup(self, source):
+        # Playable file for 'source' without transcoding: the source itself if it is already in
+        # the mixer's format, else the cached WAV once it has been made, else None. A WAV at
+        # another rate is only played as it is (resampled by the mixer) if its transcode failed.
+        if not self.needs_transcode(source):
+            return source
+        path = self.cached_path(source)
+        if os.path.exists(path):
+            return path
+        if path in self.failed and source.lower().endswith(NATIVE_EXTENSIONS):
+            return source
+        return None
+
+    def _pool(self):
+        if self.executor is None:
+            # forkserver: the sound controller runs threads, which don't mix with fork()
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context("forkserver"))
+        return self.executor
+
+    def submit(self, source):
+        # Starts transcoding 'source' in the background unless it is cached or already running.
+        # return: Future with the cached path, or None if there is nothing to do.
+        if not self.needs_transcode(source):
+            return None
+        dest = self.cached_path(source)
+        with self.lock:
+            future = self.pending.get(dest)
+            if future is not None or os.path.exists(dest):
+                return future
+            log.info("Transcoding %s", source)
+            future = self._pool().submit(transcode, source, dest, self.rate, self.channels, self.bits)
+            self.pending[dest] = future
+        future.add_done_callback(lambda f: self._done(dest, source, f))
+        return future
+
+    def _done(self, dest, source, future):
+        error = None if future.cancelled() else future.exception()
+        with self.lock:
+            self.pending.pop(dest, None)
+            if error is not None:
+                self.failed.add(dest)
+            if isinstance(error, BrokenProcessPool):
+                self.executor = None  # A worker died; start a fresh pool next time
+        if error is not None:
+            log.error("Error transcoding '%s': %s", source, error)
+
+    def prepare(self, sources, wait=True):
+        # Transcodes every source that isn't cached yet, several at a time.
+        # param wait: Block until they are done; otherwise they finish in the background.
+        # return: {source: playable path or None} (None while still transcoding or on failure).
+        futures = []
+        for source in sources:
+            if not os.path.exists(source):
+                log.error("Sound file does not exist: %s", source)
+                continue
+            future = self.submit(source)
+            if future is not None:
+                futures.append(future)
+        if wait:
+            for future in futures:
+                future.exception()
+        return {source: self.lookup(source) if os.path.exists(source) else None for source in sources}
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+if __name__ == "__main__":
+    from robot_logging import setup_logging
+    setup_logging()
+    # Fill the cache in the mixer's format, so the sound controller finds these files
+    cache = AudioCache(rate=config().sound.sample_rate)
+    try:
+        for source, path in cache.prepare(config().paths.ambient_sound_paths()).items():
+            print(f"{source} -> {path}")
+    finally:
+        cache.close()
@@ -0,0 +1,88 @@
+################################################################
+# Joystick Axis Filtering for ND Robotics Course
+# 10-19-2026
+################################################################
+import math
+
+
+class StickFilter:
+    # Filters one analog stick (x and y axes) before it is sent to the motor controller.
+    #
+    # Stages, in order:
+    #  - radial deadzone: stick positions within 'deadzone' of center read as zero, and the
+    #    remaining travel is rescaled so output still starts at zero and reaches full scale
+    #  - expo curve: blends linear and cubic response for finer control near center
+    #  - exponential smoothing: 'smoothing' is the weight of the new sample (1.0 = off)
+    #  - quantize to integers in -output_max..output_max
+    #  - hysteresis: the output only changes when an axis moves by at least 'hysteresis' counts
+    #
+    # update() returns True only when the quantized output actually changed, so callers
+    # can skip sending motor packets for stick noise.
+    def __init__(self, deadzone=0.1, expo=0.0, smoothing=1.0, hysteresis=2, output_max=127):
+        self.configure(deadzone=deadzone, expo=expo, smoothing=smoothing,
+                       hysteresis=hysteresis, output_max=output_max)
+        self.reset()
+
+    def configure(self, deadzone=None, expo=None, smoothing=None, hysteresis=None, output_max=None):
+        # Changes any filter setting. Unspecified settings are left unchanged.
+        if deadzone is not None:
+            if not (0.0 <= deadzone < 1.0):
+                raise ValueError("Deadzone must be between 0.0 and 1.0.")
+            self.deadzone = deadzone
+        if expo is not None:
+            if not (0.0 <= expo <= 1.0):
+                raise ValueError("Expo must be between 0.0 and 1.0.")
+            self.expo = expo
+        if smoothing is not None:
+            if not (0.0 < smoothing <= 1.0):
+                raise ValueError("Smoothing must be greater than 0.0 and at most 1.0.")
+            self.smoothing = smoothing
+        if hysteresis is not None:
+            if hysteresis < 0:
+                raise ValueError("Hysteresis cannot be negative.")
+            self.hysteresis = hysteresis
+        if output_max is not None:
+            self.output_max = output_max
+
+    def reset(self):
+        self.smooth_x = 0.0
+        self.smooth_y = 0.0
+        self.x = 0
+        self.y = 0
+        self.active = False
+
+    def update(self, raw_x, raw_y):
+        # Feeds one raw sample (-1.0 to 1.0 per axis). Returns True if the output changed.
+        magnitude = math.hypot(raw_x, raw_y)
+        if magnitude <= self.deadzone:
+            # Released: drop to zero immediately rather than smoothing towards it
+            self.smooth_x = self.smooth_y = 0.0
+            self.active = False
+            return self._set_output(0, 0)
+
+        self.active = True
+        scaled = min((magnitude - self.deadzone) / (1.0 - self.deadzone), 1.0)
+        scaled = (1.0 - self.expo) * scaled + self.expo * scaled ** 3
+        x = raw_x / magnitude * scaled
+        y = raw_y / magnitude * scaled
+
+        alpha = self.smoothing
+        self.smooth_x += alpha * (x - self.smooth_x)
+        self.smooth_y += alpha * (y - self.smooth_y)
+
+        x_int = round(self.smooth_x * self.output_max)
+        y_int = round(self.smooth_y * self.output_max)
+        # Small moves are ignored, except that an axis may always settle exactly on center or full scale
+        ends = (0, self.output_max, -self.output_max)
+        small = abs(x_int - self.x) < self.hysteresis and abs(y_int - self.y) < self.hysteresis
+        settles = (x_int != self.x and x_int in ends) or (y_int != self.y and y_int in ends)
+        if small and not settles:
+            return False
+        return self._set_output(x_int, y_int)
+
+    def _set_output(self, x, y):
+        if x == self.x and y == self.y:
+            return False
+        self.x = x
+        self.y = y
+        return True
@@ -0,0 +1,389 @@
+################################################################
+# Driver Hot Path Benchmarks for ND Robotics Course
+# 10-19-2026
+################################################################
+# Runs every driver hot path against the simulated hardware (hal "sim" backend) and saves
+# the results as JSON so versions can be compared.
+#
+#   python benchmarks/run_benchmarks.py                       # run everything
+#   python benchmarks/run_benchmarks.py sabertooth_drive      # run selected benchmarks
+#   python benchmarks/run_benchmarks.py --compare results/old.json
+#   python benchmarks/run_benchmarks.py --set tft.spi_speed_hz=16000000 tft_update_display
+#   python benchmarks/run_benchmarks.py --sweep tft.spi_speed_hz=4000000,8000000,16000000 tft_update_display
+#
+# --set overrides robot config values (robot.toml) for the run; --sweep runs the selected
+# benchmarks once per value and prints them side by side.
+# Benchmarks whose libraries are missing (PIL, cv2, tensorflow, ...) are reported as skipped.
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DRIVER_DIR = os.path.dirname(BENCH_DIR)
+REPO_DIR = os.path.dirname(os.path.dirname(DRIVER_DIR))
+DATASET_DIR = os.path.join(REPO_DIR, "dataset")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, DRIVER_DIR)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import hal
+hal.select("sim")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    # Registers a benchmark function. It receives the iteration count and returns a result dict.
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def measure(func, iterations, warmup=3):
+    # Times func() 'iterations' times and returns latency statistics in milliseconds.
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    return latency_stats(samples)
+
+
+def latency_stats(samples):
+    # Latency statistics in milliseconds for a list of nanosecond samples.
+    samples = sorted(samples)
+    iterations = len(samples)
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "mean_ms": total / iterations / 1e6,
+        "min_ms": samples[0] / 1e6,
+        "p50_ms": samples[iterations // 2] / 1e6,
+        "p99_ms": samples[min(iterations - 1, int(iterations * 0.99))] / 1e6,
+        "max_ms": samples[-1] / 1e6,
+        "ops_per_s": iterations / (total / 1e9) if total else 0.0,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    # Keep driver start-up and shutdown messages off the terminal while measuring.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@benchmark("tft_update_display")
+def bench_tft_update_display(iterations):
+    from ambient_tft_display import TFTDisplay
+    with quiet():
+        display = TFTDisplay()
+        display.queue.join()
+    spi = display.spi
+    spi.reset_stats()
+    try:
+        result = measure(display._update_display, iterations, warmup=0)
+        result["bytes_per_frame"] = spi.bytes_sent / iterations
+        result["spi_transfers_per_frame"] = spi.transfers / iterations
+        result["modeled_spi_ms_per_frame"] = spi.modeled_ns / iterations / 1e6
+    finally:
+        with quiet():
+            display.close()
+    return result
+
+
+@benchmark("led_update_board")
+def bench_led_update_board(iterations):
+    from led_controller import LEDController
+    with quiet():
+        leds = LEDController()
+    leds.command_queue.join()
+    gpio = hal.GPIO._resolve()
+    gpio.reset_stats()
+    try:
+        leds.led_states = [i / 23 for i in range(24)]
+        result = measure(leds._update_board, max(1, iterations // 10), warmup=0)
+        result["gpio_writes_per_frame"] = sum(gpio.output_counts.values()) / result["iterations"]
+        result["modeled_gpio_ms_per_frame"] = gpio.modeled_ns / result["iterations"] / 1e6
+    finally:
+        with quiet():
+            leds.close()
+    return result
+
+
+@benchmark("sabertooth_drive")
+def bench_sabertooth_drive(iterations):
+    from sabertooth import Sabertooth
+    saber = Sabertooth(port="sim", startup_delay=0)  # Nothing to power up
+    speeds = [(s, -s // 2) for s in range(-127, 128, 8)]
+    state = {"i": 0}
+    bytes_before = saber.ser.bytes_written
+    modeled_before = saber.ser.modeled_ns
+
+    def drive():
+        speed, turn = speeds[state["i"] % len(speeds)]
+        state["i"] += 1
+        saber.drive(speed, turn)
+
+    try:
+        result = measure(drive, iterations, warmup=0)
+        result["packets_per_s"] = 2 * result["ops_per_s"]
+        result["bytes_per_call"] = (saber.ser.bytes_written - bytes_before) / iterations
+        # Time the same bytes take on the wire at the configured baud rate
+        result["modeled_serial_ms_per_call"] = (saber.ser.modeled_ns - modeled_before) / iterations / 1e6
+    finally:
+        saber.close()
+    return result
+
+
+@benchmark("estop_latency")
+def bench_estop_latency(iterations):
+    # Time from the e-stop switch's edge to the stop packets being on the wire, while another
+    # thread keeps driving. Serial writes take their real transmit time, so the worst case
+    # includes waiting for a drive packet that is already being sent.
+    import logging
+    import random
+    import threading
+    from sabertooth import Sabertooth
+    from estop import EStop, log as estop_log
+
+    pin = 17
+    saber = Sabertooth(port="sim", startup_delay=0)
+    saber.ser.realtime = True
+    gpio = hal.GPIO._resolve()
+    estop = EStop(saber)
+    estop.watch_gpio(pin)
+    level = estop_log.level
+    estop_log.setLevel(logging.ERROR)
+    done = threading.Event()
+
+    def keep_driving():
+        # Back-to-back drive commands, with a short gap so the loop doesn't hold the GIL
+        speed = 0
+        while not done.wait(0.001):
+            speed = (speed + 8) % 128
+            saber.drive(speed, -speed // 2)
+
+    driver = threading.Thread(target=keep_driving, daemon=True)
+    driver.start()
+    samples = []
+    try:
+        for _ in range(iterations):
+            time.sleep(random.uniform(0.001, 0.01))  # Land at a random point in the drive traffic
+            start = time.perf_counter_ns()
+            gpio.set_input(pin, gpio.LOW)
+            samples.append(time.perf_counter_ns() - start)
+            gpio.set_input(pin, gpio.HIGH)
+            estop.reset("benchmark")
+        result = latency_stats(samples)
+        result["worst_case_ms"] = result["max_ms"]
+        # Wire time of the first stop packet alone at the configured baud rate
+        result["modeled_first_stop_ms"] = 4 * 10 * 1000 / saber.ser.baudrate
+    finally:
+        done.set()
+        driver.join(timeout=1)
+        estop_log.setLevel(level)
+        estop.close()
+        saber.close()
+    return result
+
+
+@benchmark("ps5_check_controls")
+def bench_ps5_check_controls(iterations):
+    from input_log import InputFrame, LOG_HEADER, LOG_MAGIC, LOG_VERSION, NUM_BUTTONS, NUM_AXES, AXIS_SCALE
+    from ps5_controller import PS5_Controller
+    import math
+
+    # A synthetic session: the left stick circling, buttons pressed now and then
+    path = os.path.join(tempfile.mkdtemp(), "bench.ps5log")
+    with open(path, "wb") as f:
+        f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, NUM_BUTTONS, NUM_AXES))
+        for i in range(1000):
+            angle = i / 50
+            axes = [0] * NUM_AXES
+            axes[0] = round(math.cos(angle) * 0.8 * AXIS_SCALE)
+            axes[1] = round(math.sin(angle) * 0.8 * AXIS_SCALE)
+            buttons = 1 << (i % NUM_BUTTONS) if i % 25 == 0 else 0
+            f.write(InputFrame(buttons, (0, 0), tuple(axes)).pack(i * 20_000_000))
+
+    with quiet():
+        ps5 = PS5_Controller()
+        ps5.replay(path, speed=None, loop=True)
+
+        def poll():
+            ps5.check_controls()
+            ps5.reset_controller_state()
+
+        result = measure(poll, iterations)
+    os.remove(path)
+    return result
+
+
+@benchmark("sign_recognition")
+def bench_sign_recognition(iterations):
+    import turn_right
+    camera = hal.Picamera2()
+    camera.configure(camera.create_still_configuration(main={"size": (1024, 768)}))
+    camera.start()
+    templates = turn_right.load_sign_templates(os.path.join(DATASET_DIR, "image_roadsign"))
+    frames = max(1, iterations // 10)
+    result = measure(lambda: turn_right.detect_sign(camera.capture_array(), templates), frames, warmup=1)
+    result["frames_per_s"] = result["ops_per_s"]
+    camera.close()
+    return result
+
+
+@benchmark("xml2tfrecord")
+def bench_xml2tfrecord(iterations):
+    sys.path.insert(0, os.path.join(REPO_DIR, "code", "xml2tfrecord"))
+    import xml2tfrecord
+    image_dir = os.path.join(DATASET_DIR, "captured_pic")
+    file_ids = sorted(os.path.splitext(f)[0] for f in os.listdir(image_dir) if f.endswith(".xml"))
+    state = {"i": 0}
+
+    def convert():
+        file_id = file_ids[state["i"] % len(file_ids)]
+        state["i"] += 1
+        example = xml2tfrecord.create_tf_example(os.path.join(image_dir, file_id + ".xml"),
+                                                 os.path.join(image_dir, file_id + ".jpg"))
+        example.SerializeToString()
+
+    result = measure(convert, max(len(file_ids), iterations // 10), warmup=1)
+    result["records_per_s"] = result["ops_per_s"]
+    return result
+
+
+def git_version():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=DRIVER_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(names, iterations):
+    results = {}
+    for name in names:
+        print(f"Running {name}...")
+        try:
+            results[name] = BENCHMARKS[name](iterations)
+        except ImportError as e:
+            results[name] = {"skipped": f"missing dependency: {e.name or e}"}
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"  {summary(results[name])}")
+    return results
+
+
+def summary(result):
+    if "skipped" in result:
+        return f"skipped ({result['skipped']})"
+    if "error" in result:
+        return f"error ({result['error']})"
+    extras = ", ".join(f"{k} {v:.1f}" for k, v in result.items()
+                       if k.endswith(("_per_frame", "_per_s", "_per_call")) and k != "ops_per_s")
+    if "worst_case_ms" in result:
+        extras = ", ".join(filter(None, [f"worst {result['worst_case_ms']:.3f} ms", extras]))
+    return f"mean {result['mean_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms" + (f", {extras}" if extras else "")
+
+
+def compare(old, new):
+    # Prints the change in mean time for each benchmark present in both result files.
+    print(f"\nCompared with {old['version']} ({old['timestamp']}):")
+    for name, result in new["results"].items():
+        before = old["results"].get(name, {})
+        if "mean_ms" not in result or "mean_ms" not in before:
+            continue
+        change = (result["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100
+        print(f"  {name}: {before['mean_ms']:.3f} ms -> {result['mean_ms']:.3f} ms ({change:+.1f}%)")
+
+
+def sweep(setting, names, iterations, overrides):
+    # Runs the benchmarks in a fresh process for each value of one config setting, since drivers
+    # read the config once. Returns {value: results}.
+    key, _, values = setting.partition("=")
+    results = {}
+    for value in filter(None, values.split(",")):
+        print(f"\n=== {key}={value} ===")
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "result.json")
+            command = [sys.executable, os.path.abspath(__file__), "--iterations", str(iterations),
+                       "--output", output, "--set", f"{key}={value}", *names]
+            for override in overrides:
+                command += ["--set", override]
+            subprocess.run(command, check=True)
+            with open(output) as f:
+                results[value] = json.load(f)["results"]
+    print(f"\nResults by {key}:")
+    for name in names or list(BENCHMARKS):
+        print(f"  {name}:")
+        for value, result in results.items():
+            print(f"    {value}: {summary(result.get(name, {'skipped': 'not run'}))}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the robot drivers on simulated hardware.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="result file (default: results/<timestamp>_<version>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--set", action="append", default=[], metavar="SECTION.KEY=VALUE",
+                        help="override a robot config value (repeatable)")
+    parser.add_argument("--sweep", metavar="SECTION.KEY=V1,V2,...",
+                        help="run once per value of a config setting and compare")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    # Drivers read the config on first use, so the overrides must be in place before any run.
+    if args.set:
+        os.environ["ROBOT_CONFIG_SET"] = ";".join(filter(None, [os.environ.get("ROBOT_CONFIG_SET")] + args.set))
+    from robot_config import config, ConfigError
+    try:
+        cfg = config()
+    except ConfigError as e:
+        parser.error(str(e))
+
+    version = git_version()
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = {
+        "version": version,
+        "timestamp": timestamp,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": cfg.source,
+        "overrides": os.environ.get("ROBOT_CONFIG_SET", ""),
+    }
+    if args.sweep:
+        report["sweep"] = args.sweep
+        report["results"] = sweep(args.sweep, args.names, args.iterations, args.set)
+    else:
+        report["results"] = run(args.names or list(BENCHMARKS), args.iterations)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{timestamp}_{version}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare and not args.sweep:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
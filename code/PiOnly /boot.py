@@ -0,0 +1,175 @@
+################################################################
+# Boot Orchestrator for ND Robotics Course
+# 10-19-2026
+################################################################
+# Starts the robot subsystems concurrently and records a startup timeline.
+#
+#   boot = BootOrchestrator()
+#   boot.add("ps5", create_ps5)
+#   boot.add("saber", create_saber)
+#   boot.add("display", create_display)
+#   boot.add("failsafe", add_failsafe, depends=("ps5", "saber"))
+#   boot.start()
+#   ps5, saber = boot.wait("ps5", "saber")   # drive as soon as these are up
+#   boot.mark("drivable")
+#
+# Each step runs on its own worker thread once the steps it depends on have finished, and
+# receives their results as arguments. Steps that fail are logged; steps that depend on them
+# are skipped.
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from metrics import metrics
+from robot_logging import get_logger
+
+log = get_logger("boot")
+
+
+class LazyModule:
+    # Stands in for a module until first attribute access, so heavy libraries (pygame, PIL,
+    # pydub, ...) are loaded by the boot step that needs them instead of at startup.
+    # Loading is locked, so several boot threads can touch the same module safely.
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    # Returns the module if it is already loaded, otherwise a LazyModule for it.
+    return sys.modules.get(name) or LazyModule(name)
+
+
+class BootStep:
+    __slots__ = ("name", "func", "depends", "future", "start", "end", "error")
+
+    def __init__(self, name, func, depends):
+        self.name = name
+        self.func = func
+        self.depends = depends
+        self.future = None
+        self.start = None
+        self.end = None
+        self.error = None
+
+
+class BootOrchestrator:
+    def __init__(self, max_workers=None, clock=time.perf_counter):
+        self.steps = {}
+        self.marks = {}
+        self.max_workers = max_workers
+        self.clock = clock
+        self.executor = None
+        self.t0 = None
+        self.completed = threading.Event()
+
+    def add(self, name, func, depends=()):
+        # param name: Step name used in the timeline.
+        # param func: Callable run with the results of 'depends' as arguments.
+        # param depends: Names of steps that must finish first (added before this one).
+        if self.executor is not None:
+            raise RuntimeError("Steps must be added before start().")
+        if name in self.steps:
+            raise ValueError(f"Boot step '{name}' is already defined.")
+        for dep in depends:
+            if dep not in self.steps:
+                raise ValueError(f"Boot step '{name}' depends on unknown step '{dep}'.")
+        self.steps[name] = BootStep(name, func, tuple(depends))
+
+    def start(self):
+        # Starts every step and returns immediately. Steps are submitted in the order they were
+        # added, so a step's dependencies are always already running when it waits on them.
+        self.t0 = self.clock()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers or len(self.steps) or 1,
+                                           thread_name_prefix="boot")
+        for step in self.steps.values():
+            step.future = self.executor.submit(self._run_step, step)
+        threading.Thread(target=self._finish, name="boot-report", daemon=True).start()
+        return self
+
+    def _run_step(self, step):
+        args = [self.steps[dep].future.result() for dep in step.depends]
+        step.start = self.clock()
+        try:
+            return step.func(*args)
+        except Exception as e:
+            step.error = e
+            log.error("Boot step '%s' failed: %s", step.name, e)
+            raise
+        finally:
+            step.end = self.clock()
+            metrics.gauge(f"boot.{step.name}_ms").set((step.end - self.t0) * 1000)
+
+    def _finish(self):
+        wait_futures([step.future for step in self.steps.values()])
+        self.mark("complete")
+        self.executor.shutdown(wait=False)
+        self.completed.set()
+        log.info("Startup timeline:\n%s", self.report())
+
+    def wait(self, *names, timeout=None):
+        # Blocks until the named steps finish and returns their results (a single value for one
+        # name). Raises the step's exception if it failed.
+        results = [self.steps[name].future.result(timeout) for name in names]
+        return results[0] if len(results) == 1 else results
+
+    def join(self, timeout=None):
+        # Waits for every step. Returns True if they all finished.
+        return self.completed.wait(timeout)
+
+    def get(self, name, default=None):
+        # Result of a step if it has finished successfully, else 'default'. Never blocks.
+        future = self.steps[name].future
+        if future is None or not future.done() or future.exception() is not None:
+            return default
+        return future.result()
+
+    def mark(self, name):
+        # Records a milestone (e.g. "drivable") in the timeline.
+        self.marks[name] = self.clock()
+        metrics.gauge(f"boot.{name}_ms").set((self.marks[name] - self.t0) * 1000)
+
+    def timeline(self):
+        # Returns (name, start_ms, end_ms, status) rows relative to start(), in start order.
+        rows = []
+        for step in self.steps.values():
+            if step.start is None:
+                status = "skipped" if step.future is not None and step.future.done() else "pending"
+                rows.append((step.name, None, None, status))
+                continue
+            end = step.end if step.end is not None else self.clock()
+            status = "failed" if step.error else ("done" if step.end is not None else "running")
+            rows.append((step.name, (step.start - self.t0) * 1000, (end - self.t0) * 1000, status))
+        for name, t in self.marks.items():
+            rows.append((name, (t - self.t0) * 1000, (t - self.t0) * 1000, "mark"))
+        return sorted(rows, key=lambda row: float("inf") if row[1] is None else row[1])
+
+    def report(self, width=40):
+        rows = self.timeline()
+        total = max([row[2] for row in rows if row[2] is not None] + [1.0])
+        lines = []
+        for name, start, end, status in rows:
+            if start is None:
+                lines.append(f"{name:>16} {'':>17} {status}")
+                continue
+            first = int(start / total * width)
+            last = max(first + 1, int(end / total * width))
+            bar = " " * first + ("|" if status == "mark" else "#" * (last - first))
+            lines.append(f"{name:>16} {start:7.1f}-{end:7.1f} ms {bar:<{width}} {status}")
+        return "\n".join(lines)
@@ -0,0 +1,174 @@
+################################################################
+# Emergency Stop for ND Robotics Course
+# 10-19-2026
+################################################################
+# Stops the motors the moment the e-stop combo is pressed or the e-stop switch opens, without
+# waiting for the control loop, the scheduler or any command queue:
+#
+#   estop = EStop.from_config(saber, ps5)   # combo, joystick device and GPIO from robot.toml
+#
+# or wire the inputs by hand:
+#
+#   estop = EStop(saber)
+#   estop.watch_controller(ps5, combo=(4, 5))          # L1 + R1 through pygame
+#   estop.watch_joystick_device("/dev/input/js0")      # same combo, read straight from the kernel
+#   estop.watch_gpio(17)                               # switch from GPIO17 to ground
+#
+# Every input calls Sabertooth.emergency_stop() on its own thread (the GPIO interrupt thread,
+# the device reader thread), which writes the stop packets straight to the serial port.
+# The stop stays latched until the reset combo is pressed or reset() is called.
+import os
+import select
+import struct
+import threading
+import time
+from hal import GPIO
+from metrics import metrics
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("estop")
+
+# Linux joystick API event (linux/joystick.h): time (ms), value, type, number
+JS_EVENT = struct.Struct("<IhBB")
+JS_EVENT_BUTTON = 0x01
+JS_EVENT_INIT = 0x80
+
+
+class EStop:
+    def __init__(self, saber):
+        self.saber = saber
+        self.callbacks = []
+        self.gpio_pin = None
+        self.gpio_active = None
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # Runtime metrics (see metrics.py)
+        self.trigger_count = metrics.counter("estop.triggers")
+        self.latency = metrics.histogram("estop.latency_us")
+        metrics.gauge("estop.latched", lambda: int(self.latched))
+
+    @property
+    def latched(self):
+        return self.saber.estopped.is_set()
+
+    def add_callback(self, callback):
+        # Registers a callback run with the source name after the motors have been stopped.
+        self.callbacks.append(callback)
+
+    def trigger(self, source="manual"):
+        # Stops the motors now. Safe to call from any thread, and again while latched.
+        start = time.perf_counter_ns()
+        already_latched = self.latched
+        self.saber.emergency_stop()
+        self.latency.observe((time.perf_counter_ns() - start) // 1000)
+        if already_latched:
+            return
+        self.trigger_count.inc()
+        log.warning("Emergency stop (%s)", source)
+        for callback in self.callbacks:
+            try:
+                callback(source)
+            except Exception as e:
+                log.error("Error in e-stop callback: %s", e)
+
+    def reset(self, source="manual"):
+        # Releases the stop. Refused while the e-stop switch is still pressed.
+        # return: True if the stop was released.
+        if not self.latched:
+            return True
+        if self.gpio_pin is not None and GPIO.input(self.gpio_pin) == self.gpio_active:
+            log.warning("E-stop switch on GPIO%d is still pressed; not releasing", self.gpio_pin)
+            return False
+        self.saber.clear_emergency_stop()
+        log.info("Emergency stop released (%s)", source)
+        return True
+
+    def watch_controller(self, ps5, combo=(4, 5), reset_combo=(10,)):
+        # Checks the combos on the PS5 controller's polling thread (works with replayed input).
+        # param combo: Controller button numbers to hold together (default L1 + R1).
+        # param reset_combo: Buttons that release the stop (default PS).
+        ps5.add_combo(combo, lambda: self.trigger("controller"))
+        ps5.add_combo(reset_combo, lambda: self.reset("controller"))
+
+    def watch_gpio(self, pin, active_low=True, bouncetime=20):
+        # Triggers on an e-stop switch. The edge interrupt calls trigger() directly.
+        # param pin: BCM pin of the switch.
+        # param active_low: Switch connects the pin to ground (internal pull-up) when pressed.
+        # param bouncetime: Milliseconds to ignore further edges after one fires.
+        self.gpio_pin = pin
+        self.gpio_active = GPIO.LOW if active_low else GPIO.HIGH
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP if active_low else GPIO.PUD_DOWN)
+        GPIO.add_event_detect(pin, GPIO.FALLING if active_low else GPIO.RISING,
+                              callback=lambda channel: self.trigger(f"GPIO{channel}"), bouncetime=bouncetime)
+
+    def watch_joystick_device(self, path="/dev/input/js0", combo=(4, 5), reset_combo=(10,)):
+        # Reads button events from the joystick device on a dedicated thread, so the combo
+        # works even when the main loop or pygame is stalled. Waits for the device to appear
+        # and reopens it after a reconnect.
+        thread = threading.Thread(target=self._watch_device, args=(path, set(combo), set(reset_combo)),
+                                  name="estop-js", daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def _watch_device(self, path, combo, reset_combo):
+        reported = False
+        while not self.stop_event.is_set():
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if not reported:
+                    log.info("Waiting for %s (%s)", path, e.strerror)
+                    reported = True
+                self.stop_event.wait(1.0)
+                continue
+            log.info("Watching %s for the e-stop combo", path)
+            reported = False
+            pressed = set()
+            try:
+                while not self.stop_event.is_set():
+                    ready, _, _ = select.select([fd], [], [], 0.5)
+                    if not ready:
+                        continue
+                    data = os.read(fd, JS_EVENT.size * 32)
+                    if not data:
+                        break
+                    for _, value, kind, number in JS_EVENT.iter_unpack(data[:len(data) - len(data) % JS_EVENT.size]):
+                        if not kind & JS_EVENT_BUTTON:
+                            continue
+                        if not value:
+                            pressed.discard(number)
+                            continue
+                        pressed.add(number)
+                        if kind & JS_EVENT_INIT:
+                            continue  # Initial state on open, not a press
+                        if number in combo and combo <= pressed:
+                            self.trigger(path)
+                        elif number in reset_combo and reset_combo <= pressed:
+                            self.reset(path)
+            except OSError:
+                pass  # Unplugged; wait for it to come back
+            finally:
+                os.close(fd)
+
+    def close(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1)
+        if self.gpio_pin is not None:
+            GPIO.remove_event_detect(self.gpio_pin)
+
+    @classmethod
+    def from_config(cls, saber, ps5=None):
+        # An EStop with every input enabled in the [estop] section of the robot config.
+        cfg = config().estop
+        estop = cls(saber)
+        if ps5 is not None:
+            estop.watch_controller(ps5, cfg.combo, cfg.reset_combo)
+        if cfg.device:
+            estop.watch_joystick_device(cfg.device, cfg.combo, cfg.reset_combo)
+        if cfg.gpio_pin >= 0:
+            estop.watch_gpio(cfg.gpio_pin, cfg.active_low)
+        return estop
@@ -0,0 +1,124 @@
+################################################################
+# Hardware Abstraction Layer for ND Robotics Course
+# 10-19-2026
+################################################################
+# Drivers import their hardware through this package instead of directly:
+#
+#   from hal import GPIO, spidev, open_serial, SMBus, Picamera2
+#
+# The backend is chosen once at startup, before any hardware is used:
+#  - "real" (default): RPi.GPIO, spidev, pyserial, smbus2 and picamera2
+#  - "sim": simulated devices that record traffic and model timing (see hal/sim_*.py),
+#           so the drivers can be profiled and benchmarked on a normal Linux machine
+#
+# Select with the ROBOT_HAL environment variable or hal.select("sim").
+import os
+
+BACKENDS = ("real", "sim")
+_backend = None
+
+
+def select(backend):
+    # Chooses the hardware backend. Must be called before any hardware is used.
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HAL backend '{backend}'. Use one of {BACKENDS}.")
+    if _backend is not None and _backend != backend and any(p._target is not None for p in _proxies):
+        raise RuntimeError(f"HAL backend is already '{_backend}' and hardware is in use.")
+    _backend = backend
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        select(os.environ.get("ROBOT_HAL", "real"))
+    return _backend
+
+
+def simulated():
+    return backend() == "sim"
+
+
+class _BackendProxy:
+    # Stands in for a hardware module and loads the selected backend on first use.
+    # Looked-up attributes are cached on the proxy, so later calls cost a normal attribute lookup.
+    def __init__(self, name, load_real, load_sim):
+        self._name = name
+        self._load_real = load_real
+        self._load_sim = load_sim
+        self._target = None
+
+    def _resolve(self):
+        if self._target is None:
+            self._target = self._load_sim() if simulated() else self._load_real()
+        return self._target
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = getattr(self._resolve(), name)
+        setattr(self, name, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<hal {self._name} ({backend()})>"
+
+
+def _real_gpio():
+    import RPi.GPIO as GPIO
+    return GPIO
+
+
+def _sim_gpio():
+    from hal.sim_gpio import GPIO
+    return GPIO
+
+
+def _real_spidev():
+    import spidev
+    return spidev
+
+
+def _sim_spidev():
+    from hal import sim_spi
+    return sim_spi
+
+
+def _real_smbus():
+    from smbus2 import SMBus
+    return SMBus
+
+
+def _sim_smbus():
+    from hal.sim_i2c import SMBus
+    return SMBus
+
+
+def _real_camera():
+    from picamera2 import Picamera2
+    return Picamera2
+
+
+def _sim_camera():
+    from hal.sim_camera import Picamera2
+    return Picamera2
+
+
+GPIO = _BackendProxy("GPIO", _real_gpio, _sim_gpio)
+spidev = _BackendProxy("spidev", _real_spidev, _sim_spidev)
+SMBus = _BackendProxy("SMBus", _real_smbus, _sim_smbus)
+Picamera2 = _BackendProxy("Picamera2", _real_camera, _sim_camera)
+_proxies = (GPIO, spidev, SMBus, Picamera2)
+
+
+def open_serial(port, baudrate=9600, timeout=0.1):
+    # Opens a serial port. The real backend accepts a device path or a pyserial URL
+    # (e.g. loop://); the sim backend always opens a pseudo-terminal (see hal/sim_serial.py).
+    if simulated():
+        from hal.sim_serial import PtySerial
+        return PtySerial(port, baudrate=baudrate, timeout=timeout)
+    import serial
+    return serial.serial_for_url(port, baudrate=baudrate, timeout=timeout)
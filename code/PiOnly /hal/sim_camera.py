@@ -0,0 +1,74 @@
+################################################################
+# Simulated Picamera2 for ND Robotics Course
+# 10-19-2026
+################################################################
+import glob
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+# Images captured from the robot camera, replayed as frames
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "dataset", "captured_pic")
+
+
+class Picamera2:
+    # Drop-in for the parts of Picamera2 the vision loop uses.
+    #
+    # capture_array() returns the dataset images in a loop, resized to the configured size, as
+    # 3-channel BGR arrays. Images are decoded once when the camera starts so frame rates
+    # measure the vision code, not JPEG decoding. With a frame_rate the camera also paces
+    # captures like the real sensor.
+    def __init__(self, image_dir=DATASET_DIR, frame_rate=None):
+        self.image_paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")),
+                                  key=lambda p: (len(os.path.basename(p)), os.path.basename(p)))
+        if not self.image_paths:
+            raise FileNotFoundError(f"No .jpg images found in {image_dir}")
+        self.frame_rate = frame_rate
+        self.size = (640, 480)
+        self.frames = []
+        self.index = 0
+        self.frames_captured = 0
+        self.started = False
+        self._last_capture = 0.0
+
+    def create_still_configuration(self, main=None, **kwargs):
+        return {"main": dict(main or {"size": self.size})}
+
+    def create_preview_configuration(self, main=None, **kwargs):
+        return self.create_still_configuration(main)
+
+    def create_video_configuration(self, main=None, **kwargs):
+        return self.create_still_configuration(main)
+
+    def configure(self, config):
+        self.size = tuple(config["main"].get("size", self.size))
+
+    def start(self):
+        self.frames = []
+        for path in self.image_paths:
+            with Image.open(path) as image:
+                rgb = np.asarray(image.convert("RGB").resize(self.size))
+            self.frames.append(np.ascontiguousarray(rgb[:, :, ::-1]))
+        self.started = True
+
+    def capture_array(self, name="main"):
+        if not self.started:
+            raise RuntimeError("Camera has not been started")
+        if self.frame_rate:
+            wait = self._last_capture + 1.0 / self.frame_rate - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_capture = time.monotonic()
+        frame = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        self.frames_captured += 1
+        return frame.copy()
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.stop()
+        self.frames = []
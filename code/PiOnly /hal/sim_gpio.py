@@ -0,0 +1,135 @@
+################################################################
+# Simulated RPi.GPIO for ND Robotics Course
+# 10-19-2026
+################################################################
+import time
+
+
+class SimPWM:
+    def __init__(self, gpio, pin, frequency):
+        self.gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0
+
+    def start(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+        self.gpio._cost(self.gpio.output_cost_ns)
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.duty_cycle = 0
+
+
+class SimGPIO:
+    # Drop-in for the parts of RPi.GPIO the robot uses.
+    #
+    # Pin levels are kept in memory and every output() is counted per pin. Each call adds
+    # 'output_cost_ns' (roughly what RPi.GPIO costs on a Pi 4) to modeled_ns, so a benchmark
+    # can report the time the same calls would take on the robot. With realtime=True the
+    # cost is also spent for real.
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, output_cost_ns=1500, realtime=False):
+        self.output_cost_ns = output_cost_ns
+        self.realtime = realtime
+        self.mode = None
+        self.reset_stats()
+        self.levels = {}
+        self.directions = {}
+        self.edge_callbacks = {}
+
+    def reset_stats(self):
+        self.output_counts = {}
+        self.modeled_ns = 0
+
+    def _cost(self, ns):
+        self.modeled_ns += ns
+        if self.realtime:
+            end = time.perf_counter_ns() + ns
+            while time.perf_counter_ns() < end:
+                pass
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def getmode(self):
+        return self.mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        pins = pin if isinstance(pin, (list, tuple)) else [pin]
+        for p in pins:
+            self.directions[p] = direction
+            if initial is not None:
+                self.levels[p] = initial
+            elif direction == self.IN:
+                self.levels.setdefault(p, self.HIGH if pull_up_down == self.PUD_UP else self.LOW)
+            else:
+                self.levels.setdefault(p, self.LOW)
+
+    def output(self, pin, value):
+        self.levels[pin] = 1 if value else 0
+        self.output_counts[pin] = self.output_counts.get(pin, 0) + 1
+        self._cost(self.output_cost_ns)
+
+    def input(self, pin):
+        return self.levels.get(pin, self.LOW)
+
+    def set_input(self, pin, value):
+        # Simulation only: drives an input pin and fires any edge callbacks.
+        old = self.levels.get(pin, self.LOW)
+        new = 1 if value else 0
+        self.levels[pin] = new
+        if old == new:
+            return
+        for edge, callback in self.edge_callbacks.get(pin, []):
+            if edge == self.BOTH or (edge == self.RISING and new) or (edge == self.FALLING and not new):
+                callback(pin)
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        self.edge_callbacks.setdefault(pin, [])
+        if callback is not None:
+            self.edge_callbacks[pin].append((edge, callback))
+
+    def add_event_callback(self, pin, callback):
+        self.edge_callbacks.setdefault(pin, []).append((self.BOTH, callback))
+
+    def remove_event_detect(self, pin):
+        self.edge_callbacks.pop(pin, None)
+
+    def PWM(self, pin, frequency):
+        return SimPWM(self, pin, frequency)
+
+    def cleanup(self, pins=None):
+        if pins is None:
+            self.levels.clear()
+            self.directions.clear()
+            self.edge_callbacks.clear()
+            return
+        for p in pins if isinstance(pins, (list, tuple)) else [pins]:
+            self.levels.pop(p, None)
+            self.directions.pop(p, None)
+            self.edge_callbacks.pop(p, None)
+
+
+# Shared instance, used like the RPi.GPIO module
+GPIO = SimGPIO()
@@ -0,0 +1,69 @@
+################################################################
+# Simulated smbus2.SMBus for ND Robotics Course
+# 10-19-2026
+################################################################
+import time
+
+
+class SMBus:
+    # Drop-in for smbus2.SMBus that records every write.
+    #
+    # Transfer time is modeled at the bus clock (9 bits per byte including ACK, plus the
+    # address and register bytes) and added to modeled_ns. read_* calls return the values
+    # stored with set_register().
+    def __init__(self, bus=None, clock_hz=100000, realtime=False):
+        self.bus = bus
+        self.clock_hz = clock_hz
+        self.realtime = realtime
+        self.registers = {}
+        self.writes = []
+        self.modeled_ns = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cost(self, nbytes):
+        ns = (nbytes + 2) * 9 * 1_000_000_000 // self.clock_hz
+        self.modeled_ns += ns
+        if self.realtime:
+            time.sleep(ns / 1e9)
+
+    def open(self, bus):
+        self.bus = bus
+
+    def close(self):
+        pass
+
+    def set_register(self, address, register, value):
+        # Simulation only: sets the value returned by reads
+        self.registers[(address, register)] = value
+
+    def write_byte(self, address, value):
+        self.writes.append((address, None, [value]))
+        self._cost(1)
+
+    def write_byte_data(self, address, register, value):
+        self.writes.append((address, register, [value]))
+        self._cost(1)
+
+    def write_i2c_block_data(self, address, register, data):
+        if len(data) > 32:
+            raise ValueError("I2C block writes are limited to 32 bytes")
+        self.writes.append((address, register, list(data)))
+        self._cost(len(data))
+
+    def read_byte(self, address):
+        self._cost(1)
+        return self.registers.get((address, None), 0)
+
+    def read_byte_data(self, address, register):
+        self._cost(1)
+        return self.registers.get((address, register), 0)
+
+    def read_i2c_block_data(self, address, register, length):
+        self._cost(length)
+        value = self.registers.get((address, register), [])
+        return (list(value) + [0] * length)[:length]
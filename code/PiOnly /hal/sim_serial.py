@@ -0,0 +1,104 @@
+################################################################
+# Simulated Serial Port (pseudo-terminal) for ND Robotics Course
+# 10-19-2026
+################################################################
+import os
+import select
+import termios
+import threading
+import time
+import tty
+
+
+class PtySerial:
+    # Serial port backed by a pseudo-terminal, with the same calls the drivers use from pyserial.
+    #
+    # The driver writes to the pty's slave side just like a real UART. The other end (the
+    # "device") is the master side: a background thread collects everything written into
+    # 'received', and peer_write() sends bytes back to the driver. Anything else can also open
+    # 'device_name' like a real tty. Transmit time is modeled at the baud rate (10 bits per byte).
+    def __init__(self, port=None, baudrate=9600, timeout=0.1, realtime=False):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.realtime = realtime
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        tty.setraw(self.slave_fd)
+        self.device_name = os.ttyname(self.slave_fd)
+        self.is_open = True
+
+        self.received = bytearray()
+        self.received_lock = threading.Lock()
+        self.bytes_written = 0
+        self.writes = 0
+        self.modeled_ns = 0
+        self._reader = threading.Thread(target=self._collect, daemon=True)
+        self._reader.start()
+
+    def _collect(self):
+        # Device side: drain everything the driver writes
+        while self.is_open:
+            try:
+                ready, _, _ = select.select([self.master_fd], [], [], 0.05)
+                if ready:
+                    data = os.read(self.master_fd, 4096)
+                    with self.received_lock:
+                        self.received += data
+            except OSError:
+                break
+
+    def write(self, data):
+        data = bytes(data)
+        written = os.write(self.slave_fd, data)
+        self.bytes_written += written
+        self.writes += 1
+        ns = written * 10 * 1_000_000_000 // self.baudrate
+        self.modeled_ns += ns
+        if self.realtime:
+            time.sleep(ns / 1e9)
+        return written
+
+    def flush(self):
+        termios.tcdrain(self.slave_fd)
+
+    def read(self, size=1):
+        data = bytearray()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while len(data) < size:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.slave_fd], [], [], remaining)
+            if not ready:
+                break
+            data += os.read(self.slave_fd, size - len(data))
+        return bytes(data)
+
+    @property
+    def in_waiting(self):
+        ready, _, _ = select.select([self.slave_fd], [], [], 0)
+        return 1 if ready else 0
+
+    def reset_input_buffer(self):
+        termios.tcflush(self.slave_fd, termios.TCIFLUSH)
+
+    def reset_output_buffer(self):
+        termios.tcflush(self.slave_fd, termios.TCOFLUSH)
+
+    def peer_write(self, data):
+        # Simulation only: sends bytes from the device to the driver.
+        os.write(self.master_fd, bytes(data))
+
+    def take_received(self):
+        # Simulation only: returns and clears everything the device has received.
+        with self.received_lock:
+            data = bytes(self.received)
+            self.received.clear()
+        return data
+
+    def close(self):
+        if not self.is_open:
+            return
+        self.is_open = False
+        self._reader.join(timeout=1)
+        os.close(self.slave_fd)
+        os.close(self.master_fd)
@@ -0,0 +1,76 @@
+################################################################
+# Simulated spidev for ND Robotics Course
+# 10-19-2026
+################################################################
+import time
+
+
+class SpiDev:
+    # Drop-in for spidev.SpiDev that records the bytes sent.
+    #
+    # Transfer time is modeled from the clock rate (8 bits per byte at max_speed_hz plus a
+    # fixed per-transfer overhead) and added to modeled_ns. With realtime=True the transfer
+    # also takes that long for real, which makes display benchmarks reflect the SPI bus.
+    transfer_overhead_ns = 20000
+    max_transfer = 4096
+
+    def __init__(self, realtime=False, keep_bytes=False):
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.bits_per_word = 8
+        self.realtime = realtime
+        self.keep_bytes = keep_bytes
+        self.bus = None
+        self.device = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.bytes_sent = 0
+        self.transfers = 0
+        self.modeled_ns = 0
+        self.sent = bytearray()
+
+    def open(self, bus, device):
+        self.bus = bus
+        self.device = device
+
+    def close(self):
+        self.bus = None
+
+    def _transfer(self, data):
+        if self.bus is None:
+            raise OSError("SPI device is not open")
+        if len(data) > self.max_transfer:
+            raise OverflowError(f"SPI transfer of {len(data)} bytes exceeds {self.max_transfer}")
+        ns = self.transfer_overhead_ns + len(data) * 8 * 1_000_000_000 // self.max_speed_hz
+        self.bytes_sent += len(data)
+        self.transfers += 1
+        self.modeled_ns += ns
+        if self.keep_bytes:
+            self.sent += bytes(data)
+        if self.realtime:
+            time.sleep(ns / 1e9)
+        return [0] * len(data)
+
+    def xfer(self, data, *args):
+        return self._transfer(data)
+
+    def xfer2(self, data, *args):
+        return self._transfer(data)
+
+    def xfer3(self, data, *args):
+        # spidev's xfer3 splits large buffers itself
+        result = []
+        for i in range(0, len(data), self.max_transfer):
+            result += self._transfer(data[i:i + self.max_transfer])
+        return result
+
+    def writebytes(self, data):
+        self._transfer(data)
+
+    def writebytes2(self, data):
+        for i in range(0, len(data), self.max_transfer):
+            self._transfer(data[i:i + self.max_transfer])
+
+    def readbytes(self, n):
+        return self._transfer([0] * n)
@@ -0,0 +1,211 @@
+################################################################
+# PS5 Input Recording and Replay for ND Robotics Course
+# 10-19-2026
+################################################################
+import struct
+import time
+
+# File layout: an 8-byte header followed by one fixed-size record per input change.
+#   header: magic b"PS5R", format version, number of buttons, number of axes
+#   record: time offset (ns), button bitmask, hat x, hat y, axes scaled to int16
+LOG_MAGIC = b"PS5R"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<4sBBH")
+NUM_BUTTONS = 13
+NUM_AXES = 6
+LOG_RECORD = struct.Struct(f"<QHbb{NUM_AXES}h")
+AXIS_SCALE = 32767
+
+
+class InputFrame:
+    # One sample of every control the PS5_Controller reads
+    __slots__ = ("buttons", "hat", "axes")
+
+    def __init__(self, buttons=0, hat=(0, 0), axes=(0,) * NUM_AXES):
+        self.buttons = buttons
+        self.hat = hat
+        self.axes = axes
+
+    @classmethod
+    def read(cls, joystick):
+        buttons = 0
+        for i in range(NUM_BUTTONS):
+            if joystick.get_button(i):
+                buttons |= 1 << i
+        axes = tuple(round(joystick.get_axis(i) * AXIS_SCALE) for i in range(NUM_AXES))
+        return cls(buttons, tuple(joystick.get_hat(0)), axes)
+
+    def pack(self, t_ns):
+        return LOG_RECORD.pack(t_ns, self.buttons, self.hat[0], self.hat[1], *self.axes)
+
+    @classmethod
+    def unpack(cls, data):
+        t_ns, buttons, hat_x, hat_y, *axes = LOG_RECORD.unpack(data)
+        return t_ns, cls(buttons, (hat_x, hat_y), tuple(axes))
+
+    def same_as(self, other):
+        return self.buttons == other.buttons and self.hat == other.hat and self.axes == other.axes
+
+
+class FrameJoystick:
+    # Joystick interface (get_button/get_axis/get_hat) served from the current InputFrame.
+    def __init__(self, name):
+        self.name = name
+        self.frame = InputFrame()
+
+    def init(self):
+        pass
+
+    def quit(self):
+        pass
+
+    def get_name(self):
+        return self.name
+
+    def get_numbuttons(self):
+        return NUM_BUTTONS
+
+    def get_numaxes(self):
+        return NUM_AXES
+
+    def get_button(self, button):
+        return (self.frame.buttons >> button) & 1
+
+    def get_axis(self, axis):
+        return self.frame.axes[axis] / AXIS_SCALE
+
+    def get_hat(self, hat):
+        return self.frame.hat
+
+
+class RecordingJoystick(FrameJoystick):
+    # Wraps a real joystick and appends a record to the log whenever its inputs change.
+    def __init__(self, joystick, path):
+        super().__init__(joystick.get_name())
+        self.joystick = joystick
+        self.file = open(path, "wb")
+        self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, NUM_BUTTONS, NUM_AXES))
+        self.start_ns = time.monotonic_ns()
+        self.frame = None
+        self.records = 0
+
+    def poll(self):
+        # Samples the real joystick once; called at the start of every check_controls()
+        frame = InputFrame.read(self.joystick)
+        if self.frame is None or not frame.same_as(self.frame):
+            self.file.write(frame.pack(time.monotonic_ns() - self.start_ns))
+            self.records += 1
+        self.frame = frame
+
+    def clock(self):
+        return time.time()
+
+    def close(self):
+        self.file.close()
+
+
+class ReplayJoystick(FrameJoystick):
+    # Replays a recorded log through the joystick interface.
+    #
+    # speed=1.0 replays in real time, speed=10.0 ten times faster. speed=None steps one
+    # record per poll and reports the recorded time from clock(), which makes the replay
+    # fully deterministic no matter how fast the host runs.
+    def __init__(self, path, speed=1.0, loop=False):
+        super().__init__("Replay")
+        self.speed = speed
+        self.loop = loop
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, num_buttons, num_axes = LOG_HEADER.unpack_from(data, 0)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(f"{path} is not a PS5 input log")
+        if num_buttons != NUM_BUTTONS or num_axes != NUM_AXES:
+            raise ValueError(f"{path} was recorded with {num_buttons} buttons and {num_axes} axes")
+        self.records = [InputFrame.unpack(record) for record in
+                        (data[i:i + LOG_RECORD.size] for i in range(LOG_HEADER.size, len(data), LOG_RECORD.size))
+                        if len(record) == LOG_RECORD.size]
+        self.duration_ns = self.records[-1][0] if self.records else 0
+        self.rewind()
+
+    def rewind(self):
+        self.index = 0
+        self.now_ns = 0
+        self.frame = InputFrame()
+        self.start_ns = time.monotonic_ns()
+
+    @property
+    def finished(self):
+        return self.index >= len(self.records)
+
+    def poll(self):
+        # Advances to the latest record due at the current replay time
+        if self.finished:
+            if not self.loop:
+                return
+            self.rewind()
+        if self.speed is None:
+            self.now_ns, self.frame = self.records[self.index]
+            self.index += 1
+            return
+        self.now_ns = int((time.monotonic_ns() - self.start_ns) * self.speed)
+        while self.index < len(self.records) and self.records[self.index][0] <= self.now_ns:
+            self.frame = self.records[self.index][1]
+            self.index += 1
+
+    def clock(self):
+        # Replay time in seconds, used by PS5_Controller for debouncing and rate limits
+        return self.now_ns / 1e9
+
+    def close(self):
+        pass
+
+
+# ----- Test Code -----
+if __name__ == "__main__":
+    # Record:  python input_log.py record drive.ps5log
+    # Replay:  python input_log.py replay drive.ps5log [speed] [serial port or URL]
+    #
+    # Replay runs check_controls -> move_robot -> Sabertooth.drive end to end. On a machine
+    # without a controller or UART use SDL_VIDEODRIVER=dummy SDL_AUDIODRIVER=dummy and a
+    # pyserial URL such as loop:// for the port.
+    import os
+    import sys
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from ps5_controller import PS5_Controller
+
+    mode, path = sys.argv[1], sys.argv[2]
+    ps5 = PS5_Controller()
+    try:
+        if mode == "record":
+            ps5.initialize_controller()
+            ps5.record(path)
+            print("Recording, press Ctrl-C to stop...")
+            try:
+                while True:
+                    ps5.check_controls()
+                    ps5.reset_controller_state()
+                    time.sleep(0.02)
+            except KeyboardInterrupt:
+                pass
+        else:
+            from sabertooth import Sabertooth
+            from robot_controller import move_robot
+            speed = float(sys.argv[3]) if len(sys.argv) > 3 else None
+            port = sys.argv[4] if len(sys.argv) > 4 else "loop://"
+            ps5.replay(path, speed=speed)
+            saber = Sabertooth(port=port)
+            polls = 0
+            start = time.perf_counter()
+            while not ps5.joystick.finished:
+                ps5.check_controls()
+                if ps5.control_request["reqLeftJoyMade"]:
+                    move_robot(saber, ps5.control_request)
+                ps5.reset_controller_state()
+                polls += 1
+                if speed is not None:
+                    time.sleep(0.02 / speed)
+            elapsed = time.perf_counter() - start
+            print(f"Replayed {polls} polls in {elapsed:.3f} s")
+            saber.close()
+    finally:
+        ps5.close_input_log()
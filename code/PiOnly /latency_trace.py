@@ -0,0 +1,111 @@
+################################################################
+# Control Loop Latency Tracing for ND Robotics Course
+# 10-19-2026
+################################################################
+import time
+from array import array
+
+# Stages of the input -> actuator path, in order.
+STAGES = ("input", "move_robot", "drive", "serial_write")
+INPUT, MOVE_ROBOT, DRIVE, SERIAL_WRITE = range(len(STAGES))
+
+
+class LatencyTracer:
+    # Timestamps each stage of the control path with time.monotonic_ns().
+    #
+    # begin() starts a trace when new stick input is read; mark(stage) stamps the later stages
+    # of the most recent trace (only the first mark of each stage counts). Timestamps go into a
+    # preallocated ring buffer of 'capacity' traces, so recording never allocates and costs
+    # well under a microsecond. A trace superseded by new input before it reached the motors
+    # is simply left incomplete and ignored in the statistics.
+    def __init__(self, capacity=4096, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.times = array("q", bytes(8 * capacity * len(STAGES)))
+        self.trace_id = -1
+
+    def begin(self):
+        if not self.enabled:
+            return
+        trace_id = self.trace_id + 1
+        base = (trace_id % self.capacity) * len(STAGES)
+        times = self.times
+        times[base] = time.monotonic_ns()
+        for stage in range(1, len(STAGES)):
+            times[base + stage] = 0
+        self.trace_id = trace_id
+
+    def mark(self, stage):
+        if not self.enabled or self.trace_id < 0:
+            return
+        index = (self.trace_id % self.capacity) * len(STAGES) + stage
+        if not self.times[index]:
+            self.times[index] = time.monotonic_ns()
+
+    def clear(self):
+        self.times = array("q", bytes(8 * self.capacity * len(STAGES)))
+        self.trace_id = -1
+
+    def traces(self):
+        # Returns the recorded traces (oldest first) as tuples of stage timestamps (0 = not reached).
+        if self.trace_id < 0:
+            return []
+        count = min(self.trace_id + 1, self.capacity)
+        first = self.trace_id + 1 - count
+        n = len(STAGES)
+        result = []
+        for trace_id in range(first, self.trace_id + 1):
+            base = (trace_id % self.capacity) * n
+            result.append(tuple(self.times[base:base + n]))
+        return result
+
+    def latencies(self, stage):
+        # Nanoseconds from input to 'stage' for every trace that reached it.
+        return [t[stage] - t[INPUT] for t in self.traces() if t[stage]]
+
+    def stats(self):
+        # p50/p99/max (milliseconds) from input to each later stage.
+        result = {}
+        for stage in range(1, len(STAGES)):
+            values = sorted(self.latencies(stage))
+            if not values:
+                result[STAGES[stage]] = {"count": 0}
+                continue
+            result[STAGES[stage]] = {
+                "count": len(values),
+                "p50_ms": values[len(values) // 2] / 1e6,
+                "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))] / 1e6,
+                "max_ms": values[-1] / 1e6,
+            }
+        return result
+
+    def histogram(self, stage):
+        # Counts per power-of-two bucket: {upper bound in microseconds: count}.
+        buckets = {}
+        for value in self.latencies(stage):
+            bound = 1
+            while bound * 1000 < value:
+                bound *= 2
+            buckets[bound] = buckets.get(bound, 0) + 1
+        return dict(sorted(buckets.items()))
+
+    def report(self):
+        lines = []
+        for name, s in self.stats().items():
+            if s["count"]:
+                lines.append(f"input -> {name}: {s['count']} traces, p50 {s['p50_ms']:.3f} ms, "
+                             f"p99 {s['p99_ms']:.3f} ms, max {s['max_ms']:.3f} ms")
+            else:
+                lines.append(f"input -> {name}: no traces")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        # Writes every recorded trace as CSV (monotonic ns per stage, 0 = not reached).
+        with open(path, "w") as f:
+            f.write(",".join(STAGES) + "\n")
+            for trace in self.traces():
+                f.write(",".join(str(t) for t in trace) + "\n")
+
+
+# Shared tracer used by PS5_Controller, move_robot and Sabertooth.
+tracer = LatencyTracer()
@@ -6,13 +6,19 @@
 import threading
 import queue
 import time
-import RPi.GPIO as GPIO
+from hal import GPIO
 import random
+from metrics import metrics
+from robot_config import config
+
+# Runtime metrics (see metrics.py)
+frame_count = metrics.counter("led.frames")
+frame_time = metrics.histogram("led.frame_us")
 
 class LEDController:
     # LEDController for the TLC5947 24-channel, 12-bit PWM LED driver.
     #
-    # This implementation uses three hard-coded GPIO pins:
+    # This implementation uses three GPIO pins, set in the robot config (defaults shown):
     #  - SIN (Data Input) on GPIO 23
     #  - SCLK (Serial Clock) on GPIO 24
     #  - XLAT (Latch) on GPIO 25
@@ -29,10 +35,11 @@ class LEDController:
     # assembles a 288-bit stream (with channel 23 first, down to channel 0),
     # shifts the data out using bit-banging on SIN and SCLK, and pulses XLAT to latch the data.
     def __init__(self):
-        # Hard-coded pin assignments.
-        self.SIN_PIN = 23    # Data input
-        self.SCLK_PIN = 24   # Serial clock
-        self.XLAT_PIN = 25   # Latch signal
+        # Pin assignments from the [leds] section of the robot config.
+        cfg = config().leds
+        self.SIN_PIN = cfg.sin_pin    # Data input
+        self.SCLK_PIN = cfg.sclk_pin  # Serial clock
+        self.XLAT_PIN = cfg.xlat_pin  # Latch signal
         
         # List of pins used (for selective cleanup).
         self._used_pins = [self.SIN_PIN, self.SCLK_PIN, self.XLAT_PIN]
@@ -43,9 +50,9 @@ class LEDController:
         self.led_states = [0.0] * self.num_leds
         
         # Gamma value for brightness correction.
-        self.gamma = 2.2
+        self.gamma = cfg.gamma
         
-        self.bit_delay = 0.0001  # 100 microseconds; adjust this value as needed.
+        self.bit_delay = cfg.bit_delay  # 100 microseconds by default; adjust in the config.
         
         # Initialize GPIO.
         GPIO.setmode(GPIO.BCM)
@@ -116,6 +123,7 @@ class LEDController:
         # Convert LED intensities to 12-bit values (using gamma correction) and send 288 bits (MSB-first per channel)
         # to the TLC5947 via bit-banging. Then, pulse XLAT to latch the data.
         # Apply gamma correction and convert intensities (0.0 - 1.0) to 12-bit integers (0 - 4095).
+        start = time.perf_counter_ns()
         pwm_values = [int((val ** self.gamma) * 4095) for val in self.led_states]
         
         # Build bitstream: channel 23 first, down to channel 0; each channel is 12 bits (MSB-first).
@@ -136,6 +144,8 @@ class LEDController:
         GPIO.output(self.XLAT_PIN, 1)
         time.sleep(self.bit_delay)
         GPIO.output(self.XLAT_PIN, 0)
+        frame_time.observe((time.perf_counter_ns() - start) // 1000)
+        frame_count.inc()
     
     def close(self):
         # Gracefully shut down the worker thread, clear the command queue,
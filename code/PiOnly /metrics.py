@@ -0,0 +1,195 @@
+################################################################
+# Runtime Metrics for ND Robotics Course
+# 10-19-2026
+################################################################
+# All drivers report into the shared 'metrics' registry:
+#
+#   from metrics import metrics
+#   packets = metrics.counter("sabertooth.packets")
+#   packets.inc()
+#
+# Updating a metric is a plain attribute update (no locks, no I/O), so it is safe on the
+# control hot path. serve_http() / serve_unix() publish the registry for debugging.
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Counter:
+    __slots__ = ("name", "value")
+    kind = "counter"
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def read(self):
+        return self.value
+
+
+class Gauge:
+    __slots__ = ("name", "value", "func")
+    kind = "gauge"
+
+    def __init__(self, name, func=None):
+        self.name = name
+        self.value = 0
+        self.func = func
+
+    def set(self, value):
+        self.value = value
+
+    def read(self):
+        return self.func() if self.func is not None else self.value
+
+
+class Histogram:
+    # Power-of-two buckets in the metric's unit (e.g. microseconds): bucket i counts values <= 2**i.
+    __slots__ = ("name", "buckets", "count", "total", "max")
+    kind = "histogram"
+    NUM_BUCKETS = 32
+
+    def __init__(self, name):
+        self.name = name
+        self.buckets = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        index = int(value).bit_length() if value > 0 else 0
+        if index >= self.NUM_BUCKETS:
+            index = self.NUM_BUCKETS - 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the given fraction of observations
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(1 << index, self.max)
+        return self.max
+
+    def read(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "buckets": {1 << i: n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+
+    def _get(self, cls, name, *args):
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = cls(name, *args)
+        if not isinstance(metric, cls):
+            raise TypeError(f"Metric '{name}' is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name):
+        return self._get(Counter, name)
+
+    def gauge(self, name, func=None):
+        # param func: Optional callable evaluated whenever the gauge is read.
+        gauge = self._get(Gauge, name)
+        if func is not None:
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name):
+        return self._get(Histogram, name)
+
+    def snapshot(self):
+        values = {}
+        for name, metric in sorted(self.metrics.items()):
+            try:
+                values[name] = metric.read()
+            except Exception as e:
+                values[name] = f"error: {e}"
+        return {"uptime_s": time.time() - self.start_time, "metrics": values}
+
+    def to_text(self):
+        # One "name value" line per metric; histograms expand to name.count, name.p99, ...
+        lines = []
+        for name, value in self.snapshot()["metrics"].items():
+            if isinstance(value, dict):
+                for key in ("count", "mean", "p50", "p99", "max"):
+                    lines.append(f"{name}.{key} {value[key]}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry used by every driver
+metrics = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path in ("/", "/metrics"):
+            body, content_type = metrics.to_text(), "text/plain"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _UnixMetricsHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(json.dumps(metrics.snapshot()).encode("utf-8") + b"\n")
+
+
+def _serve(server, name):
+    thread = threading.Thread(target=server.serve_forever, name=name, daemon=True)
+    thread.start()
+    return server
+
+
+def serve_http(port=9100, host="127.0.0.1"):
+    # Serves /metrics (text) and /metrics.json on localhost from a background thread.
+    # Returns the server; call shutdown() on it to stop.
+    return _serve(ThreadingHTTPServer((host, port), _MetricsHandler), "metrics-http")
+
+
+def serve_unix(path="/tmp/robot_metrics.sock"):
+    # Writes a JSON snapshot to every client that connects to the Unix socket,
+    # e.g. socat - UNIX-CONNECT:/tmp/robot_metrics.sock
+    if os.path.exists(path):
+        os.remove(path)
+    return _serve(socketserver.ThreadingUnixStreamServer(path, _UnixMetricsHandler), "metrics-unix")
@@ -0,0 +1,159 @@
+################################################################
+# Mixer Latency Calibration for ND Robotics Course
+# 10-19-2026
+################################################################
+# Finds the smallest mixer buffer that plays without underruns on this Pi:
+#
+#   python mixer_calibration.py                       # buffers 256-4096 at sound.sample_rate
+#   python mixer_calibration.py --load 3 --seconds 5  # with 3 busy processes loading the CPU
+#
+# For each buffer size the mixer is reopened and a tone is played while the ALSA playback
+# status (/proc/asound/card*/pcm*p/sub*/status) is sampled:
+#  - latency: time for the play() call, plus the frames already queued in ALSA ahead of the
+#    new sound (appl_ptr - hw_ptr), plus one mixer buffer
+#  - underruns: XRUN states seen, or the hardware pointer falling more than a buffer behind
+#    the wall clock
+# Without ALSA (e.g. a PulseAudio desktop) latency is estimated from the buffer size alone
+# and underruns aren't measured.
+import argparse
+import glob
+import math
+import multiprocessing
+import statistics
+import time
+from array import array
+import pygame
+from robot_config import config
+
+
+def alsa_playback_status():
+    # Status fields of the running ALSA playback stream, or None.
+    for path in sorted(glob.glob("/proc/asound/card*/pcm*p/sub*/status")):
+        try:
+            with open(path) as f:
+                lines = f.read().splitlines()
+        except OSError:
+            continue
+        status = {}
+        for line in lines:
+            key, sep, value = line.partition(":")
+            if sep:
+                status[key.strip()] = value.strip()
+        if status.get("state") in ("RUNNING", "XRUN"):
+            return status
+    return None
+
+
+def tone(seconds=0.5, frequency=440.0):
+    # A sine tone as a Sound in the mixer's current format.
+    rate, size, channels = pygame.mixer.get_init()
+    samples = array("h")
+    for i in range(int(seconds * rate)):
+        value = int(8000 * math.sin(2 * math.pi * frequency * i / rate))
+        samples.extend([value] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+def _burn(stop_event):
+    while not stop_event.is_set():
+        pass
+
+
+def measure(sample_rate, buffer_size, seconds=3.0, load=0, trials=20):
+    # Opens the mixer with 'buffer_size' and measures latency and underruns.
+    # return: dict of results (latency in ms).
+    pygame.mixer.quit()
+    pygame.mixer.init(sample_rate, -16, 2, buffer_size)
+    rate = pygame.mixer.get_init()[0]
+    buffer_ms = buffer_size / rate * 1000
+    beep = tone(0.05)
+    bed = tone(1.0, 220.0)
+    bed.set_volume(0.05)
+
+    stop_event = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=_burn, args=(stop_event,), daemon=True) for _ in range(load)]
+    for worker in workers:
+        worker.start()
+
+    channel = bed.play(loops=-1)  # Keeps the stream running while it is sampled
+    time.sleep(0.2)
+    latencies = []
+    underruns = None  # Unknown without ALSA
+    xrun_seen = False
+    try:
+        for _ in range(trials):
+            status = alsa_playback_status()
+            start = time.perf_counter()
+            beep.play()
+            call_ms = (time.perf_counter() - start) * 1000
+            queued_ms = 0.0
+            if status is not None:
+                queued_ms = (int(status.get("appl_ptr", 0)) - int(status.get("hw_ptr", 0))) / rate * 1000
+            latencies.append(call_ms + max(0.0, queued_ms) + buffer_ms)
+            time.sleep(0.05)
+
+        # Watch the hardware pointer keep up with the clock
+        status = alsa_playback_status()
+        if status is not None:
+            underruns = 0
+            start = time.perf_counter()
+            start_ptr = int(status["hw_ptr"])
+            behind = 0.0
+            while time.perf_counter() - start < seconds:
+                time.sleep(0.01)
+                status = alsa_playback_status()
+                if status is None or status.get("state") == "XRUN":
+                    if not xrun_seen:
+                        underruns += 1
+                    xrun_seen = True
+                    continue
+                xrun_seen = False
+                expected = (time.perf_counter() - start) * rate
+                lag = expected - (int(status["hw_ptr"]) - start_ptr)
+                if lag - behind > buffer_size:
+                    underruns += 1
+                    behind = lag
+    finally:
+        channel.stop()
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1)
+
+    return {
+        "buffer_size": buffer_size,
+        "sample_rate": rate,
+        "buffer_ms": buffer_ms,
+        "latency_ms": statistics.median(latencies),
+        "latency_max_ms": max(latencies),
+        "underruns": underruns,
+    }
+
+
+def calibrate(sample_rate=None, buffer_sizes=(256, 512, 1024, 2048, 4096), seconds=3.0, load=0):
+    # Measures every buffer size and returns (results, smallest buffer without underruns).
+    sample_rate = sample_rate or config().sound.sample_rate
+    results = [measure(sample_rate, size, seconds, load) for size in buffer_sizes]
+    clean = [r["buffer_size"] for r in results if r["underruns"] == 0]
+    return results, (min(clean) if clean else None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure mixer latency and underruns per buffer size.")
+    parser.add_argument("--rate", type=int, help="Sample rate (default: sound.sample_rate)")
+    parser.add_argument("--buffers", default="256,512,1024,2048,4096", help="Comma-separated buffer sizes")
+    parser.add_argument("--seconds", type=float, default=3.0, help="How long to watch for underruns")
+    parser.add_argument("--load", type=int, default=0, help="Busy processes to run while measuring")
+    args = parser.parse_args()
+
+    pygame.init()
+    results, best = calibrate(args.rate, [int(b) for b in args.buffers.split(",")], args.seconds, args.load)
+    print(f"{'buffer':>8} {'rate':>7} {'buffer ms':>10} {'latency ms':>11} {'max ms':>8} {'underruns':>10}")
+    for r in results:
+        underruns = "n/a" if r["underruns"] is None else r["underruns"]
+        print(f"{r['buffer_size']:>8} {r['sample_rate']:>7} {r['buffer_ms']:>10.1f} "
+              f"{r['latency_ms']:>11.1f} {r['latency_max_ms']:>8.1f} {underruns:>10}")
+    if best is not None:
+        print(f"\nSmallest buffer without underruns: {best} (set sound.buffer_size = {best} in robot.toml)")
+    else:
+        print("\nUnderruns weren't measured (no ALSA playback status) or every buffer underran.")
+    pygame.quit()
@@ -5,6 +5,207 @@
 ################################################################
 import pygame
 import time
+import struct
+import threading
+import queue
+from array import array
+from collections import namedtuple
+from collections.abc import MutableMapping
+from shared_state import SeqlockState
+from input_log import RecordingJoystick, ReplayJoystick
+from axis_filter import StickFilter
+from latency_trace import tracer
+from metrics import metrics
+from robot_logging import get_logger, RATE_LIMITED
+from robot_config import config
+
+log = get_logger("ps5")
+
+# Edge-triggered requests, one bit each in ControllerState.buttons.
+# These are cleared together by reset_controller_state() after each loop.
+BUTTON_KEYS = (
+    "reqMade", "reqArrowUp", "reqArrowDown", "reqArrowLeft", "reqArrowRight",
+    "reqCircle", "reqCross", "reqTriangle", "reqSquare",
+    "reqL1", "reqL2", "reqR1", "reqR2",
+    "reqShare", "reqOptions", "reqPS",
+    "reqJSLeftButton", "reqJSRightButton",
+    "reqLeftJoyChanged", "reqRightJoyChanged"
+)
+
+# Level-triggered joystick requests, one bit each in ControllerState.flags.
+FLAG_KEYS = (
+    "joystickLeftSending", "joystickRightSending",
+    "reqLeftJoyMade", "reqRightJoyMade",
+    "reqLeftJoyUp", "reqLeftJoyDown", "reqLeftJoyLeft", "reqLeftJoyRight",
+    "reqRightJoyUp", "reqRightJoyDown", "reqRightJoyLeft", "reqRightJoyRight"
+)
+
+# Joystick values (-127 to 127), stored as int16 in ControllerState.axes.
+AXIS_KEYS = ("reqLeftJoyYValue", "reqLeftJoyXValue", "reqRightJoyYValue", "reqRightJoyXValue")
+
+BUTTON_BITS = {key: 1 << i for i, key in enumerate(BUTTON_KEYS)}
+FLAG_BITS = {key: 1 << i for i, key in enumerate(FLAG_KEYS)}
+AXIS_INDEX = {key: i for i, key in enumerate(AXIS_KEYS)}
+
+REQ_MADE = BUTTON_BITS["reqMade"]
+# Button and D-pad presses, which also raise reqMade
+PRESS_BITS = sum(BUTTON_BITS[key] for key in BUTTON_KEYS[1:18])
+
+# Controller button number -> request bit
+BUTTON_MAP = {
+    0: BUTTON_BITS["reqCross"], 1: BUTTON_BITS["reqCircle"],
+    2: BUTTON_BITS["reqTriangle"], 3: BUTTON_BITS["reqSquare"],
+    4: BUTTON_BITS["reqL1"], 5: BUTTON_BITS["reqR1"],
+    6: BUTTON_BITS["reqL2"], 7: BUTTON_BITS["reqR2"],
+    8: BUTTON_BITS["reqShare"], 9: BUTTON_BITS["reqOptions"], 10: BUTTON_BITS["reqPS"],
+    11: BUTTON_BITS["reqJSLeftButton"], 12: BUTTON_BITS["reqJSRightButton"]
+}
+
+# D-pad hat position -> (debounce key, request bit, name)
+HAT_MAP = {
+    (0, 1): (13, BUTTON_BITS["reqArrowUp"], "Arrow_Up"),
+    (0, -1): (14, BUTTON_BITS["reqArrowDown"], "Arrow_Down"),
+    (-1, 0): (15, BUTTON_BITS["reqArrowLeft"], "Arrow_Left"),
+    (1, 0): (16, BUTTON_BITS["reqArrowRight"], "Arrow_Right")
+}
+
+
+class JoystickSide:
+    # Precomputed bits and axis slots for one joystick so the hot path never builds key strings.
+    __slots__ = ("name", "sending", "made", "up", "down", "left", "right", "all_flags",
+                 "changed", "y_index", "x_index")
+
+    def __init__(self, name):
+        prefix = f"req{name}Joy"
+        self.name = name
+        self.sending = FLAG_BITS[f"joystick{name}Sending"]
+        self.made = FLAG_BITS[f"{prefix}Made"]
+        self.up = FLAG_BITS[f"{prefix}Up"]
+        self.down = FLAG_BITS[f"{prefix}Down"]
+        self.left = FLAG_BITS[f"{prefix}Left"]
+        self.right = FLAG_BITS[f"{prefix}Right"]
+        self.all_flags = self.sending | self.made | self.up | self.down | self.left | self.right
+        self.changed = BUTTON_BITS[f"{prefix}Changed"]
+        self.y_index = AXIS_INDEX[f"{prefix}YValue"]
+        self.x_index = AXIS_INDEX[f"{prefix}XValue"]
+
+
+LEFT_JOYSTICK = JoystickSide("Left")
+RIGHT_JOYSTICK = JoystickSide("Right")
+
+
+class ControllerState:
+    # Compact controller state: a button bitmask, a joystick flag bitmask and four int16 axes.
+    #
+    # The whole state packs into a fixed 16-byte record (STATE_FORMAT), which is what
+    # snapshot() copies, so another thread always gets a consistent copy.
+    STATE_FORMAT = struct.Struct("<IIhhhh")
+    __slots__ = ("buttons", "flags", "axes")
+
+    def __init__(self, buttons=0, flags=0, axes=(0, 0, 0, 0)):
+        self.buttons = buttons
+        self.flags = flags
+        self.axes = array("h", axes)
+
+    def reset_buttons(self):
+        # O(1) reset of every edge-triggered request
+        self.buttons = 0
+
+    def pack(self):
+        return self.STATE_FORMAT.pack(self.buttons, self.flags, *self.axes)
+
+    @classmethod
+    def unpack(cls, data):
+        buttons, flags, *axes = cls.STATE_FORMAT.unpack(data)
+        return cls(buttons, flags, axes)
+
+    def snapshot(self):
+        # Copies the whole state in one operation
+        return self.unpack(self.pack())
+
+    def as_dict(self):
+        return dict(ControlRequestView(self))
+
+    def __eq__(self, other):
+        if not isinstance(other, ControllerState):
+            return NotImplemented
+        return self.pack() == other.pack()
+
+    def __repr__(self):
+        return f"ControllerState(buttons={self.buttons:#x}, flags={self.flags:#x}, axes={tuple(self.axes)})"
+
+
+class ControlRequestView(MutableMapping):
+    # Dict-compatible view of a ControllerState using the original control_request key names,
+    # so existing callers like move_robot() keep working unchanged.
+    __slots__ = ("state",)
+
+    def __init__(self, state):
+        self.state = state
+
+    def __getitem__(self, key):
+        bit = BUTTON_BITS.get(key)
+        if bit is not None:
+            return bool(self.state.buttons & bit)
+        bit = FLAG_BITS.get(key)
+        if bit is not None:
+            return bool(self.state.flags & bit)
+        return self.state.axes[AXIS_INDEX[key]]
+
+    def __setitem__(self, key, value):
+        bit = BUTTON_BITS.get(key)
+        if bit is not None:
+            if value:
+                self.state.buttons |= bit
+            else:
+                self.state.buttons &= ~bit
+            return
+        bit = FLAG_BITS.get(key)
+        if bit is not None:
+            if value:
+                self.state.flags |= bit
+            else:
+                self.state.flags &= ~bit
+            return
+        self.state.axes[AXIS_INDEX[key]] = value
+
+    def __delitem__(self, key):
+        raise TypeError("control_request keys are fixed and cannot be deleted")
+
+    def __iter__(self):
+        yield from FLAG_KEYS[:2]
+        yield from BUTTON_KEYS[:1]
+        yield from FLAG_KEYS[2:]
+        yield from AXIS_KEYS
+        yield from BUTTON_KEYS[1:]
+
+    def __len__(self):
+        return len(BUTTON_KEYS) + len(FLAG_KEYS) + len(AXIS_KEYS)
+
+    def __contains__(self, key):
+        return key in BUTTON_BITS or key in FLAG_BITS or key in AXIS_INDEX
+
+
+class ControllerSnapshot(namedtuple("ControllerSnapshot", "version timestamp state")):
+    # Immutable, versioned copy of the controller state published by the input thread.
+    # The state inside a snapshot is never modified after it is published.
+    __slots__ = ()
+
+    @property
+    def control_request(self):
+        # Read-only use only: dict-compatible view of the snapshot state
+        return ControlRequestView(self.state)
+
+
+EMPTY_SNAPSHOT = ControllerSnapshot(0, 0.0, ControllerState())
+
+
+def read_shared_state(shared_state):
+    # Reads the latest (version, ControllerState) from a SeqlockState written by PS5_Controller.
+    # Use this from other processes, e.g. SeqlockState.attach(name, ControllerState.STATE_FORMAT.size).
+    version, data = shared_state.read()
+    return version, ControllerState.unpack(data)
+
 
 class PS5_Controller:
     def __init__(self):
@@ -12,68 +213,162 @@ class PS5_Controller:
         pygame.joystick.init()
         self.joystick = None
         self.firstMessage = True
+        self.connected_event = threading.Event()
+        self.failsafe_callbacks = []
+        self.connect_callbacks = []
+        self.combo_callbacks = []
+        # Set to True if other code reads JOYBUTTONDOWN/JOYBUTTONUP from the pygame event queue
+        self.keep_button_events = False
         self.last_press_time = {}
-        self.debounce_time = 0.5
+        cfg = config().controller
+        self.debounce_time = cfg.debounce_time
+
+        # Time source for debouncing and rate limits (replaced by the replay clock)
+        self.clock = time.time
+        self.input_log = None
 
-        # Initialize last echo times for joysticks
-        self.lastEchoLeftTime = 0
-        self.lastEchoRightTime = 0
+        # Axis filtering for each stick (see configure_stick())
+        stick_settings = dict(deadzone=cfg.deadzone, expo=cfg.expo, smoothing=cfg.smoothing, hysteresis=cfg.hysteresis)
+        self.stick_filters = {"Left": StickFilter(**stick_settings), "Right": StickFilter(**stick_settings)}
 
         # Joystick Control Variables
-        self.control_request = {
-            "joystickLeftSending": False,
-            "joystickRightSending": False,
-            "reqMade": False,
-            "reqLeftJoyMade": False,
-            "reqRightJoyMade": False,
-            "reqLeftJoyUp": False,
-            "reqLeftJoyDown": False,
-            "reqLeftJoyLeft": False,
-            "reqLeftJoyRight": False,
-            "reqLeftJoyYValue": 0,
-            "reqLeftJoyXValue": 0,
-            "reqRightJoyUp": False,
-            "reqRightJoyDown": False,
-            "reqRightJoyLeft": False,
-            "reqRightJoyRight": False,
-            "reqRightJoyYValue": 0,
-            "reqRightJoyXValue": 0,
-            "reqArrowUp": False,
-            "reqArrowDown": False,
-            "reqArrowLeft": False,
-            "reqArrowRight": False,
-            "reqCircle": False,
-            "reqCross": False,
-            "reqTriangle": False,
-            "reqSquare": False,
-            "reqL1": False,
-            "reqL2": False,
-            "reqR1": False,
-            "reqR2": False,
-            "reqShare": False,
-            "reqOptions": False,
-            "reqPS": False,
-            "reqJSLeftButton": False,
-            "reqJSRightButton": False
-        }
-
-    def initialize_controller(self):
-        # Waits for a joystick to connect
-        while pygame.joystick.get_count() == 0:
-            if self.firstMessage:
-                print("Waiting for a joystick to connect...")
-                self.firstMessage = False
-            event = pygame.event.wait()
+        self.state = ControllerState()
+        self.control_request = ControlRequestView(self.state)
+
+        # Input thread and published snapshots (see start())
+        self.input_thread = None
+        self.stop_event = threading.Event()
+        self.snapshot_version = 0
+        self.latest_snapshot = EMPTY_SNAPSHOT
+        self.shared_state = None
+        self._acknowledged = queue.SimpleQueue()
+        # Request bit -> version of the first snapshot carrying its latest press, so handling
+        # an older snapshot never clears a newer press of the same button
+        self.raise_versions = {}
+        self._republish = False
+
+        # Runtime metrics (see metrics.py)
+        self.poll_count = metrics.counter("ps5.polls")
+        self.button_count = metrics.counter("ps5.button_presses")
+        self.stick_count = metrics.counter("ps5.stick_changes")
+        self.publish_count = metrics.counter("ps5.snapshots_published")
+        self.disconnect_count = metrics.counter("ps5.disconnects")
+        self.connected_gauge = metrics.gauge("ps5.connected")
+
+    def initialize_controller(self, block=True, timeout=None):
+        # Connects to the first joystick.
+        # param block: Wait until a joystick connects. With block=False this returns at once and
+        #              the joystick is picked up later by handle_events() (or the input thread).
+        # param timeout: Maximum seconds to wait when blocking (None waits forever).
+        # return: True if a joystick is connected.
+        if self.firstMessage and not self.connected_event.is_set():
+            log.info("Waiting for a joystick to connect...")
+            self.firstMessage = False
+        self.handle_events()
+        if not block or self.connected_event.is_set():
+            return self.connected_event.is_set()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.connected_event.is_set():
+            if self.input_thread is not None:
+                # The input thread owns the event queue; just wait for it to connect.
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.connected_event.wait(remaining)
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            event = pygame.event.wait(100)
+            if event.type == pygame.JOYDEVICEADDED and self.joystick is None:
+                self._connect(event.device_index)
+            else:
+                self.handle_events()
+        return self.connected_event.is_set()
+
+    def wait_for_controller(self, timeout=None):
+        # Blocks until a joystick is connected. Returns True if connected.
+        return self.connected_event.wait(timeout)
+
+    @property
+    def connected(self):
+        return self.connected_event.is_set()
+
+    def add_failsafe(self, callback):
+        # Registers a callback run immediately (on the polling thread) when the joystick disconnects,
+        # e.g. ps5.add_failsafe(saber.stop).
+        self.failsafe_callbacks.append(callback)
+
+    def add_combo(self, buttons, callback):
+        # Registers a callback run once (on the polling thread) when all 'buttons' are held
+        # together, e.g. ps5.add_combo((4, 5), saber.emergency_stop) for L1 + R1.
+        # param buttons: Controller button numbers (see BUTTON_MAP).
+        self.combo_callbacks.append([tuple(buttons), callback, False])
+
+    def add_connect_callback(self, callback):
+        # Registers a callback run with this controller whenever a joystick connects.
+        self.connect_callbacks.append(callback)
+
+    def handle_events(self):
+        # Handles joystick hot-plug events without blocking.
+        # Axis, hat and (unless keep_button_events is set) button events are discarded, since their
+        # state is polled directly. Left alone they would fill the queue and hide device events.
+        if isinstance(self.input_log, ReplayJoystick):
+            pygame.event.pump()
+            return
+        for event in pygame.event.get((pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED)):
             if event.type == pygame.JOYDEVICEADDED:
-                pygame.joystick.init()
-        
-        self.joystick = pygame.joystick.Joystick(0)
+                if self.joystick is None:
+                    self._connect(event.device_index)
+            elif self.joystick is not None:
+                joystick = getattr(self.joystick, "joystick", self.joystick)
+                if event.instance_id == joystick.get_instance_id():
+                    self._disconnect()
+        if self.keep_button_events:
+            pygame.event.clear((pygame.JOYAXISMOTION, pygame.JOYHATMOTION, pygame.JOYBALLMOTION))
+        else:
+            pygame.event.clear((pygame.JOYAXISMOTION, pygame.JOYHATMOTION, pygame.JOYBALLMOTION,
+                                pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP))
+        if self.joystick is None and pygame.joystick.get_count() > 0:
+            self._connect(0)
+
+    def _connect(self, device_index):
+        self.joystick = pygame.joystick.Joystick(device_index)
         self.joystick.init()
-        print(f"Detected joystick: {self.joystick.get_name()}")
+        self.last_press_time = {}
+        self.connected_event.set()
+        log.info("Detected joystick: %s", self.joystick.get_name())
+        self.connected_gauge.set(1)
+        for callback in self.connect_callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                log.error("Error in joystick connect callback: %s", e)
+
+    def _disconnect(self):
+        # Drops every request so nothing keeps acting on the last stick position, then runs the failsafes.
+        log.warning("Joystick disconnected. Waiting for it to reconnect...")
+        self.connected_gauge.set(0)
+        self.disconnect_count.inc()
+        self.close_input_log()
+        self.joystick = None
+        self.connected_event.clear()
+        self.state.buttons = 0
+        self.state.flags = 0
+        self.state.axes[:] = array("h", (0, 0, 0, 0))
+        for stick in self.stick_filters.values():
+            stick.reset()
+        if self.input_thread is not None:
+            self.publish()
+        for callback in self.failsafe_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.error("Error in joystick failsafe callback: %s", e)
 
     def is_debounced(self, key):
         # Debounces controller inputs
-        current_time = time.time()
+        current_time = self.clock()
         if key not in self.last_press_time or (current_time - self.last_press_time[key] > self.debounce_time):
             self.last_press_time[key] = current_time
             return True
@@ -81,93 +376,111 @@ class PS5_Controller:
 
     def check_controls(self):
         # Checks button and joystick states
+        if self.joystick is None:
+            return
+        state = self.state
+        if self.input_log is not None:
+            self.input_log.poll()
+
+        # Button combos (e.g. the e-stop) run first and aren't debounced
+        for combo in self.combo_callbacks:
+            held = all(self.joystick.get_button(button) for button in combo[0])
+            if held and not combo[2]:
+                try:
+                    combo[1]()
+                except Exception as e:
+                    log.error("Error in joystick combo callback: %s", e)
+            combo[2] = held
+
         # Check buttons
-        button_map = {
-            0: "reqCross", 1: "reqCircle", 2: "reqTriangle", 3: "reqSquare",
-            4: "reqL1", 5: "reqR1", 6: "reqL2", 7: "reqR2",
-            8: "reqShare", 9: "reqOptions", 10: "reqPS",
-            11: "reqJSLeftButton", 12: "reqJSRightButton"
-        }
-
-        for button, request_key in button_map.items():
+        for button, bit in BUTTON_MAP.items():
             if self.joystick.get_button(button) and self.is_debounced(button):
-                print(f"Button {request_key} pressed.")
-                self.control_request[request_key] = True
-                self.control_request["reqMade"] = True
+                log.debug("Button %s pressed.", BUTTON_KEYS[bit.bit_length() - 1])
+                self.button_count.inc()
+                self._raise(bit | REQ_MADE)
 
         # Check D-pad (hat switch)
-        hat = self.joystick.get_hat(0)
-        if hat == (0, 1) and self.is_debounced(13):
-            print("Button Arrow_Up pressed.")
-            self.control_request["reqArrowUp"] = True
-            self.control_request["reqMade"] = True
-
-        if hat == (0, -1) and self.is_debounced(14):
-            print("Button Arrow_Down pressed.")
-            self.control_request["reqArrowDown"] = True
-            self.control_request["reqMade"] = True
-
-        if hat == (-1, 0) and self.is_debounced(15):
-            print("Button Arrow_Left pressed.")
-            self.control_request["reqArrowLeft"] = True
-            self.control_request["reqMade"] = True
-
-        if hat == (1, 0) and self.is_debounced(16):
-            print("Button Arrow_Right pressed.")
-            self.control_request["reqArrowRight"] = True
-            self.control_request["reqMade"] = True
+        hat = HAT_MAP.get(self.joystick.get_hat(0))
+        if hat is not None and self.is_debounced(hat[0]):
+            log.debug("Button %s pressed.", hat[2])
+            self.button_count.inc()
+            self._raise(hat[1] | REQ_MADE)
 
         # Check left joystick
-        self.process_joystick(0, 1, "Left")
+        self.process_joystick(0, 1, LEFT_JOYSTICK)
 
         # Check right joystick
-        self.process_joystick(3, 4, "Right")
+        self.process_joystick(3, 4, RIGHT_JOYSTICK)
 
     def process_joystick(self, axis_x, axis_y, side):
-        # Handles joystick movements and manages flow control with a 50ms print rate limit
-        current_time = time.time()
-        control_prefix = f"req{side}Joy"
-        sending_flag = f"joystick{side}Sending"
-        last_echo_time = f"lastEcho{side}Time"
- 
-        lx = self.joystick.get_axis(axis_x)
-        ly = self.joystick.get_axis(axis_y)
-        moving = abs(lx) > 0.1 or abs(ly) > 0.1
-
-        if moving:
-            if not self.control_request[sending_flag]:
-                print(f"Joystick {side} started sending.")
-            self.control_request[sending_flag] = True
-            self.control_request[f"{control_prefix}Made"] = True
+        # Handles joystick movements and manages flow control
+        #
+        # Raw axes go through the side's StickFilter (deadzone, expo, smoothing, hysteresis).
+        # reqLeftJoyChanged / reqRightJoyChanged are raised only when the filtered output changes.
+        if isinstance(side, str):
+            side = LEFT_JOYSTICK if side == "Left" else RIGHT_JOYSTICK
+        state = self.state
+        stick = self.stick_filters[side.name]
+
+        changed = stick.update(self.joystick.get_axis(axis_x), self.joystick.get_axis(axis_y))
+        if changed and side is LEFT_JOYSTICK:
+            # The left stick drives the motors; trace it through to the serial write
+            tracer.begin()
+
+        if stick.active:
+            if not state.flags & side.sending:
+                log.debug("Joystick %s started sending.", side.name)
+            if not changed and state.flags & side.sending:
+                return
 
             # Set movement directions
-            self.control_request[f"{control_prefix}Up"] = ly < -0.1
-            self.control_request[f"{control_prefix}Down"] = ly > 0.1
-            self.control_request[f"{control_prefix}Right"] = lx > 0.1
-            self.control_request[f"{control_prefix}Left"] = lx < -0.1
-
-            # Convert joystick range (-1.0 to 1.0) to Sabertooth motor controller range (-127 to 127)
-            lx_int = self.map_integer(lx, -1, 1, -127, 127)
-            ly_int = self.map_integer(ly, -1, 1, -127, 127)
-
-            self.control_request[f"{control_prefix}YValue"] = ly_int
-            self.control_request[f"{control_prefix}XValue"] = lx_int
-
-            # Only print joystick data if at least 50ms has passed
-            if current_time - getattr(self, last_echo_time) >= 0.05:
-                print(f"Joystick {side} data sent: Y: {self.control_request[f'{control_prefix}YValue']} X: {self.control_request[f'{control_prefix}XValue']}")
-                setattr(self, last_echo_time, current_time)
-
-        elif self.control_request[sending_flag]:
-            print(f"Joystick {side} Stopped")
-            self.control_request[sending_flag] = False
-            self.control_request[f"{control_prefix}Made"] = False
-            self.control_request[f"{control_prefix}Up"] = False
-            self.control_request[f"{control_prefix}Down"] = False
-            self.control_request[f"{control_prefix}Left"] = False
-            self.control_request[f"{control_prefix}Right"] = False
-            self.control_request[f"{control_prefix}YValue"] = 0
-            self.control_request[f"{control_prefix}XValue"] = 0
+            lx_int = stick.x
+            ly_int = stick.y
+            flags = (state.flags & ~side.all_flags) | side.sending | side.made
+            if ly_int < 0:
+                flags |= side.up
+            elif ly_int > 0:
+                flags |= side.down
+            if lx_int > 0:
+                flags |= side.right
+            elif lx_int < 0:
+                flags |= side.left
+            state.flags = flags
+
+            # Filtered output is already in the Sabertooth motor controller range (-127 to 127)
+            state.axes[side.y_index] = ly_int
+            state.axes[side.x_index] = lx_int
+            if changed:
+                self._raise(side.changed)
+                self.stick_count.inc()
+
+            # Rate limited by the logging setup (see robot_logging)
+            log.debug("Joystick %s data sent: Y: %d X: %d", side.name, ly_int, lx_int, extra=RATE_LIMITED)
+
+        elif state.flags & side.sending:
+            log.debug("Joystick %s Stopped", side.name)
+            state.flags &= ~side.all_flags
+            state.axes[side.y_index] = 0
+            state.axes[side.x_index] = 0
+            self._raise(side.changed)
+
+    def _raise(self, bits):
+        # Sets request bits, noting the snapshot that will first carry this press.
+        version = self.snapshot_version + 1
+        remaining = bits
+        while remaining:
+            bit = remaining & -remaining
+            self.raise_versions[bit] = version
+            remaining ^= bit
+        if self.state.buttons & bits == bits:
+            # Already set from an earlier press: publish again so consumers see the new one
+            self._republish = True
+        self.state.buttons |= bits
+
+    def configure_stick(self, side, **settings):
+        # Changes the filter settings for the "Left" or "Right" stick.
+        # Accepts deadzone, expo, smoothing, hysteresis and output_max (see StickFilter).
+        self.stick_filters[side].configure(**settings)
 
     def map_integer(self, value, old_min, old_max, new_min, new_max):
         # Maps a value from one range to another while preserving negative values
@@ -175,15 +488,127 @@ class PS5_Controller:
             raise ValueError("Old range cannot be zero")
         return round(new_min + (value - old_min) * (new_max - new_min) / (old_max - old_min))
 
-    def reset_controller_state(self):
+    def snapshot(self):
+        # Returns a consistent copy of the current controller state
+        return self.state.snapshot()
+
+    def reset_controller_state(self, snapshot=None):
         # Resets only button and arrow request variables after each loop
-        keys_to_reset = [
-            "reqMade", "reqArrowUp", "reqArrowDown", "reqArrowLeft", "reqArrowRight",
-            "reqCircle", "reqCross", "reqTriangle", "reqSquare",
-            "reqL1", "reqL2", "reqR1", "reqR2",
-            "reqShare", "reqOptions", "reqPS",
-            "reqJSLeftButton", "reqJSRightButton"
-        ]
-
-        for key in keys_to_reset:
-            self.control_request[key] = False
+        #
+        # When the input thread is running, pass the snapshot that was handled. Only the
+        # requests seen in that snapshot are cleared, by the input thread itself, so a press
+        # that arrives in between (even of the same button) is never lost.
+        if self.input_thread is None:
+            self.state.reset_buttons()
+        elif snapshot is not None:
+            self._acknowledged.put((snapshot.version, snapshot.state.buttons))
+
+    # ----- Input Recording and Replay -----
+
+    def record(self, path):
+        # Records every change of the connected joystick's inputs to a binary log at path.
+        self.close_input_log()
+        self.joystick = self.input_log = RecordingJoystick(self.joystick, path)
+
+    def replay(self, path, speed=1.0, loop=False):
+        # Replays a recorded log in place of a real joystick.
+        # param speed: Replay speed multiplier, or None to step one record per check_controls().
+        self.close_input_log()
+        self.joystick = self.input_log = ReplayJoystick(path, speed=speed, loop=loop)
+        self.connected_event.set()
+        self.clock = self.joystick.clock
+        self.last_press_time = {}
+
+    def close_input_log(self):
+        if self.input_log is None:
+            return
+        self.input_log.close()
+        if isinstance(self.input_log, RecordingJoystick):
+            self.joystick = self.input_log.joystick
+        else:
+            self.joystick = None
+            self.connected_event.clear()
+            self.clock = time.time
+        self.input_log = None
+
+    # ----- Threaded Input Loop -----
+
+    def start(self, poll_interval=0.005, shared=False):
+        # Runs the input loop on its own thread and publishes a new ControllerSnapshot whenever
+        # the state changes. Consumers read latest_snapshot without locking.
+        # param poll_interval: Seconds between controller polls.
+        # param shared: Also publish to a shared memory seqlock (self.shared_state) for other processes.
+        if self.input_thread is not None:
+            return
+        if shared and self.shared_state is None:
+            self.shared_state = SeqlockState(ControllerState.STATE_FORMAT.size)
+        self.stop_event.clear()
+        self.input_thread = threading.Thread(target=self._input_loop, args=(poll_interval,), daemon=True)
+        self.input_thread.start()
+
+    def stop(self):
+        # Stops the input thread and releases the shared memory block.
+        if self.input_thread is not None:
+            self.stop_event.set()
+            self.input_thread.join(timeout=1)
+            self.input_thread = None
+        if self.shared_state is not None:
+            self.shared_state.close()
+            self.shared_state = None
+
+    def _input_loop(self, poll_interval):
+        next_poll = time.monotonic()
+        while not self.stop_event.is_set():
+            self.poll()
+
+            next_poll += poll_interval
+            delay = next_poll - time.monotonic()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                next_poll = time.monotonic()
+
+    def poll(self):
+        # One input cycle: hot-plug events, acknowledged requests, controls, publish.
+        # Called by the input thread, or directly by a scheduler task instead of start().
+        self.poll_count.inc()
+        self.handle_events()
+        self._apply_acknowledged()
+        self.check_controls()
+        return self.publish()
+
+    def _apply_acknowledged(self):
+        # Clears requests that consumers have already handled. A bit pressed again after the
+        # acknowledged snapshot was published stays set.
+        handled = 0
+        while True:
+            try:
+                version, buttons = self._acknowledged.get_nowait()
+            except queue.Empty:
+                break
+            while buttons:
+                bit = buttons & -buttons
+                if self.raise_versions.get(bit, 0) <= version:
+                    handled |= bit
+                buttons ^= bit
+        if handled:
+            buttons = self.state.buttons & ~handled
+            if buttons & PRESS_BITS:
+                buttons |= REQ_MADE
+            self.state.buttons = buttons
+
+    def publish(self):
+        # Publishes the current state if it changed since the last snapshot.
+        # Returns the latest snapshot.
+        data = self.state.pack()
+        if data == self.latest_snapshot.state.pack() and not self._republish:
+            return self.latest_snapshot
+        self._republish = False
+        self.snapshot_version += 1
+        self.publish_count.inc()
+        snapshot = ControllerSnapshot(self.snapshot_version, time.monotonic(), ControllerState.unpack(data))
+        # A single attribute assignment, so readers see either the old or the new snapshot.
+        self.latest_snapshot = snapshot
+        if self.shared_state is not None:
+            self.shared_state.write(data)
+        return snapshot
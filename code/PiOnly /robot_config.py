@@ -0,0 +1,359 @@
+################################################################
+# Robot Configuration for ND Robotics Course
+# 10-19-2026
+################################################################
+# Typed access to the robot profile (robot.toml):
+#
+#   from robot_config import config
+#   cfg = config()
+#   spi.max_speed_hz = cfg.tft.spi_speed_hz
+#
+# The file is read and validated once, on the first config() call. Every problem found is
+# reported together in one ConfigError. Unknown keys are errors too, so typos don't silently
+# fall back to defaults.
+import os
+from dataclasses import dataclass, field, fields
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot.toml")
+
+# Baud rates the Sabertooth supports in packetized serial mode
+SABERTOOTH_BAUD_RATES = (2400, 9600, 19200, 38400, 115200)
+
+# Mixer rates the USB sound card and SDL handle well
+SOUND_SAMPLE_RATES = (22050, 32000, 44100, 48000)
+
+# Mixer channel groups (see sound_channels.py)
+SOUND_GROUPS = ("ambient", "effects", "voice", "alert")
+
+# TFT display routines (see ambient_tft_display.py)
+TFT_ROUTINES = ("random", "lip_sync")
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PathsConfig:
+    sounds_dir: str = "/home/ndrobotics/code/Pi Only Files /sounds"
+    images_dir: str = "/home/ndrobotics/code/Pi Only Files /images"
+    sign_images_dir: str = "/home/ndrobotics/code/Pi Only Files /images"
+    ambient_sounds: list = field(default_factory=lambda: [
+        "boxbox.mp3", "f1.mp3", "italiananthem.mp3", "SmoothOperator.mp3", "kimisteeringwheel.mp3"])
+    display_images: list = field(default_factory=lambda: [
+        "guido_1.bmp", "guido_mog.bmp", "guido_drill.bmp", "guido_italy.bmp"])
+    lip_sync_images: list = field(default_factory=lambda: [
+        "guido_mouth_closed.bmp", "guido_mouth_half.bmp", "guido_mouth_open.bmp"])
+
+    def ambient_sound_paths(self):
+        return [os.path.join(self.sounds_dir, name) for name in self.ambient_sounds]
+
+    def display_image_paths(self):
+        return [os.path.join(self.images_dir, name) for name in self.display_images]
+
+    def lip_sync_image_paths(self):
+        return [os.path.join(self.images_dir, name) for name in self.lip_sync_images]
+
+    def validate(self, errors):
+        if not self.lip_sync_images:
+            errors.append("paths.lip_sync_images needs at least a closed-mouth image")
+        for name in ("ambient_sounds", "display_images", "lip_sync_images"):
+            if not all(isinstance(item, str) for item in getattr(self, name)):
+                errors.append(f"paths.{name} must be a list of file names")
+
+
+@dataclass(frozen=True)
+class SabertoothConfig:
+    port: str = "/dev/ttyAMA0"
+    baudrate: int = 9600
+    address: int = 128
+    ramping: int = 21
+    auto_stop_ms: int = 200
+    deadband: int = 5
+    startup_delay: float = 2.0
+
+    def validate(self, errors):
+        if self.baudrate not in SABERTOOTH_BAUD_RATES:
+            errors.append(f"sabertooth.baudrate must be one of {SABERTOOTH_BAUD_RATES}")
+        if not 128 <= self.address <= 135:
+            errors.append("sabertooth.address must be between 128 and 135")
+        if not 1 <= self.ramping <= 80:
+            errors.append("sabertooth.ramping must be between 1 and 80")
+        if not 0 <= self.auto_stop_ms <= 12700:
+            errors.append("sabertooth.auto_stop_ms must be between 0 and 12700")
+        if not 0 <= self.deadband <= 127:
+            errors.append("sabertooth.deadband must be between 0 and 127")
+        if self.startup_delay < 0:
+            errors.append("sabertooth.startup_delay cannot be negative")
+
+
+@dataclass(frozen=True)
+class TFTConfig:
+    spi_bus: int = 0
+    spi_device: int = 0
+    spi_speed_hz: int = 4000000
+    cs_pin: int = 5
+    reset_pin: int = 6
+    dc_pin: int = 26
+    routine: str = "random"
+    mouth_box: list = field(default_factory=lambda: [40, 104, 87, 127])
+    mouth_threshold: float = 0.15
+    lip_sync_fps: int = 30
+
+    def validate(self, errors):
+        # The Pi's SPI clock tops out near 125 MHz; the ST7735R is specified to about 15 MHz.
+        if not 100_000 <= self.spi_speed_hz <= 125_000_000:
+            errors.append("tft.spi_speed_hz must be between 100000 and 125000000")
+        if self.routine not in TFT_ROUTINES:
+            errors.append(f"tft.routine must be one of {', '.join(TFT_ROUTINES)}")
+        # 128 x 160 screen
+        if (len(self.mouth_box) != 4 or not all(isinstance(v, int) for v in self.mouth_box)
+                or not 0 <= self.mouth_box[0] <= self.mouth_box[2] < 128
+                or not 0 <= self.mouth_box[1] <= self.mouth_box[3] < 160):
+            errors.append("tft.mouth_box must be [x0, y0, x1, y1] inside the 128x160 screen")
+        if not 0.0 <= self.mouth_threshold < 1.0:
+            errors.append("tft.mouth_threshold must be at least 0.0 and below 1.0")
+        if not 1 <= self.lip_sync_fps <= 60:
+            errors.append("tft.lip_sync_fps must be between 1 and 60")
+
+
+@dataclass(frozen=True)
+class LEDConfig:
+    sin_pin: int = 23
+    sclk_pin: int = 24
+    xlat_pin: int = 25
+    bit_delay: float = 0.0001
+    gamma: float = 2.2
+
+    def validate(self, errors):
+        if self.bit_delay < 0:
+            errors.append("leds.bit_delay cannot be negative")
+        if self.gamma <= 0:
+            errors.append("leds.gamma must be greater than zero")
+
+
+@dataclass(frozen=True)
+class ControllerConfig:
+    debounce_time: float = 0.5
+    poll_interval: float = 0.02
+    motor_interval: float = 0.04
+    keepalive_interval: float = 0.1
+    deadzone: float = 0.1
+    expo: float = 0.0
+    smoothing: float = 1.0
+    hysteresis: int = 2
+
+    def validate(self, errors):
+        for name in ("poll_interval", "motor_interval", "keepalive_interval"):
+            if getattr(self, name) <= 0:
+                errors.append(f"controller.{name} must be greater than zero")
+        if self.debounce_time < 0:
+            errors.append("controller.debounce_time cannot be negative")
+        if not 0 <= self.deadzone < 1:
+            errors.append("controller.deadzone must be between 0 and 1")
+        if not 0 <= self.expo <= 1:
+            errors.append("controller.expo must be between 0 and 1")
+        if not 0 < self.smoothing <= 1:
+            errors.append("controller.smoothing must be greater than 0 and at most 1")
+        if self.hysteresis < 0:
+            errors.append("controller.hysteresis cannot be negative")
+
+
+@dataclass(frozen=True)
+class EStopConfig:
+    combo: list = field(default_factory=lambda: [4, 5])
+    reset_combo: list = field(default_factory=lambda: [10])
+    device: str = "/dev/input/js0"
+    gpio_pin: int = -1
+    active_low: bool = True
+
+    def validate(self, errors):
+        for name in ("combo", "reset_combo"):
+            buttons = getattr(self, name)
+            if not buttons or not all(isinstance(b, int) and 0 <= b <= 12 for b in buttons):
+                errors.append(f"estop.{name} must be a list of controller button numbers (0-12)")
+        if sorted(self.combo) == sorted(self.reset_combo):
+            errors.append("estop.reset_combo must differ from estop.combo")
+
+
+@dataclass(frozen=True)
+class SoundConfig:
+    volume: float = 0.7
+    sample_rate: int = 44100
+    buffer_size: int = 512
+    bank_budget_mb: int = 64
+    cache_dir: str = "~/.cache/robot/sounds"
+    transcode_workers: int = 2
+    stream_min_seconds: float = 20.0
+    tts_voice: str = ""
+    tts_cache_dir: str = "~/.cache/robot/tts"
+    tts_workers: int = 2
+    group_volumes: dict = field(default_factory=lambda: {"ambient": 0.6, "effects": 1.0, "voice": 1.0, "alert": 1.0})
+    ambient_play_range: list = field(default_factory=lambda: [5.0, 10.0])
+    ambient_fade_ms: int = 1500
+    ambient_weights: dict = field(default_factory=dict)
+    normalize_loudness: bool = True
+    loudness_target: float = -20.0
+    envelope_rate: int = 100
+
+    def validate(self, errors):
+        if not 0.0 <= self.volume <= 1.0:
+            errors.append("sound.volume must be between 0.0 and 1.0")
+        if self.sample_rate not in SOUND_SAMPLE_RATES:
+            errors.append(f"sound.sample_rate must be one of {SOUND_SAMPLE_RATES}")
+        if not 64 <= self.buffer_size <= 8192 or self.buffer_size & (self.buffer_size - 1):
+            errors.append("sound.buffer_size must be a power of two between 64 and 8192")
+        if self.bank_budget_mb <= 0:
+            errors.append("sound.bank_budget_mb must be greater than zero")
+        if self.transcode_workers < 1:
+            errors.append("sound.transcode_workers must be at least 1")
+        if self.tts_workers < 1:
+            errors.append("sound.tts_workers must be at least 1")
+        if self.stream_min_seconds < 0:
+            errors.append("sound.stream_min_seconds cannot be negative")
+        for group, volume in self.group_volumes.items():
+            if group not in SOUND_GROUPS:
+                errors.append(f"sound.group_volumes has unknown group '{group}' (use {', '.join(SOUND_GROUPS)})")
+            elif not isinstance(volume, (int, float)) or not 0.0 <= volume <= 1.0:
+                errors.append(f"sound.group_volumes.{group} must be between 0.0 and 1.0")
+        if len(self.ambient_play_range) != 2 or not 0 < self.ambient_play_range[0] <= self.ambient_play_range[1]:
+            errors.append("sound.ambient_play_range must be [shortest, longest] seconds, both above zero")
+        if self.ambient_fade_ms < 0:
+            errors.append("sound.ambient_fade_ms cannot be negative")
+        for name, weight in self.ambient_weights.items():
+            if not isinstance(weight, (int, float)) or weight < 0:
+                errors.append(f"sound.ambient_weights.{name} must be zero or more")
+        if not -70.0 <= self.loudness_target <= 0.0:
+            errors.append("sound.loudness_target must be between -70 and 0 LUFS")
+        if not 10 <= self.envelope_rate <= 1000:
+            errors.append("sound.envelope_rate must be between 10 and 1000 per second")
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    port: int = 9100
+
+    def validate(self, errors):
+        if not 0 < self.port < 65536:
+            errors.append("metrics.port must be between 1 and 65535")
+
+
+@dataclass(frozen=True)
+class RobotConfig:
+    paths: PathsConfig = field(default_factory=PathsConfig)
+    sabertooth: SabertoothConfig = field(default_factory=SabertoothConfig)
+    tft: TFTConfig = field(default_factory=TFTConfig)
+    leds: LEDConfig = field(default_factory=LEDConfig)
+    controller: ControllerConfig = field(default_factory=ControllerConfig)
+    estop: EStopConfig = field(default_factory=EStopConfig)
+    sound: SoundConfig = field(default_factory=SoundConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    source: str = None
+
+    def validate(self, errors):
+        pins = {}
+        for section in ("tft", "leds", "estop"):
+            for f in fields(getattr(self, section)):
+                if f.name.endswith("_pin"):
+                    pin = getattr(getattr(self, section), f.name)
+                    if section == "estop" and pin == -1:
+                        continue  # No e-stop switch fitted
+                    if not 0 <= pin <= 27:
+                        errors.append(f"{section}.{f.name} must be a GPIO number between 0 and 27")
+                    elif pin in pins:
+                        errors.append(f"{section}.{f.name} uses GPIO{pin}, already used by {pins[pin]}")
+                    pins.setdefault(pin, f"{section}.{f.name}")
+
+
+def _parse_value(text):
+    # Values in ROBOT_CONFIG_SET use TOML syntax; bare words are taken as strings.
+    try:
+        return tomllib.loads(f"v = {text}")["v"]
+    except tomllib.TOMLDecodeError:
+        return text
+
+
+def parse_overrides(text):
+    # "tft.spi_speed_hz=16000000;sabertooth.baudrate=38400" -> {"tft.spi_speed_hz": 16000000, ...}
+    overrides = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ConfigError(f"Config override '{item}' must look like section.key=value")
+        overrides[key.strip()] = _parse_value(value.strip())
+    return overrides
+
+
+def _build_section(cls, name, values, errors):
+    kwargs = {}
+    known = {f.name: f for f in fields(cls)}
+    for key, value in values.items():
+        f = known.get(key)
+        if f is None:
+            errors.append(f"Unknown setting {name}.{key}")
+            continue
+        expected = f.type
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            errors.append(f"{name}.{key} must be {expected.__name__}, got {type(value).__name__}")
+            continue
+        kwargs[key] = value
+    section = cls(**kwargs)
+    section.validate(errors)
+    return section
+
+
+def load_config(path=None, overrides=None):
+    # Reads and validates a profile. Missing sections and keys keep their defaults.
+    # param path: TOML file (default: ROBOT_CONFIG environment variable, else robot.toml).
+    # param overrides: {"section.key": value} applied on top of the file.
+    path = path or os.environ.get("ROBOT_CONFIG", DEFAULT_CONFIG_PATH)
+    data = {}
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ConfigError(f"{path}: {e}") from None
+    elif path != DEFAULT_CONFIG_PATH:
+        raise ConfigError(f"Config file not found: {path}")
+
+    errors = []
+    for key, value in (overrides or {}).items():
+        section, _, name = key.partition(".")
+        if not name:
+            errors.append(f"Config override '{key}' must be section.key")
+            continue
+        data.setdefault(section, {})[name] = value
+
+    sections = {}
+    known = {f.name: f.type for f in fields(RobotConfig) if f.name != "source"}
+    for name, values in data.items():
+        if name not in known:
+            errors.append(f"Unknown config section [{name}]")
+        elif not isinstance(values, dict):
+            errors.append(f"[{name}] must be a table")
+        else:
+            sections[name] = _build_section(known[name], name, values, errors)
+    cfg = RobotConfig(**sections, source=path)
+    cfg.validate(errors)
+    if errors:
+        raise ConfigError(f"Invalid robot config ({path}):\n  " + "\n  ".join(errors))
+    return cfg
+
+
+_config = None
+
+
+def config():
+    # The robot's profile, loaded on first use. ROBOT_CONFIG_SET overrides single values.
+    global _config
+    if _config is None:
+        _config = load_config(overrides=parse_overrides(os.environ.get("ROBOT_CONFIG_SET", "")))
+    return _config
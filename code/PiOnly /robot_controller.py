@@ -7,68 +7,113 @@ import pygame
 import time
 from sabertooth import Sabertooth
 from ps5_controller import PS5_Controller
+from scheduler import Scheduler
+from latency_trace import tracer, MOVE_ROBOT
+from metrics import metrics, serve_http
+from robot_logging import get_logger, setup_logging
+from robot_config import config
+from estop import EStop
+
+log = get_logger("robot_controller")
 
 def move_robot(saber, control_request):
     # Sends motor commands to the Sabertooth motor controller.
+    tracer.mark(MOVE_ROBOT)
     speed = control_request["reqLeftJoyYValue"]
     turn = control_request["reqLeftJoyXValue"]
     saber.drive(speed, turn)
 
+class MotorUpdater:
+    # Turns the latest PS5 snapshot into Sabertooth commands, once per motor period.
+    #
+    # The stick is filtered, so its values only change for real movement. A drive command is
+    # sent when they change, and otherwise only often enough to keep the Sabertooth auto-stop
+    # (200ms) from tripping.
+    def __init__(self, ps5, saber, keepalive_interval=None, move=move_robot):
+        self.ps5 = ps5
+        self.saber = saber
+        self.keepalive_interval = config().controller.keepalive_interval if keepalive_interval is None else keepalive_interval
+        self.move = move
+        self.isMoving = False
+        self.last_drive = None
+        self.last_send_time = 0.0
+        self.drive_count = metrics.counter("motor.drive_commands")
+        self.stop_count = metrics.counter("motor.stops")
+
+    def update(self):
+        # Read a consistent copy of the PS5 controller state
+        snapshot = self.ps5.latest_snapshot
+        control_request = snapshot.control_request
+
+        # Example: Use Arrow Up as a function call trigger
+        if control_request["reqArrowUp"]:
+            log.info("This should call by function tied to Arrow Up")
+
+        # Move the robot if left joystick is moved
+        if control_request["reqLeftJoyMade"]:
+            drive = (control_request["reqLeftJoyYValue"], control_request["reqLeftJoyXValue"])
+            current_time = time.monotonic()
+            if drive != self.last_drive or current_time - self.last_send_time >= self.keepalive_interval:
+                self.move(self.saber, control_request)
+                self.drive_count.inc()
+                self.isMoving = True
+                self.last_drive = drive
+                self.last_send_time = current_time
+        elif self.isMoving:
+            self.isMoving = False
+            self.last_drive = None
+            self.saber.stop()
+            self.stop_count.inc()
+
+        # Reset PS5 request variables handled in this update
+        if snapshot.state.buttons:
+            self.ps5.reset_controller_state(snapshot)
+
 def main():
+    setup_logging()
+    cfg = config()
+    scheduler = Scheduler()
+    saber = None
     try:
-        # Initialize the PS5 Controller class
+        # Live counters at http://127.0.0.1:9100/metrics (metrics.port in the config). Best
+        # effort: the robot still drives if the port is taken (e.g. by robot_runtime.py).
+        try:
+            serve_http(cfg.metrics.port)
+        except OSError as e:
+            log.error("Metrics server not started on port %d: %s", cfg.metrics.port, e)
+
+        # Initialize the PS5 Controller class. The controller may connect or reconnect at any time.
         ps5 = PS5_Controller()
-        ps5.initialize_controller()
+        ps5.initialize_controller(block=False)
 
-        # Initialize Sabertooth motor controller
+        # Initialize Sabertooth motor controller while waiting for the controller
         saber = Sabertooth()
-        saber.set_ramping(21)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
-        isMoving = False
-
-        ps5_last_check_time = time.time()
-        ps5_loop_interval = 0.02  # 20ms interval
-        
-        motor_controller_last_check_time = time.time()
-        motor_controller_loop_interval = 0.04  # 40ms interval
-
-        while True:
-            current_time = time.time()
-
-            # Check PS5 controller state
-            if current_time - ps5_last_check_time >= ps5_loop_interval:
-                pygame.event.pump()
-                ps5.check_controls()
-                ps5_last_check_time = current_time
-
-            # Example: Use Arrow Up as a function call trigger
-            if ps5.control_request["reqArrowUp"]:
-                print("This should call by function tied to Arrow Up")
-
-            # Move the robot if left joystick is moved
-            if ps5.control_request["reqLeftJoyMade"]:
-                if current_time - motor_controller_last_check_time >= motor_controller_loop_interval:
-                    move_robot(saber, ps5.control_request)
-                    isMoving = True
-                    motor_controller_last_check_time = time.time()
-            else:
-                if isMoving:
-                    isMoving = False
-                    saber.stop()
-
-            # Reset PS5 request variables for next loop
-            if ps5.control_request["reqMade"]:
-                ps5.reset_controller_state()
-                
-            # Provide a brief sleep to allow worker threads to catch up to main loop
-            time.sleep(.001)
+        saber.set_ramping(cfg.sabertooth.ramping)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
+
+        # Stop the motors immediately if the controller drops out
+        ps5.add_failsafe(saber.stop)
+
+        # L1 + R1 (or the e-stop switch, if fitted) stops the motors at once; PS releases it
+        EStop.from_config(saber, ps5)
+
+        # Fixed-rate tasks. Polling the controller is most urgent, then the motors.
+        motors = MotorUpdater(ps5, saber)
+        scheduler.add_task("ps5_poll", ps5.poll, period=cfg.controller.poll_interval, priority=0)  # 20ms default
+        scheduler.add_task("motor_update", motors.update, period=cfg.controller.motor_interval,
+                           priority=1, offset=0.001)  # 40ms default
+        scheduler.run()
 
     except KeyboardInterrupt:
         print("Exiting program...")
 
     finally:
+        print(scheduler.report())
+        print(tracer.report())
+        tracer.dump("latency_trace.csv")
         pygame.joystick.quit()
         pygame.quit()
-        saber.close()
+        if saber is not None:
+            saber.close()
         print("PS5 controller disconnected.")
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+################################################################
+# Logging Setup for ND Robotics Course
+# 10-19-2026
+################################################################
+# Drivers log through the standard logging module instead of print():
+#
+#   log = get_logger("sabertooth")
+#   log.debug("Sent packet %s", packet)
+#
+# setup_logging() hands records to a background thread through a queue, so console I/O
+# never happens on the control hot path. Messages logged with extra=RATE_LIMITED are dropped
+# if the same message was logged less than 'rate_limit' seconds ago.
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+ROOT_LOGGER = "robot"
+RATE_LIMITED = {"rate_limited": True}
+
+_listener = None
+_queue_handler = None
+
+
+class RateLimitFilter(logging.Filter):
+    # Passes a rate-limited message at most once per 'interval' seconds per message template.
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self.interval = interval
+        self.last_emit = {}
+        self.suppressed = {}
+
+    def filter(self, record):
+        if not getattr(record, "rate_limited", False):
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        if now - self.last_emit.get(key, -self.interval) < self.interval:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        self.last_emit[key] = now
+        skipped = self.suppressed.pop(key, 0)
+        if skipped:
+            record.msg = f"{record.msg} ({skipped} similar suppressed)"
+        return True
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging(level=None, rate_limit=1.0, log_file=None):
+    # Configures the robot loggers once.
+    # param level: Log level name or number (default: ROBOT_LOG_LEVEL environment variable, else INFO).
+    # param rate_limit: Seconds between repeats of a rate-limited message.
+    # param log_file: Also write to this file.
+    global _listener, _queue_handler
+    if level is None:
+        level = os.environ.get("ROBOT_LOG_LEVEL", "INFO")
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return logger
+
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # The rate limit runs in the caller so suppressed messages never reach the queue.
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(rate_limit))
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    # Writes out queued messages and stops the listener thread. multiprocessing children exit
+    # without running atexit, so call this before returning from a process target.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(); give the child its own queue and thread.
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,191 @@
+################################################################
+# Multi-Process Robot Controller for ND Robotics Course
+# 10-19-2026
+################################################################
+# Runs the control path, vision, media (sound + TFT) and LED animation as separate processes
+# under the Supervisor, each pinned to its own cores:
+#
+#   core 3     control  (PS5 -> Sabertooth), SCHED_FIFO when run as root
+#   cores 1-2  vision   (camera + sign detection)
+#   core 0     media and LEDs, plus the supervisor and the OS
+#
+# The processes share state through seqlock channels:
+#   "controller"  ControllerState written by control (see ps5_controller.read_shared_state)
+#   "buttons"     press count per request bit, so readers never miss a short press
+#   "vision"      latest detected sign and when it was seen
+#
+# Driver modules are imported inside each process, so the supervisor never initializes
+# pygame or touches the hardware itself.
+import struct
+import time
+from supervisor import Supervisor
+from robot_config import config
+
+# One uint32 press count per ps5_controller.BUTTON_KEYS bit
+BUTTON_COUNTS_FORMAT = struct.Struct("<20I")
+
+# Sign code (index into SIGNS) and the time.time() it was detected
+VISION_FORMAT = struct.Struct("<Bd")
+SIGNS = (None, "STOP", "LEFT", "RIGHT")
+
+
+class ButtonPressCounter:
+    # Counts rising edges of each request bit and publishes the counts to a channel.
+    # Counting continues from the channel's values, so a restarted process doesn't reset them.
+    def __init__(self, channel):
+        self.channel = channel
+        self.counts = list(read_button_counts(channel))
+        self.previous = 0
+
+    def update(self, buttons):
+        pressed = buttons & ~self.previous
+        self.previous = buttons
+        if not pressed:
+            return
+        while pressed:
+            bit = pressed & -pressed
+            self.counts[bit.bit_length() - 1] += 1
+            pressed ^= bit
+        self.channel.write(BUTTON_COUNTS_FORMAT.pack(*self.counts))
+
+
+def read_button_counts(channel):
+    return BUTTON_COUNTS_FORMAT.unpack(channel.read()[1])
+
+
+def control_main(channels, stop_event, metrics_port=None):
+    # PS5 controller -> Sabertooth. If this process dies the Sabertooth's own serial
+    # timeout (200 ms) stops the motors until it is restarted.
+    from ps5_controller import PS5_Controller
+    from sabertooth import Sabertooth
+    from robot_controller import MotorUpdater
+    from estop import EStop
+    from scheduler import Scheduler
+    from metrics import serve_http
+
+    cfg = config()
+    serve_http(cfg.metrics.port if metrics_port is None else metrics_port)
+    ps5 = PS5_Controller()
+    ps5.shared_state = channels["controller"]
+    ps5.initialize_controller(block=False)
+    saber = Sabertooth()
+    saber.set_ramping(cfg.sabertooth.ramping)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
+    ps5.add_failsafe(saber.stop)
+    estop = EStop.from_config(saber, ps5)
+
+    motors = MotorUpdater(ps5, saber)
+    presses = ButtonPressCounter(channels["buttons"])
+
+    def poll():
+        presses.update(ps5.poll().state.buttons)
+
+    def check_stop():
+        if stop_event.is_set():
+            scheduler.stop()
+
+    scheduler = Scheduler()
+    scheduler.add_task("ps5_poll", poll, period=0.01, priority=0)
+    scheduler.add_task("motor_update", motors.update, period=0.02, priority=1, offset=0.001)
+    scheduler.add_task("stop_check", check_stop, period=0.1, priority=2)
+    try:
+        scheduler.run()
+    finally:
+        estop.close()
+        saber.stop()
+        saber.close()
+
+
+def vision_main(channels, stop_event, frame_interval=0.1):
+    # Camera -> sign detection. Publishes every frame's result to the "vision" channel.
+    import turn_right
+    from hal import Picamera2
+
+    templates = turn_right.load_sign_templates()
+    camera = Picamera2()
+    camera.configure(camera.create_still_configuration(main={"size": (1024, 768)}))
+    camera.start()
+    try:
+        while not stop_event.is_set():
+            sign = turn_right.detect_sign(camera.capture_array(), templates)
+            channels["vision"].write(VISION_FORMAT.pack(SIGNS.index(sign), time.time()))
+            stop_event.wait(frame_interval)
+    finally:
+        camera.stop()
+
+
+def media_main(channels, stop_event, ambient_sounds=None, image_list=None):
+    # Ambient sound and TFT image routines. Cross toggles the ambient sound.
+    from ps5_controller import BUTTON_KEYS
+    from usb_sound_controller import USB_SoundController
+    from ambient_sound import AmbientSoundRoutine
+    from ambient_tft_display import TFTDisplay, TFTRoutine
+
+    paths = config().paths
+    ambient_sounds = ambient_sounds or paths.ambient_sound_paths()
+    sound_ctrl = USB_SoundController()
+    sound_ctrl.preload(ambient_sounds)
+    ambient_routine = AmbientSoundRoutine(sound_ctrl, ambient_sounds)
+    display = TFTDisplay()
+    display_routine = TFTRoutine(display, image_list or paths.display_image_paths(), sound_ctrl)
+    ambient_routine.start()
+    display_routine.start()
+
+    cross = BUTTON_KEYS.index("reqCross")
+    last_count = read_button_counts(channels["buttons"])[cross]
+    try:
+        while not stop_event.wait(0.02):
+            count = read_button_counts(channels["buttons"])[cross]
+            if count != last_count:
+                last_count = count
+                if ambient_routine.running:
+                    ambient_routine.stop()
+                else:
+                    ambient_routine.start()
+    finally:
+        display_routine.stop()
+        ambient_routine.stop()
+        sound_ctrl.close()
+        display.close()
+
+
+def led_main(channels, stop_event, frame_interval=0.1):
+    # LED bar graph of the drive speed; a slow chase while the robot is idle.
+    from ps5_controller import read_shared_state
+    from led_controller import LEDController
+
+    leds = LEDController()
+    step = 0
+    try:
+        while not stop_event.wait(frame_interval):
+            _, state = read_shared_state(channels["controller"])
+            speed = abs(state.axes[0]) / 127
+            if speed:
+                lit = round(speed * leds.num_leds)
+                levels = [1.0 if i < lit else 0.0 for i in range(leds.num_leds)]
+            else:
+                step = (step + 1) % leds.num_leds
+                levels = [0.3 if i == step else 0.0 for i in range(leds.num_leds)]
+            leds.set_leds(dict(enumerate(levels)))
+            leds.send()
+    finally:
+        leds.close()
+
+
+def main():
+    from ps5_controller import ControllerState
+
+    supervisor = Supervisor()
+    supervisor.add_channel("controller", ControllerState.STATE_FORMAT.size)
+    supervisor.add_channel("buttons", BUTTON_COUNTS_FORMAT.size)
+    supervisor.add_channel("vision", VISION_FORMAT.size)
+    supervisor.add("control", control_main, cpus={3}, realtime_priority=50)
+    supervisor.add("vision", vision_main, cpus={1, 2}, nice=5)
+    supervisor.add("media", media_main, cpus={0})
+    supervisor.add("led", led_main, cpus={0}, nice=10)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    from robot_logging import setup_logging
+    setup_logging()
+    main()
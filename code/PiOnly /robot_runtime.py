@@ -0,0 +1,224 @@
+################################################################
+# Asyncio Robot Runtime for ND Robotics Course
+# 10-19-2026
+################################################################
+import asyncio
+import random
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pygame
+from sabertooth import Sabertooth
+from ps5_controller import PS5_Controller
+from robot_controller import MotorUpdater
+from usb_sound_controller import USB_SoundController
+from ambient_tft_display import TFTDisplay
+from latency_trace import tracer
+from metrics import metrics, serve_http
+from robot_logging import get_logger, setup_logging
+from robot_config import config
+
+log = get_logger("runtime")
+
+
+class PeriodicService:
+    # Runs step() every 'interval' seconds on absolute deadlines of the event loop clock.
+    #
+    # With an executor, step() runs there so blocking hardware I/O never stalls the event loop.
+    # A single-thread executor also keeps all of a subsystem's calls on one thread.
+    def __init__(self, name, step, interval, executor=None):
+        self.name = name
+        self.step = step
+        self.interval = interval
+        self.executor = executor
+        self.runs = 0
+        self.late = 0
+        metrics.gauge(f"service.{name}.runs", lambda: self.runs)
+        metrics.gauge(f"service.{name}.late", lambda: self.late)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            try:
+                if self.executor is not None:
+                    await loop.run_in_executor(self.executor, self.step)
+                else:
+                    self.step()
+            except Exception as e:
+                log.error("Error in %s service: %s", self.name, e)
+            self.runs += 1
+
+            next_time += self.interval
+            delay = next_time - loop.time()
+            if delay < 0:
+                self.late += 1
+                next_time = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+
+class ControlService(PeriodicService):
+    # Input -> motor path. Each cycle polls the PS5 controller and immediately updates the motors,
+    # on a dedicated thread that media services never use, so stick-to-packet latency is one
+    # poll interval plus the serial write.
+    def __init__(self, ps5, saber, interval=0.01, on_snapshot=None):
+        self.ps5 = ps5
+        self.motors = MotorUpdater(ps5, saber)
+        self.on_snapshot = on_snapshot
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="control")
+        super().__init__("control", self._control_step, interval, self.executor)
+
+    def _control_step(self):
+        snapshot = self.ps5.poll()
+        if self.on_snapshot is not None and snapshot.state.buttons:
+            self.on_snapshot(snapshot)
+        self.motors.update()
+
+
+class RandomCycleService:
+    # Shows a random item from a list for a random duration, then clears it. Used for the
+    # ambient sounds and the display images. Pausing takes effect immediately. If 'show'
+    # returns a Future (a sound's completion), the next item starts as soon as it is done;
+    # if it completes without playing (None, an error or cancelled), the full duration is still
+    # waited out, so a clip that can't play yet isn't retried in a tight loop.
+    def __init__(self, name, items, show, clear, duration_range):
+        self.name = name
+        self.items = items
+        self.show = show
+        self.clear = clear
+        self.duration_range = duration_range
+        self.enabled = asyncio.Event()
+        self.disabled = asyncio.Event()
+        self.enabled.set()
+
+    def toggle(self):
+        if self.enabled.is_set():
+            self.enabled.clear()
+            self.disabled.set()
+            log.info("%s routine suspended.", self.name)
+        else:
+            self.disabled.clear()
+            self.enabled.set()
+            log.info("%s routine started.", self.name)
+
+    async def run(self):
+        while True:
+            await self.enabled.wait()
+            item = random.choice(self.items)
+            duration = random.uniform(*self.duration_range)
+            log.info("%s: %s for %.2f seconds", self.name, item, duration)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + duration
+            shown = self.show(item)
+            # Wake early if paused so the item is cleared right away
+            waits = [asyncio.ensure_future(self.disabled.wait())]
+            if isinstance(shown, concurrent.futures.Future):
+                waits.append(asyncio.wrap_future(shown))
+            done, _ = await asyncio.wait(waits, timeout=duration, return_when=asyncio.FIRST_COMPLETED)
+            if len(waits) > 1 and waits[1] in done and not self._played(waits[1]):
+                await asyncio.wait(waits[:1], timeout=max(0.0, deadline - loop.time()))
+            waits[0].cancel()
+            self.clear()
+
+
+    @staticmethod
+    def _played(future):
+        # True if the Future from 'show' completed with something that actually played
+        return not future.cancelled() and future.exception() is None and future.result() is not None
+
+
+class RobotRuntime:
+    # Owns the subsystems and runs each one as an async service with its own cadence.
+    def __init__(self, ambient_sounds, image_list, control_interval=0.01):
+        self.ambient_sounds = ambient_sounds
+        self.image_list = image_list
+        self.control_interval = control_interval
+        self.io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="init")
+        self.ps5 = None
+        self.saber = None
+        self.sound_ctrl = None
+        self.display = None
+        self.services = []
+        self.ambient = None
+
+    async def _initialize(self):
+        # Hardware initialization blocks (the Sabertooth and TFT both sleep), so run it concurrently.
+        loop = asyncio.get_running_loop()
+        self.ps5 = PS5_Controller()
+        self.ps5.initialize_controller(block=False)
+        self.saber, self.sound_ctrl, self.display = await asyncio.gather(
+            loop.run_in_executor(self.io_executor, self._create_saber),
+            loop.run_in_executor(self.io_executor, USB_SoundController),
+            loop.run_in_executor(self.io_executor, TFTDisplay),
+        )
+        self.ps5.add_failsafe(self.saber.stop)
+
+    def _create_saber(self):
+        saber = Sabertooth()
+        saber.set_ramping(config().sabertooth.ramping)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
+        return saber
+
+    def _show_image(self, bmp_file):
+        self.display.clear_screen("black")
+        self.display.display_bmp(bmp_file, position=(0, 0))
+
+    def _clear_image(self):
+        self.display.clear_screen("black")
+
+    def _on_snapshot(self, snapshot):
+        # Runs on the control thread; hand the toggle over to the event loop.
+        if snapshot.control_request["reqCross"]:
+            self.loop.call_soon_threadsafe(self.ambient.toggle)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        await self._initialize()
+
+        sound_ctrl = self.sound_ctrl
+        self.ambient = RandomCycleService("Ambient sound", self.ambient_sounds,
+                                          partial(sound_ctrl.play_audio, group="ambient"),
+                                          partial(sound_ctrl.stop_sound, "ambient"), (5, 10))
+        images = RandomCycleService("Display", self.image_list,
+                                    self._show_image, self._clear_image, (1, 5))
+        control = ControlService(self.ps5, self.saber, self.control_interval, on_snapshot=self._on_snapshot)
+        self.services = [control, self.ambient, images]
+
+        tasks = [asyncio.create_task(service.run(), name=service.name) for service in self.services]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            control.executor.shutdown(wait=True)
+
+    def close(self):
+        if self.saber is not None:
+            self.saber.stop()
+            self.saber.close()
+        if self.sound_ctrl is not None:
+            self.sound_ctrl.close()
+        if self.display is not None:
+            self.display.close()
+        self.io_executor.shutdown(wait=False)
+        pygame.joystick.quit()
+        pygame.quit()
+
+
+# ---------------- Main Routine ---------------- #
+if __name__ == "__main__":
+    cfg = config()
+    setup_logging()
+    serve_http(cfg.metrics.port)
+    runtime = RobotRuntime(cfg.paths.ambient_sound_paths(), cfg.paths.display_image_paths())
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print("Exiting robot runtime...")
+    finally:
+        runtime.close()
+        print(tracer.report())
+        tracer.dump("latency_trace.csv")
+        print("Robot runtime stopped.")
@@ -3,21 +3,50 @@
 # 3-7-2025
 # Professor McLaughlin
 ################################################################
-import serial
+from hal import open_serial
 import time
 import multiprocessing
 import queue
+import threading
+from latency_trace import tracer, DRIVE, SERIAL_WRITE
+from metrics import metrics
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("sabertooth")
+
+# Mixed-mode drive (8-13) and independent motor (0-7) commands; blocked while e-stopped
+MOTION_COMMANDS = frozenset(range(14))
 
 class Sabertooth:
-    def __init__(self, port='/dev/ttyAMA0', baudrate=9600, address=128, max_queue_size=100):
+    def __init__(self, port=None, baudrate=None, address=None, max_queue_size=100, startup_delay=None):
+        # Settings left as None come from the [sabertooth] section of the robot config.
+        cfg = config().sabertooth
+        port = cfg.port if port is None else port
+        baudrate = cfg.baudrate if baudrate is None else baudrate
+        address = cfg.address if address is None else address
+        startup_delay = cfg.startup_delay if startup_delay is None else startup_delay
         self.address = address
         self.running = multiprocessing.Value('b', True)
         self.max_queue_size = max_queue_size  
 
+        # Emergency stop (see emergency_stop()). Motion commands are dropped while it is latched.
+        self.estopped = threading.Event()
+        self.write_lock = threading.Lock()
+        self.stop_packet = self.packet(8, 0) + self.packet(10, 0)  # Drive 0, turn 0
+
+        # Runtime metrics (see metrics.py)
+        self.packet_count = metrics.counter("sabertooth.packets")
+        self.byte_count = metrics.counter("sabertooth.bytes")
+        self.write_time = metrics.histogram("sabertooth.write_us")
+        self.estop_count = metrics.counter("sabertooth.emergency_stops")
+        self.dropped_count = metrics.counter("sabertooth.commands_dropped")
+
         try:
-            self.ser = serial.Serial(port, baudrate=baudrate, timeout=0.1)
+            # Accepts a device path or a pyserial URL (e.g. loop:// for testing off-robot).
+            self.ser = open_serial(port, baudrate=baudrate, timeout=0.1)
         except Exception as e:
-            print(f"Serial Port Error: {e}")
+            log.error("Serial Port Error: %s", e)
             return
 
         self.command_queue = multiprocessing.Queue(maxsize=self.max_queue_size)
@@ -25,25 +54,42 @@ class Sabertooth:
         self.process = multiprocessing.Process(target=self.process_commands)
         self.process.start()
 
-        time.sleep(2)
-
-        self.set_auto_stop(200)
-        self.set_deadband(5)
+        # Give the Sabertooth time to power up before the first packet. The Pi's uptime says
+        # nothing about when the motor supply came on, so the full delay is always waited out;
+        # boot it as its own BootOrchestrator step to overlap the wait with the rest of startup.
+        time.sleep(startup_delay)
 
-    def send_command(self, command, value):
-        # Sends a properly formatted packetized serial command to the Sabertooth
-        if not (0 <= value <= 127):
-            raise ValueError("Value must be between 0 and 127")
+        self.set_auto_stop(cfg.auto_stop_ms)
+        self.set_deadband(cfg.deadband)
 
+    def packet(self, command, value):
+        # Builds a packetized serial command: address, command, value, checksum
         address_byte = int(self.address)  
         command_byte = int(command)  
         data_byte = int(value)  
         checksum = (address_byte + command_byte + data_byte) & 0x7F  
 
-        packet = bytes([address_byte, command_byte, data_byte, checksum])
+        return bytes([address_byte, command_byte, data_byte, checksum])
+
+    def send_command(self, command, value):
+        # Sends a properly formatted packetized serial command to the Sabertooth
+        if not (0 <= value <= 127):
+            raise ValueError("Value must be between 0 and 127")
+
+        packet = self.packet(command, value)
 
-        self.ser.write(packet)
+        start = time.perf_counter_ns()
+        with self.write_lock:
+            # Checked under the lock, so a drive command can't slip in after an emergency stop
+            if value and command in MOTION_COMMANDS and self.estopped.is_set():
+                self.dropped_count.inc()
+                return
+            self.ser.write(packet)
         self.ser.flush()
+        tracer.mark(SERIAL_WRITE)
+        self.write_time.observe((time.perf_counter_ns() - start) // 1000)
+        self.packet_count.inc()
+        self.byte_count.inc(len(packet))
 
     def process_commands(self):
         while True:
@@ -60,6 +106,7 @@ class Sabertooth:
             time.sleep(0.005)
 
     def drive(self, speed, turn):
+        tracer.mark(DRIVE)
         # Convert speed (-127 to 127) to Sabertooth expected format (0 to 127)
         if speed >= 0:
             speed_value = self.map_integer(speed, 0, 127, 0, 127)  # Map positive speed for forward
@@ -82,6 +129,35 @@ class Sabertooth:
         self.send_command(10, 0)  # Stop right turn
         self.send_command(11, 0)  # Stop left turn
 
+    def emergency_stop(self):
+        # Stops both motors as fast as the serial port allows, from any thread.
+        #
+        # Queued commands are discarded, bytes still waiting in the UART's output buffer are
+        # flushed, and the stop packets are written directly. The stop stays latched (motion
+        # commands are dropped) until clear_emergency_stop() is called.
+        self.estopped.set()
+        try:
+            while True:
+                self.command_queue.get_nowait()
+        except (queue.Empty, AttributeError):
+            pass
+        with self.write_lock:
+            reset = getattr(self.ser, "reset_output_buffer", None)
+            if reset is not None:
+                try:
+                    reset()
+                except OSError:
+                    pass
+            self.ser.write(self.stop_packet)
+        self.ser.flush()
+        self.estop_count.inc()
+        self.packet_count.inc(2)
+        self.byte_count.inc(len(self.stop_packet))
+
+    def clear_emergency_stop(self):
+        # Allows motion commands again. The motors stay stopped until the next drive command.
+        self.estopped.clear()
+
     def set_auto_stop(self, timeout_ms):
         # Sets the serial timeout period. This determines how long the motor driver will wait 
         # without receiving a command before shutting off.
@@ -0,0 +1,139 @@
+################################################################
+# Fixed-Rate Task Scheduler for ND Robotics Course
+# 10-19-2026
+################################################################
+import time
+from metrics import metrics
+from robot_logging import get_logger
+
+log = get_logger("scheduler")
+
+
+class ScheduledTask:
+    # One periodic task and its timing statistics. Times are monotonic nanoseconds.
+    __slots__ = ("name", "func", "period", "priority", "deadline",
+                 "runs", "overruns", "missed", "jitter_total", "jitter_max",
+                 "duration_total", "duration_max")
+
+    def __init__(self, name, func, period, priority, deadline):
+        self.name = name
+        self.func = func
+        self.period = period
+        self.priority = priority
+        self.deadline = deadline
+        self.runs = 0
+        self.overruns = 0      # runs that finished after the task's next deadline
+        self.missed = 0        # periods skipped because of overruns
+        self.jitter_total = 0  # sum of (start - deadline)
+        self.jitter_max = 0
+        self.duration_total = 0
+        self.duration_max = 0
+
+    def stats(self):
+        runs = max(self.runs, 1)
+        return {
+            "period_ms": self.period / 1e6,
+            "priority": self.priority,
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "missed_periods": self.missed,
+            "jitter_mean_ms": self.jitter_total / runs / 1e6,
+            "jitter_max_ms": self.jitter_max / 1e6,
+            "duration_mean_ms": self.duration_total / runs / 1e6,
+            "duration_max_ms": self.duration_max / 1e6,
+        }
+
+
+class Scheduler:
+    # Runs periodic tasks against absolute deadlines on the monotonic clock.
+    #
+    # Each task's deadlines are start + n * period, so timing never drifts with how long a
+    # task takes or with wall-clock adjustments. Between deadlines the scheduler sleeps until
+    # the earliest one instead of polling. When several tasks are due together, lower
+    # 'priority' numbers run first (0 is the most urgent).
+    #
+    # A task that finishes after its own next deadline counts as an overrun; the periods it
+    # missed are skipped rather than run back to back.
+    def __init__(self, clock=time.monotonic_ns, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.tasks = []
+        self.running = False
+
+    def add_task(self, name, func, period, priority=0, offset=0.0):
+        # param name: Name used in the statistics report.
+        # param func: Callable run once per period with no arguments.
+        # param period: Seconds between runs.
+        # param priority: Lower numbers run first when several tasks are due.
+        # param offset: Seconds after the scheduler start before the first run.
+        if period <= 0:
+            raise ValueError("Task period must be greater than zero.")
+        task = ScheduledTask(name, func, int(period * 1e9), priority, self.clock() + int(offset * 1e9))
+        self.tasks.append(task)
+        # Read on demand by the metrics endpoint, so the loop itself pays nothing
+        metrics.gauge(f"scheduler.{name}.runs", lambda: task.runs)
+        metrics.gauge(f"scheduler.{name}.overruns", lambda: task.overruns)
+        metrics.gauge(f"scheduler.{name}.jitter_max_ms", lambda: task.jitter_max / 1e6)
+        metrics.gauge(f"scheduler.{name}.duration_max_ms", lambda: task.duration_max / 1e6)
+        return task
+
+    def run_pending(self):
+        # Runs every task that is due. Returns the next deadline (monotonic ns).
+        now = self.clock()
+        due = [task for task in self.tasks if task.deadline <= now]
+        due.sort(key=lambda task: (task.priority, task.deadline))
+        for task in due:
+            start = self.clock()
+            try:
+                task.func()
+            except Exception as e:
+                log.error("Error in scheduled task '%s': %s", task.name, e)
+            end = self.clock()
+
+            jitter = start - task.deadline
+            duration = end - start
+            task.runs += 1
+            task.jitter_total += jitter
+            task.duration_total += duration
+            if jitter > task.jitter_max:
+                task.jitter_max = jitter
+            if duration > task.duration_max:
+                task.duration_max = duration
+
+            task.deadline += task.period
+            if end > task.deadline:
+                skipped = (end - task.deadline) // task.period + 1
+                task.overruns += 1
+                task.missed += skipped
+                task.deadline += skipped * task.period
+        return min(task.deadline for task in self.tasks)
+
+    def run(self, duration=None):
+        # Runs tasks until stop() is called (from a task or another thread) or 'duration' seconds pass.
+        if not self.tasks:
+            raise RuntimeError("No tasks have been added to the scheduler.")
+        self.running = True
+        end = None if duration is None else self.clock() + int(duration * 1e9)
+        while self.running:
+            next_deadline = self.run_pending()
+            if end is not None and next_deadline >= end:
+                break
+            delay = next_deadline - self.clock()
+            if delay > 0:
+                self.sleep(delay / 1e9)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        return {task.name: task.stats() for task in self.tasks}
+
+    def report(self):
+        lines = []
+        for name, s in self.stats().items():
+            lines.append(f"{name}: {s['runs']} runs every {s['period_ms']:.1f} ms, "
+                         f"jitter mean {s['jitter_mean_ms']:.3f} ms max {s['jitter_max_ms']:.3f} ms, "
+                         f"duration max {s['duration_max_ms']:.3f} ms, "
+                         f"{s['overruns']} overruns ({s['missed_periods']} periods missed)")
+        return "\n".join(lines)
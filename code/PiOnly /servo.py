@@ -6,7 +6,7 @@
 import threading
 import queue
 import time
-import RPi.GPIO as GPIO
+from hal import GPIO
 
 class Servo:
     def __init__(self, pin=22, initial_angle=90, time_per_degree=0.004):
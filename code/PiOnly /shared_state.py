@@ -0,0 +1,82 @@
+################################################################
+# Shared Memory Seqlock for ND Robotics Course
+# 10-19-2026
+################################################################
+import struct
+import time
+from multiprocessing import shared_memory
+
+
+class SeqlockState:
+    # Single-writer / multi-reader seqlock over a fixed-size record in shared memory.
+    #
+    # The writer bumps the sequence number to an odd value, copies the record in,
+    # then bumps it to the next even value. Readers copy the record and retry if the
+    # sequence was odd or changed while they were copying, so they never see a torn
+    # record and never take a lock. Attach from another process with the block name.
+    #
+    # Only one process/thread may write. Any number may read. Readers should be started
+    # with multiprocessing so they share the creator's resource tracker.
+    HEADER = struct.Struct("<Q")
+
+    def __init__(self, record_size, name=None):
+        # param record_size: Size in bytes of the record stored in the block.
+        # param name: Name of an existing block to attach to (None creates a new one).
+        self.record_size = record_size
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER.size + record_size)
+            self.shm.buf[:self.HEADER.size + record_size] = bytes(self.HEADER.size + record_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        # Continue from the block's sequence, so a restarted writer's versions keep increasing
+        self._seq = self.HEADER.unpack_from(self.shm.buf, 0)[0] & ~1
+
+    @classmethod
+    def attach(cls, name, record_size):
+        return cls(record_size, name=name)
+
+    def write(self, data):
+        # Publishes a new record. Returns the new version number.
+        if len(data) != self.record_size:
+            raise ValueError(f"Record must be {self.record_size} bytes, got {len(data)}")
+        buf = self.shm.buf
+        start = self.HEADER.size
+        seq = self._seq + 1
+        self.HEADER.pack_into(buf, 0, seq)
+        buf[start:start + self.record_size] = data
+        self._seq = seq + 1
+        self.HEADER.pack_into(buf, 0, self._seq)
+        return self._seq >> 1
+
+    def read(self, timeout=0.01):
+        # Returns (version, data) for the latest complete record.
+        # Version 0 means nothing has been published yet.
+        buf = self.shm.buf
+        start = self.HEADER.size
+        end = start + self.record_size
+        deadline = None
+        while True:
+            seq1 = self.HEADER.unpack_from(buf, 0)[0]
+            if not seq1 & 1:
+                data = bytes(buf[start:end])
+                if self.HEADER.unpack_from(buf, 0)[0] == seq1:
+                    return seq1 >> 1, data
+            # Writer is mid-update; retry until the timeout expires.
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError("Seqlock writer did not finish updating the record")
+
+    def version(self):
+        return self.HEADER.unpack_from(self.shm.buf, 0)[0] >> 1
+
+    def close(self):
+        # Detaches from the block, and removes it if this instance created it.
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
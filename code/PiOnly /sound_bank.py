@@ -0,0 +1,119 @@
+################################################################
+# Sound Bank for ND Robotics Course
+# 10-19-2026
+################################################################
+# Keeps decoded clips in memory so playing one doesn't read or parse a file:
+#
+#   bank = SoundBank(budget_bytes=64 * 1024 * 1024)
+#   bank.load("/home/ndrobotics/sounds/boxbox.wav")    # key "boxbox"
+#   bank.get("boxbox").play()
+#
+# Clips are keyed by file name without extension. When the decoded clips add up to more than
+# the budget, the least recently used ones are dropped and decoded again on their next use.
+# Each clip can have its own gain (e.g. from audio_analysis.py), applied on top of the volume.
+import os
+import threading
+from collections import OrderedDict
+import pygame
+from metrics import metrics
+
+
+def sound_key(path):
+    # "/home/ndrobotics/sounds/boxbox.mp3" -> "boxbox"
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class SoundBank:
+    def __init__(self, budget_bytes=64 * 1024 * 1024, volume=1.0):
+        # param budget_bytes: Most decoded audio to keep in memory.
+        # param volume: Volume given to each clip as it is loaded.
+        self.budget_bytes = budget_bytes
+        self.volume = volume
+        self.entries = OrderedDict()  # key -> (Sound, path, size), least recently used first
+        self.paths = {}  # key -> path of every clip ever loaded, so evicted ones can be reloaded
+        self.gains = {}  # key -> the clip's own gain (0.0 to 1.0)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        # Runtime metrics (see metrics.py)
+        self.hit_count = metrics.counter("sound.bank_hits")
+        self.miss_count = metrics.counter("sound.bank_misses")
+        self.evict_count = metrics.counter("sound.bank_evictions")
+        metrics.gauge("sound.bank_bytes", lambda: self.total_bytes)
+
+    @staticmethod
+    def decoded_size(sound):
+        # Bytes a Sound takes in memory at the mixer's format
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+    def load(self, path, key=None, gain=1.0):
+        # Decodes a clip into the bank (or refreshes it if already there).
+        # param path: WAV (or OGG) file to decode.
+        # param key: Name to play it by; defaults to the file name without extension.
+        # param gain: The clip's volume relative to the others (0.0 to 1.0).
+        # return: The key.
+        key = key or sound_key(path)
+        self.gains[key] = gain
+        self._load(path, key)
+        return key
+
+    def _load(self, path, key):
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(self.volume * self.gains.get(key, 1.0))
+        size = self.decoded_size(sound)
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (sound, path, size)
+            self.paths[key] = path
+            self.total_bytes += size
+            self._evict(keep=key)
+        return sound
+
+    def get(self, key):
+        # Returns the clip's Sound, reloading it if it was evicted. None if it was never loaded.
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hit_count.inc()
+                return entry[0]
+            path = self.paths.get(key)
+        if path is None:
+            return None
+        self.miss_count.inc()
+        return self._load(path, key)
+
+    def __contains__(self, key):
+        return key in self.paths
+
+    def items(self):
+        # (key, Sound) for every clip currently in memory
+        with self.lock:
+            return [(key, entry[0]) for key, entry in self.entries.items()]
+
+    def set_volume(self, volume):
+        self.volume = volume
+        for key, sound in self.items():
+            sound.set_volume(volume * self.gains.get(key, 1.0))
+
+    def unload(self, key):
+        with self.lock:
+            self._remove(key)
+            self.paths.pop(key, None)
+            self.gains.pop(key, None)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+    def _evict(self, keep):
+        # Drops least recently used clips until the bank fits its budget. A single clip
+        # larger than the budget is still kept while it is the newest.
+        while self.total_bytes > self.budget_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            self._remove(key)
+            self.evict_count.inc()
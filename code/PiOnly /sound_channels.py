@@ -0,0 +1,218 @@
+################################################################
+# Mixer Channel Groups for ND Robotics Course
+# 10-19-2026
+################################################################
+# Splits the mixer's 8 channels into groups, so an ambient track, sound effects, speech and
+# alerts can all play at once without cutting each other off:
+#
+#   channel  0-1   ambient   (two, so one clip can fade into the next)
+#            2-5   effects
+#            6     voice     (text-to-speech)
+#            7     alert     (kept free for alerts)
+#
+# Each group has its own volume and a priority. When every channel in a group is busy, a new
+# sound takes over the channel playing the lowest-priority (then oldest) sound, as long as
+# that sound's priority isn't higher than the new one's.
+#
+# PlaybackTracker follows every sound that was started and completes its Playback when it
+# ends, so callers can wait for a sound instead of sleeping for its length.
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+import pygame
+
+# name -> (mixer channel numbers, default priority)
+CHANNEL_GROUPS = {
+    "ambient": ((0, 1), 0),
+    "effects": ((2, 3, 4, 5), 1),
+    "voice": ((6,), 2),
+    "alert": ((7,), 3),
+}
+
+
+class ChannelGroup:
+    def __init__(self, name, channel_ids, priority=0, volume=1.0):
+        self.name = name
+        self.channels = [pygame.mixer.Channel(i) for i in channel_ids]
+        self.priority = priority
+        self.volume = volume
+        self.playing = {}  # channel number -> (priority, start time) of the sound it was given
+        for channel in self.channels:
+            channel.set_volume(volume)
+
+    def find_channel(self, priority):
+        # A free channel, else the busy channel this priority may take over, else None.
+        candidates = []
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return channel
+            playing_priority, started = self.playing.get(i, (self.priority, 0.0))
+            if playing_priority <= priority:
+                candidates.append((playing_priority, started, i))
+        if not candidates:
+            return None
+        return self.channels[min(candidates)[2]]
+
+    def play(self, sound, priority=None, loops=0, fade_ms=0):
+        # Starts 'sound' on a channel of this group right away.
+        # param priority: Defaults to the group's priority.
+        # return: The Channel, or None if every channel plays something more important.
+        priority = self.priority if priority is None else priority
+        channel = self.find_channel(priority)
+        if channel is None:
+            return None
+        channel.play(sound, loops=loops, fade_ms=fade_ms)
+        channel.set_volume(self.volume)
+        self.playing[self.channels.index(channel)] = (priority, time.monotonic())
+        return channel
+
+    def set_volume(self, volume):
+        self.volume = max(0.0, min(1.0, volume))
+        for channel in self.channels:
+            channel.set_volume(self.volume)
+
+    def stop(self, fade_ms=0):
+        for channel in self.channels:
+            if fade_ms:
+                channel.fadeout(fade_ms)
+            else:
+                channel.stop()
+        self.playing.clear()
+
+    def get_busy(self):
+        return any(channel.get_busy() for channel in self.channels)
+
+
+# Tracker key for the pygame.mixer.music stream
+MUSIC = "music"
+
+
+class Playback:
+    # One started sound. Wait for it to end, or ask how far it has got.
+    def __init__(self, key, channel, length, offset=0.0, group=None):
+        self.key = key
+        self.channel = channel  # pygame Channel, or MUSIC
+        self.group = group
+        self.length = length  # Seconds from 'offset' to the end of the clip
+        self.offset = offset  # Where in the clip it started (seconds)
+        self.started = time.monotonic()
+        self.ended = None
+        self.stopped = False  # Stopped or replaced before it finished
+        self.future = Future()
+
+    @property
+    def is_playing(self):
+        return self.ended is None
+
+    @property
+    def position(self):
+        # Seconds into the clip
+        end = self.ended if self.ended is not None else time.monotonic()
+        return min(self.offset + self.length, self.offset + end - self.started)
+
+    def wait(self, timeout=None):
+        # Blocks until the sound ends. Returns False on timeout.
+        try:
+            self.future.result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def add_done_callback(self, callback):
+        # Runs callback(playback) when the sound ends (at once if it already has).
+        self.future.add_done_callback(lambda future: callback(self))
+
+
+class PlaybackTracker:
+    # Completes each Playback when its channel goes quiet.
+    #
+    # Every channel (and the music stream) posts its own end event (Channel.set_endevent). A
+    # watcher thread collects only those event types, so other code's events are untouched,
+    # and confirms the channel really is idle; an end event also arrives when a sound is cut
+    # off by the next one. In case someone else drains the event queue, all channels are
+    # also checked every 'sweep_interval'.
+    def __init__(self, channels, poll_interval=0.01, sweep_interval=0.25):
+        # param channels: The pygame Channels to follow.
+        self.event_types = {}
+        for channel in channels:
+            event_type = pygame.event.custom_type()
+            channel.set_endevent(event_type)
+            self.event_types[event_type] = channel
+        event_type = pygame.event.custom_type()
+        pygame.mixer.music.set_endevent(event_type)
+        self.event_types[event_type] = MUSIC
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.active = {}  # Channel or MUSIC -> Playback
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sound-end", daemon=True)
+        self.thread.start()
+
+    def track(self, key, channel, length, offset=0.0, group=None):
+        # Starts following a sound just started on 'channel'. A sound it replaced is finished
+        # as stopped.
+        playback = Playback(key, channel, length, offset, group)
+        with self.lock:
+            previous = self.active.get(channel)
+            self.active[channel] = playback
+        if previous is not None:
+            self._finish(previous, stopped=True)
+        return playback
+
+    def playing(self, key=None):
+        # Playbacks still going (only those of 'key', if given), oldest first.
+        with self.lock:
+            playbacks = list(self.active.values())
+        return sorted((p for p in playbacks if key is None or p.key == key), key=lambda p: p.started)
+
+    def stop(self, channels=None):
+        # Finishes the playbacks on 'channels' (default: all) as stopped. Call after stopping them.
+        with self.lock:
+            stopped = [p for c, p in self.active.items() if channels is None or c in channels]
+        for playback in stopped:
+            self._finish(playback, stopped=True)
+
+    def _busy(self, channel):
+        return pygame.mixer.music.get_busy() if channel == MUSIC else channel.get_busy()
+
+    def _finish(self, playback, stopped=False):
+        with self.lock:
+            if playback.ended is not None:
+                return
+            playback.ended = time.monotonic()
+            playback.stopped = stopped
+            if self.active.get(playback.channel) is playback:
+                del self.active[playback.channel]
+        playback.future.set_result(playback)
+
+    def _run(self):
+        next_sweep = time.monotonic() + self.sweep_interval
+        while not self.stop_event.wait(self.poll_interval):
+            ended = {self.event_types[event.type] for event in pygame.event.get(list(self.event_types))}
+            if time.monotonic() >= next_sweep:
+                next_sweep = time.monotonic() + self.sweep_interval
+                with self.lock:
+                    ended.update(self.active)
+            for channel in ended:
+                playback = self.active.get(channel)
+                if playback is not None and not self._busy(channel):
+                    self._finish(playback)
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1)
+        self.stop()
+
+
+def create_channel_groups(volumes=None):
+    # Reserves the mixer's channels for the groups, so Sound.play() never picks one of them,
+    # and returns {name: ChannelGroup}.
+    # param volumes: Optional {group name: volume}.
+    volumes = volumes or {}
+    count = max(i for ids, _ in CHANNEL_GROUPS.values() for i in ids) + 1
+    if pygame.mixer.get_num_channels() < count:
+        pygame.mixer.set_num_channels(count)
+    pygame.mixer.set_reserved(count)
+    return {name: ChannelGroup(name, ids, priority, volumes.get(name, 1.0))
+            for name, (ids, priority) in CHANNEL_GROUPS.items()}
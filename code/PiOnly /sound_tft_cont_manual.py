@@ -1,40 +1,23 @@
-import pygame
 import time
-from sabertooth import Sabertooth
-from ps5_controller import PS5_Controller
-
-import os
-import time
-import random
-import subprocess
-import threading
-import queue
-from pydub import AudioSegment
-import pygame
-from usb_sound_controller import USB_SoundController
-
-from ambient_sound import AmbientSoundRoutine
-
-import spidev            # For SPI communications
-import RPi.GPIO as GPIO  # For controlling GPIO pins
-import threading         # For managing threads
-import time              # For sleep/delay functions
-from PIL import Image, ImageDraw, ImageFont  # For image manipulation
-import math              # For geometric calculations
-from queue import Queue  # For thread-safe queue
-
-from tft_display import TFTDisplay
-from tft_display import TFTRoutine
-
 import atexit
+from boot import BootOrchestrator, lazy_import
+from robot_logging import get_logger, setup_logging
+from robot_config import config
+from estop import EStop
+from hal import GPIO     # For controlling GPIO pins
+
+# Heavy modules are loaded on first use, by the boot step that needs them
+pygame = lazy_import("pygame")
+sabertooth = lazy_import("sabertooth")
+ps5_controller = lazy_import("ps5_controller")
+usb_sound_controller = lazy_import("usb_sound_controller")
+ambient_sound = lazy_import("ambient_sound")
+ambient_tft_display = lazy_import("ambient_tft_display")
+
+log = get_logger("manual")
 
 atexit.register(GPIO.cleanup)
 
-# Define TFT display pins (GPIO numbers) based on your wiring.
-TFT_CS_PIN = 5     # Chip Select (GPIO5)
-TFT_RESET_PIN = 6  # Reset (GPIO6)
-TFT_DC_PIN = 26    # Data/Command (GPIO26)
-
 # Display specifications for the 1.8" TFT (ST7735R):
 SCREEN_WIDTH = 128
 SCREEN_HEIGHT = 160
@@ -45,18 +28,19 @@ def initialize_controller():
     if pygame.joystick.get_count() > 0:
         controller = pygame.joystick.Joystick(0)
         controller.init()
-        print(f"Controller '{controller.get_name()}' initialized.")
+        log.info("Controller '%s' initialized.", controller.get_name())
         return controller
     else:
-        print("No PS5 controller detected. Ambient routine control disabled.")
+        log.info("No PS5 controller detected. Ambient routine control disabled.")
         return None
 
 def process_controller_events(ambient_routine):
     """
     Checks for PS5 controller events.
     In this example, pressing button 0 toggles the ambient routine.
+    Only button events are taken so joystick hot-plug events reach the PS5_Controller.
     """
-    for event in pygame.event.get():
+    for event in pygame.event.get(pygame.JOYBUTTONDOWN):
         if event.type == pygame.JOYBUTTONDOWN:
             # Toggle the ambient routine on button press (assume button 0).
             if event.button == 0:
@@ -75,57 +59,68 @@ def move_robot(saber, control_request):
 
 # ---------------- Main Routine ---------------- #
 if __name__ == "__main__":
-    # Initialize the PS5 Controller class
-    ps5 = PS5_Controller()
-    ps5.initialize_controller()
-    
-    # Initialize Sabertooth motor controller
-    saber = Sabertooth()
-    saber.set_ramping(21)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
+    setup_logging()
+    cfg = config()
+
+    # List of at least 5 different background ambient sounds, and the display images (see robot.toml).
+    ambient_sounds = cfg.paths.ambient_sound_paths()
+    image_list = cfg.paths.display_image_paths()
+
+    def create_ps5():
+        # Don't wait for the controller here; it is picked up (and reconnected after a drop)
+        # by handle_events() in the main loop.
+        ps5 = ps5_controller.PS5_Controller()
+        ps5.keep_button_events = True  # process_controller_events() reads button events
+        ps5.initialize_controller(block=False)
+        return ps5
+
+    def create_saber():
+        saber = sabertooth.Sabertooth()
+        saber.set_ramping(cfg.sabertooth.ramping)  # Fast Ramping 1-10, Slow 11-20, Intermediate 21-80
+        return saber
+
+    def start_ambient(sound_ctrl):
+        # Decode the clips now so the first plays don't wait on the SD card.
+        sound_ctrl.preload(ambient_sounds)
+        # Start the ambient routine by default.
+        ambient_routine = ambient_sound.AmbientSoundRoutine(sound_ctrl, ambient_sounds)
+        ambient_routine.start()
+        return ambient_routine
+
+    def start_display_routine(display, sound_ctrl=None):
+        display_routine = ambient_tft_display.TFTRoutine(display, image_list, sound_ctrl)
+        display_routine.start()
+        return display_routine
+
+    # Independent subsystems start in parallel. The sound controller waits for the PS5 step
+    # because both initialize pygame. The Sabertooth's power-up wait runs on its own step, so
+    # it overlaps the others. Driving starts as soon as the PS5 and Sabertooth are up; sound
+    # and display finish in the background.
+    boot = BootOrchestrator()
+    boot.add("ps5", create_ps5)
+    boot.add("saber", create_saber)
+    boot.add("failsafe", lambda ps5, saber: ps5.add_failsafe(saber.stop), depends=("ps5", "saber"))
+    boot.add("estop", lambda ps5, saber: EStop.from_config(saber, ps5), depends=("ps5", "saber"))
+    boot.add("controller", lambda ps5: initialize_controller(), depends=("ps5",))
+    boot.add("sound", lambda ps5: usb_sound_controller.USB_SoundController(), depends=("ps5",))
+    boot.add("ambient", start_ambient, depends=("sound",))
+    boot.add("display", lambda: ambient_tft_display.TFTDisplay())
+    # Lip sync follows the sound controller; the random images don't need to wait for it
+    boot.add("display_routine", start_display_routine,
+             depends=("display", "sound") if cfg.tft.routine == "lip_sync" else ("display",))
+    boot.start()
+
+    # Stop the motors immediately if the controller drops out (the "failsafe" step) or the
+    # e-stop combo is pressed (the "estop" step)
+    ps5, saber, _, _ = boot.wait("ps5", "saber", "failsafe", "estop")
+    boot.mark("drivable")
     isMoving = False
-    
+
     ps5_last_check_time = time.time()
-    ps5_loop_interval = 0.02  # 20ms interval
+    ps5_loop_interval = cfg.controller.poll_interval  # 20ms default
     
     motor_controller_last_check_time = time.time()
-    motor_controller_loop_interval = 0.04  # 40ms interval
-        
-    # Initialize the sound controller.
-    sound_ctrl = USB_SoundController(volume=0.7)
-    
-
-    # List of at least 5 different background ambient sounds.
-    ambient_sounds = [
-        "/home/ndrobotics/code/Pi Only Files /sounds/boxbox.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/f1.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/italiananthem.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/SmoothOperator.mp3",
-        "/home/ndrobotics/code/Pi Only Files /sounds/kimisteeringwheel.mp3"
-    ]
-
-    # Create the AmbientSoundRoutine instance.
-    ambient_routine = AmbientSoundRoutine(sound_ctrl, ambient_sounds)
-
-    # Initialize PS5 controller (if available).
-    controller = initialize_controller()
-
-    # Start the ambient routine by default.
-    ambient_routine.start()
-    
-    # Start display
-    display = TFTDisplay()
-    
-    image_list = [
-        "/home/ndrobotics/code/Pi Only Files /images/guido_1.bmp",
-        "/home/ndrobotics/code/Pi Only Files /images/guido_mog.bmp",
-        "/home/ndrobotics/code/Pi Only Files /images/guido_drill.bmp",
-        "/home/ndrobotics/code/Pi Only Files /images/guido_italy.bmp",
-        ]
-    
-    display_routine = TFTRoutine(display, image_list)
- 
-    display_routine.start()
-    
+    motor_controller_loop_interval = cfg.controller.motor_interval  # 40ms default
 
     try:
         # Main loop polls for controller events to toggle ambient sounds.
@@ -134,13 +129,13 @@ if __name__ == "__main__":
 
             # Check PS5 controller state
             if current_time - ps5_last_check_time >= ps5_loop_interval:
-                pygame.event.pump()
+                ps5.handle_events()
                 ps5.check_controls()
                 ps5_last_check_time = current_time
 
             # Example: Use Arrow Up as a function call trigger
             if ps5.control_request["reqArrowUp"]:
-                print("This should call by function tied to Arrow Up")
+                log.debug("This should call by function tied to Arrow Up")
 
             # Move the robot if left joystick is moved
             if ps5.control_request["reqLeftJoyMade"]:
@@ -160,17 +155,23 @@ if __name__ == "__main__":
             # Provide a brief sleep to allow worker threads to catch up to main loop
             time.sleep(.001)
             
-            process_controller_events(ambient_routine)
+            # The ambient routine may still be starting
+            ambient_routine = boot.get("ambient")
+            if ambient_routine is not None:
+                process_controller_events(ambient_routine)
             time.sleep(0.1)  # Small delay to avoid busy-waiting.
     except KeyboardInterrupt:
-        print("Exiting ambient routine...")
+        log.info("Exiting ambient routine...")
     finally:
         pygame.joystick.quit()
         pygame.quit()
         saber.close()
-        print("PS5 controller disconnected.")
-        ambient_routine.stop()
-        sound_ctrl.close()
+        log.info("PS5 controller disconnected.")
+        boot.join(timeout=5)
+        if boot.get("ambient") is not None:
+            boot.get("ambient").stop()
+        if boot.get("sound") is not None:
+            boot.get("sound").close()
 
 
 
@@ -0,0 +1,188 @@
+################################################################
+# Process Supervisor for ND Robotics Course
+# 10-19-2026
+################################################################
+# Runs each robot subsystem in its own process so they stop competing for one GIL.
+#
+#   supervisor = Supervisor()
+#   supervisor.add_channel("controller", ControllerState.STATE_FORMAT.size)
+#   supervisor.add("control", control_main, cpus={3}, realtime_priority=50)
+#   supervisor.add("media", media_main, cpus={0}, nice=5)
+#   supervisor.run()
+#
+# Each process is pinned to its CPUs and given its scheduling policy before its target runs.
+# The target is called with a dict of attached channels (name -> SeqlockState) and a stop
+# Event. Channels are created by the supervisor, so they survive a subsystem restarting.
+# A process that exits with an error is restarted after a backoff that doubles with each
+# quick crash.
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from shared_state import SeqlockState
+from metrics import metrics
+from robot_logging import get_logger, setup_logging, shutdown_logging
+
+log = get_logger("supervisor")
+
+
+def apply_scheduling(cpus=None, nice=None, realtime_priority=None):
+    # Applies CPU affinity and priority to the calling process. Settings the OS refuses
+    # (SCHED_FIFO needs root or CAP_SYS_NICE) are logged and skipped.
+    # param cpus: Set of CPU numbers to run on.
+    # param nice: Niceness to add (positive values lower the priority).
+    # param realtime_priority: SCHED_FIFO priority (1-99).
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            log.warning("Could not pin to CPUs %s: %s", sorted(cpus), e)
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError as e:
+            log.warning("Could not set niceness %d: %s", nice, e)
+    if realtime_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(realtime_priority))
+        except (AttributeError, OSError) as e:
+            log.warning("Could not set SCHED_FIFO priority %d: %s", realtime_priority, e)
+
+
+def _process_main(spec, channel_names, stop_event):
+    setup_logging()
+    apply_scheduling(spec.cpus, spec.nice, spec.realtime_priority)
+    channels = {name: SeqlockState.attach(shm_name, size) for name, (shm_name, size) in channel_names.items()}
+    try:
+        spec.target(channels, stop_event, *spec.args)
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the whole process group; the supervisor handles shutdown.
+        pass
+    finally:
+        for channel in channels.values():
+            channel.close()
+        shutdown_logging()
+
+
+class ProcessSpec:
+    def __init__(self, name, target, args, cpus, nice, realtime_priority, restart):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.cpus = set(cpus) if cpus else None
+        self.nice = nice
+        self.realtime_priority = realtime_priority
+        self.restart = restart
+        self.process = None
+        self.started = 0.0
+        self.restart_at = None
+        self.backoff = 0.0
+        self.restarts = metrics.counter(f"supervisor.{name}.restarts")
+
+
+class Supervisor:
+    def __init__(self, min_backoff=0.5, max_backoff=10.0, stable_time=30.0):
+        # param min_backoff: Seconds before the first restart of a crashed process.
+        # param max_backoff: Longest wait between restarts.
+        # param stable_time: A process that ran this long has its backoff reset.
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_time = stable_time
+        self.specs = {}
+        self.channels = {}
+        self.context = multiprocessing.get_context("fork")
+        self.stop_event = self.context.Event()
+
+    def add_channel(self, name, record_size):
+        # Creates a shared memory seqlock every process can attach to by name.
+        self.channels[name] = SeqlockState(record_size)
+        return self.channels[name]
+
+    def add(self, name, target, args=(), cpus=None, nice=None, realtime_priority=None, restart=True):
+        # param target: Called in the new process as target(channels, stop_event, *args).
+        #               It should return when stop_event is set.
+        # param cpus: CPUs to pin the process to (e.g. {3}).
+        # param nice: Niceness for the process.
+        # param realtime_priority: Run under SCHED_FIFO with this priority (1-99).
+        # param restart: Restart the process if it exits with an error.
+        if name in self.specs:
+            raise ValueError(f"Process '{name}' is already defined.")
+        self.specs[name] = ProcessSpec(name, target, args, cpus, nice, realtime_priority, restart)
+        metrics.gauge(f"supervisor.{name}.alive",
+                      lambda spec=self.specs[name]: int(spec.process is not None and spec.process.is_alive()))
+
+    def _start(self, spec):
+        channel_names = {name: (channel.name, channel.record_size) for name, channel in self.channels.items()}
+        # Not daemonic: subsystems may start their own processes (e.g. the Sabertooth writer)
+        spec.process = self.context.Process(target=_process_main, name=spec.name,
+                                            args=(spec, channel_names, self.stop_event))
+        spec.process.start()
+        spec.started = time.monotonic()
+        spec.restart_at = None
+        log.info("Started %s (pid %d)", spec.name, spec.process.pid)
+
+    def _reap(self, spec):
+        # Handles a process that exited. Schedules a restart if it crashed.
+        code = spec.process.exitcode
+        uptime = time.monotonic() - spec.started
+        spec.process = None
+        if code == 0 or not spec.restart or self.stop_event.is_set():
+            log.info("%s exited (code %s)", spec.name, code)
+            return
+        if uptime >= self.stable_time:
+            spec.backoff = 0.0
+        spec.backoff = min(self.max_backoff, max(self.min_backoff, spec.backoff * 2))
+        spec.restart_at = time.monotonic() + spec.backoff
+        spec.restarts.inc()
+        log.error("%s crashed (code %s) after %.1f s; restarting in %.1f s",
+                  spec.name, code, uptime, spec.backoff)
+
+    def start(self):
+        for spec in self.specs.values():
+            self._start(spec)
+
+    def run(self):
+        # Starts every process and supervises them until stop() is called or Ctrl+C.
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                running = [spec for spec in self.specs.values() if spec.process is not None]
+                pending = [spec.restart_at for spec in self.specs.values() if spec.restart_at is not None]
+                if not running and not pending:
+                    break
+                # Wake at least every 0.5 s so stop() from another thread is noticed
+                timeout = max(0.0, min(pending) - time.monotonic()) if pending else 0.5
+                timeout = min(timeout, 0.5)
+                ready = wait([spec.process.sentinel for spec in running], timeout)
+                for spec in running:
+                    if spec.process.sentinel in ready:
+                        spec.process.join()
+                        self._reap(spec)
+                now = time.monotonic()
+                for spec in self.specs.values():
+                    if spec.restart_at is not None and spec.restart_at <= now:
+                        self._start(spec)
+        except KeyboardInterrupt:
+            log.info("Stopping subsystems...")
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        # Makes run() return (safe to call from another thread or a signal handler).
+        self.stop_event.set()
+
+    def shutdown(self, timeout=3.0):
+        # Asks every process to return, terminates those that don't, and removes the channels.
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for spec in self.specs.values():
+            if spec.process is not None:
+                spec.process.join(max(0.0, deadline - time.monotonic()))
+                if spec.process.is_alive():
+                    log.warning("%s did not stop; terminating it", spec.name)
+                    spec.process.terminate()
+                    spec.process.join(1.0)
+                spec.process = None
+        for channel in self.channels.values():
+            channel.close()
+        self.channels = {}
@@ -3,8 +3,8 @@
 # 3-7-2025
 # Professor McLaughlin
 ################################################################
-import spidev            # For SPI communications
-import RPi.GPIO as GPIO  # For controlling GPIO pins
+from hal import spidev   # For SPI communications
+from hal import GPIO     # For controlling GPIO pins
 import threading         # For managing threads
 import time              # For sleep/delay functions
 from PIL import Image, ImageDraw, ImageFont  # For image manipulation
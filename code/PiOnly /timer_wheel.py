@@ -0,0 +1,97 @@
+################################################################
+# Timer Wheel for ND Robotics Course
+# 10-19-2026
+################################################################
+# Runs one-shot callbacks after a delay, all from one thread:
+#
+#   wheel = TimerWheel(tick=0.01)
+#   timer = wheel.schedule(2.5, fade_out, playback)
+#   timer.cancel()                                     # if it isn't needed after all
+#   wheel.close()
+#
+# Timers are kept in a hashed wheel: 'slots' buckets, each 'tick' seconds wide, so scheduling
+# and cancelling don't depend on how many timers there are. A timer further out than one turn
+# of the wheel waits in its bucket until its tick comes round. Callbacks run on the wheel's
+# thread and should be quick; a timer fires up to one tick late, never early.
+import math
+import threading
+import time
+from robot_logging import get_logger
+
+log = get_logger("timer_wheel")
+
+
+class Timer:
+    __slots__ = ("tick", "callback", "args", "cancelled")
+
+    def __init__(self, tick, callback, args):
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    def __init__(self, tick=0.01, slots=512, name="timer-wheel"):
+        # param tick: Resolution in seconds.
+        # param slots: Buckets in the wheel; one turn covers tick * slots seconds.
+        self.tick = tick
+        self.buckets = [[] for _ in range(slots)]
+        self.start = time.monotonic()
+        self.current_tick = 0
+        self.count = 0  # Timers waiting in the buckets
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _now_tick(self):
+        return int((time.monotonic() - self.start) / self.tick)
+
+    def schedule(self, delay, callback, *args):
+        # Runs callback(*args) 'delay' seconds from now.
+        # return: The Timer, to cancel it.
+        with self.lock:
+            if not self.count:
+                self.current_tick = self._now_tick()  # The wheel stood still while it was empty
+            timer = Timer(self.current_tick + max(1, math.ceil(delay / self.tick)), callback, args)
+            self.buckets[timer.tick % len(self.buckets)].append(timer)
+            self.count += 1
+        self.wakeup.set()
+        return timer
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if not self.count:
+                # Nothing scheduled: sleep until schedule() or close()
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            delay = self.start + (self.current_tick + 1) * self.tick - time.monotonic()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+            # Catch up on every tick that has passed, in case this thread was held up
+            while self.current_tick < self._now_tick():
+                with self.lock:
+                    self.current_tick += 1
+                    bucket = self.buckets[self.current_tick % len(self.buckets)]
+                    due = [timer for timer in bucket if timer.tick <= self.current_tick]
+                    bucket[:] = [timer for timer in bucket if timer.tick > self.current_tick]
+                    self.count -= len(due)
+                for timer in due:
+                    if timer.cancelled:
+                        continue
+                    try:
+                        timer.callback(*timer.args)
+                    except Exception as e:
+                        log.error("Error in timer callback %s: %s", getattr(timer.callback, "__name__", timer.callback), e)
+
+    def close(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=1)
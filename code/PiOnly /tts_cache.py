@@ -0,0 +1,128 @@
+################################################################
+# Text-to-Speech Cache for ND Robotics Course
+# 10-19-2026
+################################################################
+# Renders speech with Festival's text2wave on worker threads and keeps every rendered phrase,
+# so a phrase is only synthesized once:
+#
+#   tts = TTSCache("~/.cache/robot/tts")
+#   tts.prerender(["Box box", "Stopping"])           # at startup, in the background
+#   tts.submit("Box box").result()                    # -> path of the rendered WAV
+#
+# Files are named by a hash of the voice, sample rate and text. text2wave is run with an argument list
+# and reads the text from stdin, so quotes or shell characters in the text are harmless.
+# Given a sidecar_path, each new phrase is also analysed (see audio_analysis.py) as it is
+# rendered, so the lip-sync display can follow speech. That needs NumPy; without it the
+# phrases are rendered but not analysed.
+import hashlib
+import importlib.util
+import os
+import subprocess
+import tempfile
+import threading
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("tts")
+
+
+class TTSCache:
+    def __init__(self, cache_dir=None, voice=None, max_workers=None, rate=None, command="text2wave",
+                 sidecar_path=None):
+        # param cache_dir: Where rendered WAVs are kept (default: sound.tts_cache_dir).
+        # param voice: Festival voice, e.g. "voice_us_slt_hts" (default: sound.tts_voice;
+        #              empty for Festival's default voice).
+        # param max_workers: Phrases synthesized at once (default: sound.tts_workers).
+        # param rate: Sample rate to render at; pass the mixer's so speech isn't resampled.
+        # param sidecar_path: Function giving where a rendered WAV's analysis goes (e.g.
+        #                     AudioCache.sidecar_path); None to skip the analysis.
+        cfg = config().sound
+        self.cache_dir = os.path.expanduser(cache_dir or cfg.tts_cache_dir)
+        self.voice = cfg.tts_voice if voice is None else voice
+        self.rate = rate
+        self.command = command
+        self.sidecar_path = sidecar_path
+        if sidecar_path is not None and importlib.util.find_spec("numpy") is None:
+            log.warning("NumPy is not installed; speech won't be analysed for lip sync")
+            self.sidecar_path = None
+        self.pending = {}  # path -> Future of a synthesis in progress
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or cfg.tts_workers, thread_name_prefix="tts")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, text, voice=None):
+        voice = self.voice if voice is None else voice
+        digest = hashlib.sha256(f"{voice}\0{self.rate}\0{text}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"tts-{digest}.wav")
+
+    def synthesize(self, text, voice=None):
+        # Renders 'text' into the cache in the calling thread and returns its path.
+        voice = self.voice if voice is None else voice
+        path = self.path_for(text, voice)
+        if os.path.exists(path):
+            return path
+        # A unique temporary name, so concurrent requests never write the same file
+        fd, temp_path = tempfile.mkstemp(suffix=".wav", dir=self.cache_dir)
+        os.close(fd)
+        args = [self.command, "-o", temp_path]
+        if self.rate:
+            args += ["-F", str(self.rate)]
+        if voice:
+            args += ["-eval", f"({voice})"]
+        try:
+            subprocess.run(args, input=text.encode("utf-8"), check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if self.sidecar_path is not None:
+            self._analyze(path)
+        return path
+
+    def _analyze(self, path):
+        # Writes the analysis sidecar of a newly rendered phrase
+        from audio_analysis import analyze_file
+        try:
+            analyze_file(path).save(self.sidecar_path(path))
+        except (wave.Error, EOFError, OSError) as e:
+            log.error("Error analysing speech '%s': %s", path, e)
+
+    def submit(self, text, voice=None):
+        # Renders 'text' on a worker thread unless it is cached or already being rendered.
+        # return: Future with the WAV's path (already done for cached phrases).
+        path = self.path_for(text, voice)
+        with self.lock:
+            future = self.pending.get(path)
+            if future is not None:
+                return future
+            if os.path.exists(path):
+                future = Future()
+                future.set_result(path)
+                return future
+            future = self.executor.submit(self.synthesize, text, voice)
+            self.pending[path] = future
+        future.add_done_callback(lambda f: self._done(path, text, f))
+        return future
+
+    def _done(self, path, text, future):
+        with self.lock:
+            self.pending.pop(path, None)
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            log.error("Error synthesizing '%s': %s", text, getattr(error, "stderr", None) or error)
+
+    def prerender(self, phrases, voice=None, wait=False):
+        # Renders known phrases ahead of time.
+        # param wait: Block until they are all rendered.
+        # return: The Futures.
+        futures = [self.submit(text, voice) for text in phrases]
+        if wait:
+            for future in futures:
+                future.exception()
+        return futures
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,31 +1,40 @@
 import cv2
-from picamera2 import Picamera2
+from hal import Picamera2
 import time
 import numpy as np
 import threading
 import pygame
 
 from sabertooth import Sabertooth
+from robot_config import config
 
 # Global variable for sign recognition result
 recognized_sign = None
 stop_event = threading.Event()  # Event to signal threads to stop
 
-def recognize_sign():
-    """Thread function to perform image detection using Picamera2 and OpenCV."""
-    global recognized_sign
-    picam2 = Picamera2()
-    config = picam2.create_still_configuration(main={"size": (1024, 768)})
-    picam2.configure(config)
-    picam2.start()
-    time.sleep(1)  # Allow camera to warm up
+# Reference images for the road signs
+SIGN_IMAGE_DIR = config().paths.sign_images_dir
 
-    while not stop_event.is_set() and recognized_sign is None:
-        frame = picam2.capture_array()
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        edges = cv2.Canny(blurred, 50, 150)
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+def load_sign_templates(image_dir=SIGN_IMAGE_DIR):
+    """Loads the reference contour shapes for the STOP and ARROW signs (once, not per frame)."""
+    templates = {}
+    for name, file_name in (("stop", "stop.jpg"), ("left_arrow", "left_arrow.jpg"),
+                            ("right_arrow", "right_arrow.jpg"), ("up_arrow", "Up_Arrow.jpg")):
+        template = cv2.imread(f"{image_dir}/{file_name}", 0)
+        if template is None:
+            raise FileNotFoundError(f"Sign template not found: {image_dir}/{file_name}")
+        # Preprocess the template and keep its largest contour
+        _, thresh = cv2.threshold(template, 127, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        templates[name] = max(contours, key=cv2.contourArea)
+    return templates
+
+def detect_sign(frame, templates):
+    """Returns "STOP", "LEFT", "RIGHT" or None for one camera frame."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(blurred, 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
 #         for cnt in contours:
 #             area = cv2.contourArea(cnt)
@@ -89,42 +98,15 @@ def recognize_sign():
 #                 print("Turn Left Detected!")
 #                 break
 
-        # Load reference contour shapes for STOP and ARROW signs
-        stop_sign_template   = cv2.imread("/home/ndrobotics/code/Pi Only Files /images/stop.jpg",0)
-        left_arrow_template  = cv2.imread("/home/ndrobotics/code/Pi Only Files /images/left_arrow.jpg",0)
-        right_arrow_template = cv2.imread("/home/ndrobotics/code/Pi Only Files /images/right_arrow.jpg",0)
-        up_arrow_template    = cv2.imread("/home/ndrobotics/code/Pi Only Files /images/Up_Arrow.jpg",0)
-
-        # Preprocess templates
-        _, stop_thresh = cv2.threshold(stop_sign_template, 127, 255, cv2.THRESH_BINARY)
-        _, left_arrow_thresh = cv2.threshold(left_arrow_template, 127, 255, cv2.THRESH_BINARY)
-        _, right_arrow_thresh = cv2.threshold(right_arrow_template, 127, 255, cv2.THRESH_BINARY)
-        _, up_arrow_thresh = cv2.threshold(up_arrow_template, 127, 255, cv2.THRESH_BINARY)
-
-        # Find contours of the templates
-        stop_contours, _ = cv2.findContours(stop_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        left_arrow_contours, _ = cv2.findContours(left_arrow_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        right_arrow_contours, _ = cv2.findContours(right_arrow_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        up_arrow_contours, _ = cv2.findContours(up_arrow_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for cnt in contours:
+        area = cv2.contourArea(cnt)
+        if area < 300:
+            continue
 
-        stop_cnt = max(stop_contours, key=cv2.contourArea)
-        left_arrow_cnt = max(left_arrow_contours, key=cv2.contourArea)
-        right_arrow_cnt = max(right_arrow_contours, key=cv2.contourArea)
-        up_arrow_cnt = max(up_arrow_contours, key=cv2.contourArea)
+        # Match against the sign templates (lower is better)
+        stop_match = cv2.matchShapes(cnt, templates["stop"], cv2.CONTOURS_MATCH_I1, 0.0)
 
-        # In your frame processing loop:
-        for cnt in contours:
-            area = cv2.contourArea(cnt)
-            if area < 300:
-                continue
-
-            # Match against the stop sign template
-            stop_match = cv2.matchShapes(cnt, stop_cnt, cv2.CONTOURS_MATCH_I1, 0.0)
-            left_arrow_match = cv2.matchShapes(cnt, left_arrow_cnt, cv2.CONTOURS_MATCH_I1, 0.0)
-            right_arrow_match = cv2.matchShapes(cnt, right_arrow_cnt, cv2.CONTOURS_MATCH_I1, 0.0)
-            up_arrow_match = cv2.matchShapes(cnt, up_arrow_cnt, cv2.CONTOURS_MATCH_I1, 0.0)
-            
-            # Skip contours not in the left half
+        # Skip contours not in the left half
 #             if cx >= frame.shape[1] // 2:
 #                 continue
 # 
@@ -132,27 +114,44 @@ def recognize_sign():
 #             peri = cv2.arcLength(cnt, True)
 #             approx = cv2.approxPolyDP(cnt, 0.02 * peri, True)
 
-            if stop_match < 0.15:  # Lower is better
-                recognized_sign = "STOP"
-                print("Stop Sign Detected!")
-                break
+        if stop_match < 0.15:
+            return "STOP"
 
-            elif arrow_match < 0.2:
-                M = cv2.moments(cnt)
-                if M["m00"] != 0:
-                    cx = int(M["m10"] / M["m00"])
-                else:
-                    cx = 0
+        arrow_match = min(cv2.matchShapes(cnt, templates[name], cv2.CONTOURS_MATCH_I1, 0.0)
+                          for name in ("left_arrow", "right_arrow", "up_arrow"))
+        if arrow_match < 0.2:
+            # The arrow's side of the frame decides the turn
+            M = cv2.moments(cnt)
+            if M["m00"] != 0:
+                cx = int(M["m10"] / M["m00"])
+            else:
+                cx = 0
 
-                if cx < frame.shape[1] // 2:
-                    recognized_sign = "LEFT"
-                    print("Turn Left Detected!")
-                else:
-                    recognized_sign = "RIGHT"
-                    print("Turn Right Detected!")
-                break
+            if cx < frame.shape[1] // 2:
+                return "LEFT"
+            return "RIGHT"
+    return None
 
+def recognize_sign():
+    """Thread function to perform image detection using Picamera2 and OpenCV."""
+    global recognized_sign
+    templates = load_sign_templates()
+    picam2 = Picamera2()
+    config = picam2.create_still_configuration(main={"size": (1024, 768)})
+    picam2.configure(config)
+    picam2.start()
+    time.sleep(1)  # Allow camera to warm up
 
+    while not stop_event.is_set() and recognized_sign is None:
+        frame = picam2.capture_array()
+        sign = detect_sign(frame, templates)
+        if sign == "STOP":
+            print("Stop Sign Detected!")
+        elif sign == "LEFT":
+            print("Turn Left Detected!")
+        elif sign == "RIGHT":
+            print("Turn Right Detected!")
+        recognized_sign = sign
 
         time.sleep(0.5)  # Prevent excessive CPU usage
 
@@ -5,30 +5,82 @@
 ################################################################
 import os
 import time
-import subprocess
 import threading
 import queue
-from pydub import AudioSegment
+from concurrent.futures import Future
 import pygame
+from sound_bank import SoundBank, sound_key
+from audio_cache import AudioCache, clip_length
+from audio_analysis import ClipAnalysis
+from sound_channels import MUSIC, PlaybackTracker, create_channel_groups
+from tts_cache import TTSCache
+from metrics import metrics
+from robot_logging import get_logger
+from robot_config import config
+
+log = get_logger("sound")
 
 class USB_SoundController:
-    def __init__(self, volume=0.7):
+    def __init__(self, volume=None, sample_rate=None, buffer_size=None):
         # Initializes the sound controller.
-        # param volume: Initial volume (0.0 to 1.0)
+        # param volume: Initial volume (0.0 to 1.0); defaults to sound.volume in the robot config
+        # param sample_rate: Mixer rate in Hz; defaults to sound.sample_rate
+        # param buffer_size: Mixer buffer in frames; defaults to sound.buffer_size. Smaller buffers
+        #                    cut latency but underrun sooner on a busy Pi (see mixer_calibration.py).
         #
         # Initialize pygame mixer for consistent audio playback.
-        pygame.mixer.pre_init(44100, -16, 2, 512)
+        cfg = config().sound
+        sample_rate = cfg.sample_rate if sample_rate is None else sample_rate
+        buffer_size = cfg.buffer_size if buffer_size is None else buffer_size
+        pygame.mixer.pre_init(sample_rate, -16, 2, buffer_size)
         pygame.init()
         pygame.mixer.set_num_channels(8)
+
+        # The device may not support the requested rate; assets are converted to the one it uses.
+        frequency, size, channels = pygame.mixer.get_init()
+        self.buffer_size = buffer_size
+        self.buffer_latency = buffer_size / frequency  # Seconds one mixer buffer holds
+        log.info("Mixer: %d Hz, %d channels, %d-frame buffer (%.1f ms)",
+                 frequency, channels, buffer_size, self.buffer_latency * 1000)
         
-        self.volume = volume
+        # Channel groups (ambient, effects, voice, alert) share the 8 channels (see sound_channels.py)
+        self.groups = create_channel_groups(cfg.group_volumes)
+        self.volume = cfg.volume if volume is None else volume
         self.start_time = None
         self.current_sound = None  # Currently playing sound identifier
         self.current_channel = None  # Pygame Channel for playback
-        self.sounds = {}  # For pre-loaded sounds (if needed)
+        self.current_playback = None  # Playback of the last sound started (see sound_channels.py)
+        # Completes each Playback from its channel's end event, so nothing polls or sleeps
+        self.tracker = PlaybackTracker([channel for group in self.groups.values() for channel in group.channels])
+        self.sounds = SoundBank(cfg.bank_budget_mb * 1024 * 1024, self.volume)  # Decoded clips (see preload())
+
+        # Clips at least this long are streamed from disk instead (see stream())
+        self.stream_min_seconds = cfg.stream_min_seconds
+        self.streams = {}  # key -> file streamed for it
+        self.stream_start = 0.0  # Where in its clip the current stream started (seconds)
+        self.stream_count = metrics.counter("sound.streams")
+
+        # Loudness and envelopes measured offline (see audio_analysis.py); each clip is turned
+        # down to the target loudness as it loads
+        self.normalize_loudness = cfg.normalize_loudness
+        self.loudness_target = cfg.loudness_target
+        self.analyses = {}  # key -> ClipAnalysis, for clips that have been analysed
+        self.gains = {}  # key -> gain applied to the clip
+        self.stream_gain = 1.0  # Gain of the clip being streamed
+
+        # MP3s, and WAVs at another rate or format, are converted to WAVs in the mixer's format
+        # by a process pool, never while playing, so the mixer doesn't resample on the fly.
+        # Start on the configured clips now so they are ready by the time they are needed.
+        self.cache = AudioCache(rate=frequency, channels=channels, bits=abs(size))
+        self.cache.prepare(config().paths.ambient_sound_paths(), wait=False)
+
+        # Rendered speech, synthesized on worker threads (see play_text_to_speech()) and
+        # analysed as it renders, so the lip-sync display can follow it
+        self.tts = TTSCache(rate=frequency, sidecar_path=self.cache.sidecar_path)
         
         # Set up a task queue and a worker thread to process audio commands.
         self.task_queue = queue.Queue()
+        self.deferred = {}  # Future -> group, of plays waiting for their transcode
         self.stop_event = threading.Event()
         self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self.worker_thread.start()
@@ -43,6 +95,9 @@ class USB_SoundController:
                     task(*args, **kwargs)
                 except Exception as e:
                     print("Error executing task:", e)
+                    future = kwargs.get("future")
+                    if future is not None and not future.done():
+                        future.set_exception(e)
                 self.task_queue.task_done()
             except queue.Empty:
                 continue
@@ -51,85 +106,287 @@ class USB_SoundController:
         # Enqueue a function to be executed by the worker thread
         self.task_queue.put((task, args, kwargs))
 
+    def _purge_tasks(self, group=None):
+        # Drops queued tasks (only the plays for 'group', if given), marking them done so
+        # task_queue.join() doesn't wait for them. Their Futures are cancelled.
+        with self.task_queue.mutex:
+            tasks = self.task_queue.queue
+            kept = [task for task in tasks if group is not None and task[2].get("group") != group]
+            removed = [task for task in tasks if group is None or task[2].get("group") == group]
+            tasks.clear()
+            tasks.extend(kept)
+            self.task_queue.unfinished_tasks -= len(removed)
+            if not self.task_queue.unfinished_tasks:
+                self.task_queue.all_tasks_done.notify_all()
+        for _, _, kwargs in removed:
+            if kwargs.get("future") is not None:
+                kwargs["future"].cancel()
+        # Plays waiting for their transcode have started, so they are resolved as skipped
+        for future, future_group in list(self.deferred.items()):
+            if group is None or future_group == group:
+                self.deferred.pop(future, None)
+                if not future.done():
+                    future.set_result(None)
+
     # ----- Audio Playback Functions -----
 
-    def _convert_mp3_to_wav(self, file_path):
-        # Converts an MP3 file to WAV format for playback.
-        # param file_path: Path to the MP3 file.
-        # return: Path to the WAV file.
-        wav_path = file_path.replace(".mp3", ".wav")
-        if not os.path.exists(wav_path):
+    def _register(self, key, wav_path, source=None, stream=True):
+        # Long clips are streamed; everything else is decoded into the sound bank.
+        # param source: The file the clip came from, to find its analysis (default: wav_path).
+        # param stream: False to decode a long clip too (for clips played outside the ambient group).
+        analysis = ClipAnalysis.load(self.cache.sidecar_path(source or wav_path))
+        gain = 1.0
+        if analysis is not None:
+            self.analyses[key] = analysis
+            if self.normalize_loudness:
+                gain = analysis.gain(self.loudness_target)
+        self.gains[key] = gain
+        length = clip_length(wav_path)
+        if stream and length is not None and length >= self.stream_min_seconds:
+            self.streams[key] = wav_path
+        else:
+            self.sounds.load(wav_path, key, gain)
+        return key
+
+    def preload(self, paths, stream=True):
+        # Decodes clips into memory so play() can start them without touching the disk.
+        # Long clips (sound.stream_min_seconds) are only registered, and streamed when played.
+        # MP3s not yet in the transcode cache are converted first (in parallel). Runs in the
+        # calling thread; call it at startup, not from the playback path.
+        # param paths: Audio files; each is played by its file name without extension.
+        # param stream: False to decode long clips as well, e.g. for alert() (see play()).
+        # return: The keys of the clips that loaded.
+        keys = []
+        for file_path, wav_path in self.cache.prepare(paths).items():
+            if wav_path is None:
+                continue
             try:
-                audio = AudioSegment.from_mp3(file_path)
-                audio.export(wav_path, format="wav")
+                keys.append(self._register(sound_key(file_path), wav_path, file_path, stream))
             except Exception as e:
-                print(f"Error converting MP3 to WAV: {e}")
-        return wav_path
+                log.error("Error loading sound '%s': %s", file_path, e)
+        return keys
 
-    def _play_wav(self, file_path):
-        # Loads and plays a WAV file using pygame.
-        # param file_path: Path to the WAV file.
-        if not os.path.exists(file_path):
-            print("Error: WAV file does not exist:", file_path)
+    def play(self, key, group="effects", priority=None, fade_ms=0):
+        # Plays a preloaded clip at once, bypassing the task queue.
+        # param key: File name without extension, e.g. "boxbox".
+        # param group: Channel group to play on ("ambient", "effects", "voice" or "alert").
+        #              Long clips only stream in the ambient group, which owns the one music
+        #              stream. Played in any other group, a streamed clip is decoded into the
+        #              sound bank on its first play instead of replacing the ambient track;
+        #              preload it with stream=False to keep that decode off the playback path.
+        # param priority: Overrides the group's priority when taking over a busy channel.
+        # param fade_ms: Fade in over this many milliseconds.
+        # return: A Playback to wait on or ask for its position (see sound_channels.py), or
+        #         None if it couldn't play.
+        if key in self.streams and group == "ambient":
+            return self.stream(self.streams[key], key=key, fade_ms=fade_ms)
+        sound = self.sounds.get(key)
+        if sound is None and key in self.streams:
+            log.info("Decoding streamed clip '%s' to play in the %s group", key, group)
+            self.sounds.load(self.streams[key], key, self.gains.get(key, 1.0))
+            sound = self.sounds.get(key)
+        if sound is None:
+            log.error("Sound '%s' is not loaded; call preload() first", key)
+            return None
+        channel = self.groups[group].play(sound, priority, fade_ms=fade_ms)
+        if channel is None:
+            log.debug("No free %s channel for '%s'", group, key)
+            return None
+        self.current_channel = channel
+        return self._started(self.tracker.track(key, channel, sound.get_length(), group=group))
+
+    def _started(self, playback):
+        self.current_playback = playback
+        self.start_time = time.time()
+        self.current_sound = playback.key
+        playback.add_done_callback(self._ended)
+        return playback
+
+    def fade_out(self, playback, fade_ms):
+        # Fades out one sound started by play() or stream(); its Playback ends when it is silent.
+        if not playback.is_playing:
             return
-        
-        try:
-            sound = pygame.mixer.Sound(file_path)
-            sound.set_volume(self.volume)
-            self.current_channel = sound.play()
-            self.start_time = time.time()
-            self.current_sound = file_path
-        except Exception as e:
-            print(f"Error playing WAV file '{file_path}':", e)
-
-    def play_audio(self, file_path):
-        # Enqueue playing an audio file. If MP3, convert to WAV first.
+        if playback.channel == MUSIC:
+            pygame.mixer.music.fadeout(fade_ms)
+        elif fade_ms:
+            playback.channel.fadeout(fade_ms)
+        else:
+            playback.channel.stop()
+
+    def _ended(self, playback):
+        # Runs on the tracker thread when a sound ends
+        if self.current_playback is playback:
+            self.current_playback = None
+            self.current_channel = None
+            self.start_time = None
+            self.current_sound = None
+
+    def alert(self, key):
+        # Plays a preloaded clip on the alert channel immediately, from the calling thread.
+        # Nothing queued or playing in the other groups can delay it, so it is audible within
+        # one mixer buffer. Preload long alert clips with stream=False (see play()).
+        return self.play(key, group="alert")
+
+    def play_audio(self, file_path, group="effects", priority=None):
+        # Enqueue playing an audio file. An MP3, or a WAV at another rate, not yet in the cache
+        # is transcoded in the background and played once its WAV is ready; the worker carries
+        # on with other sounds meanwhile.
+        # The clip is kept in the sound bank, so later plays don't read the file again.
         # param file_path: Path to the audio file.
-        self._enqueue_task(self._play_audio_task, file_path)
+        # param group, priority: See play().
+        # return: Future that completes with the Playback once the clip has ended (result None
+        #         if it couldn't play; cancelled if stop_sound() dropped it before it started).
+        future = Future()
+        self._enqueue_task(self._play_audio_task, file_path, group=group, priority=priority, future=future)
+        return future
+
+    def _play_audio_task(self, file_path, group="effects", priority=None, future=None):
+        future = future or Future()
+        if not future.set_running_or_notify_cancel():
+            return
+        if self.load(file_path) is None:
+            transcode = self.cache.submit(file_path)
+            if transcode is not None:
+                # Play it once its WAV is in the cache, from the worker again
+                self.deferred[future] = group
+                transcode.add_done_callback(lambda f: self._enqueue_task(
+                    self._play_loaded_task, file_path, group=group, priority=priority, future=future))
+                return
+        self._play_loaded_task(file_path, group, priority, future)
 
-    def _play_audio_task(self, file_path):
+    def _play_loaded_task(self, file_path, group="effects", priority=None, future=None):
+        self.deferred.pop(future, None)
+        if future.done():
+            return  # Dropped by stop_sound() while it was transcoded
+        key = self.load(file_path)
+        if key is None:
+            future.set_result(None)
+            return
+        playback = self.play(key, group, priority)
+        if playback is None:
+            future.set_result(None)
+        else:
+            playback.add_done_callback(future.set_result)
+
+    def load(self, file_path):
+        # Makes a file playable with play(), loading it on first use. An MP3, or a WAV at another
+        # rate, is only loaded once its transcoded WAV is in the cache; until then it is
+        # transcoded in the background.
+        # return: The clip's key, or None if it can't play yet.
+        key = sound_key(file_path)
+        if key in self.sounds or key in self.streams:
+            return key
         if not os.path.exists(file_path):
-            print("Error: File does not exist:", file_path)
+            log.error("Sound file does not exist: %s", file_path)
+            return None
+        wav_path = self.cache.lookup(file_path)
+        if wav_path is None:
+            # Not in the mixer's format yet; convert it in the background for next time
+            self.cache.submit(file_path)
+            return None
+        return self._register(key, wav_path, file_path)
+
+    def load_async(self, file_path):
+        # Enqueue load(), so a caller that mustn't block (e.g. a timer thread) can load a clip.
+        # return: Future with the clip's key (None if it can't play yet; cancelled if
+        #         stop_sound() dropped it first).
+        future = Future()
+        self._enqueue_task(self._load_task, file_path, future=future)
+        return future
+
+    def _load_task(self, file_path, future=None):
+        if future.set_running_or_notify_cancel():
+            future.set_result(self.load(file_path))
+
+    def stream(self, file_path, start=0.0, key=None, fade_ms=0):
+        # Plays a file straight from disk through pygame.mixer.music, which decodes one buffer
+        # at a time, so memory use doesn't grow with the clip's length. One stream plays at a
+        # time; starting another replaces it. Bypasses the task queue.
+        # param start: Seconds into the clip to start from.
+        # param fade_ms: Fade in over this many milliseconds.
+        # return: The stream's Playback.
+        key = key or sound_key(file_path)
+        self.stream_gain = self.gains.get(key, 1.0)
+        pygame.mixer.music.load(file_path)
+        self._set_stream_volume()
+        pygame.mixer.music.play(start=start, fade_ms=fade_ms)
+        self.stream_count.inc()
+        self.stream_start = start
+        self.current_channel = None
+        length = max(0.0, (clip_length(file_path) or 0.0) - start)
+        return self._started(self.tracker.track(key, MUSIC, length, start, "ambient"))
+
+    def seek(self, seconds):
+        # Moves the current stream to 'seconds' from the start of its clip. Its Playback carries
+        # on (waiters aren't woken); only its position changes.
+        playback = self.tracker.active.get(MUSIC)
+        if playback is None or not pygame.mixer.music.get_busy():
             return
-        
-        if file_path.lower().endswith(".mp3"):
-            file_path = self._convert_mp3_to_wav(file_path)
-        
-        self._play_wav(file_path)
+        pygame.mixer.music.play(start=seconds)
+        self.stream_start = seconds
+        self.start_time = time.time()
+        playback.length = max(0.0, playback.offset + playback.length - seconds)
+        playback.offset = seconds
+        playback.started = time.monotonic()
+
+    @property
+    def is_streaming(self):
+        return pygame.mixer.music.get_busy()
+
+    def is_playing(self, key=None):
+        # True while any sound (or the clip 'key') is playing.
+        return bool(self.tracker.playing(key))
+
+    def position(self, key=None):
+        # Seconds into the most recently started sound (or clip 'key'), or None if it isn't playing.
+        playing = self.tracker.playing(key)
+        return playing[-1].position if playing else None
 
     # ----- Text-to-Speech Function -----
 
-    def play_text_to_speech(self, text):
-        # Enqueue generating speech audio from text using Festival (US SLT HTS) and play it.
+    def play_text_to_speech(self, text, voice=None):
+        # Speaks 'text' on the voice channel, using Festival's text2wave.
+        # Phrases said before play from the TTS cache. New ones are synthesized on a TTS worker
+        # and queued for playback when ready, so synthesis never holds up other sounds.
         # param text: The text to synthesize.
-        self._enqueue_task(self._play_text_to_speech_task, text)
-
-    def _play_text_to_speech_task(self, text):
-        # Immediately set the Festival voice to US SLT HTS.
-        # voice_command = f"(voice_us_slt_hts)"
-        # subprocess.call(f'echo "{voice_command}" | festival --pipe', shell=True)
-        # Generate TTS audio into a temporary file using text2wave.
-        temp_wav = "temp_tts.wav"
-        command = f'echo "{text}" | text2wave -o {temp_wav}'
-        ret = subprocess.call(command, shell=True)
-        if ret == 0 and os.path.exists(temp_wav):
-            self._play_wav(temp_wav)
-        else:
-            print("Error generating TTS audio with text2wave.")
+        # param voice: Festival voice (default: sound.tts_voice).
+        future = self.tts.submit(text, voice)
+        future.add_done_callback(self._play_speech)
+        return future
+
+    def _play_speech(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self._enqueue_task(self._play_audio_task, future.result(), group="voice")
+
+    def prerender_speech(self, phrases, voice=None):
+        # Synthesizes known phrases in the background, so their first play is instant.
+        return self.tts.prerender(phrases, voice)
 
     # ----- Control Functions -----
 
-    def stop_sound(self):
+    def stop_sound(self, group=None):
         # Immediately stops any currently playing sound and purges pending tasks from the queue.
         # This function bypasses the task queue.
+        # param group: Only stop this channel group and drop its queued plays.
+        if group is not None:
+            self.groups[group].stop()
+            channels = list(self.groups[group].channels)
+            if group == "ambient":
+                pygame.mixer.music.stop()
+                channels.append(MUSIC)
+            self.tracker.stop(channels)
+            self._purge_tasks(group)
+            return
+
         # Stop current playback immediately.
         pygame.mixer.stop()
+        pygame.mixer.music.stop()
+        self.tracker.stop()
         self.start_time = None
         self.current_sound = None
         
         # Purge the task queue.
-        with self.task_queue.mutex:
-            self.task_queue.queue.clear()
+        self._purge_tasks()
 
     def set_volume(self, volume):
         # Enqueue setting the volume (0.0 to 1.0) for playback.
@@ -138,9 +395,18 @@ class USB_SoundController:
 
     def _set_volume_task(self, volume):
         self.volume = max(0.0, min(1.0, volume))
-        # Update volume for pre-loaded sounds if needed.
-        for key, sound in self.sounds.items():
-            sound.set_volume(self.volume)
+        # Update volume for pre-loaded sounds and the stream
+        self.sounds.set_volume(self.volume)
+        self._set_stream_volume()
+
+    def _set_stream_volume(self):
+        pygame.mixer.music.set_volume(self.volume * self.groups["ambient"].volume * self.stream_gain)
+
+    def set_group_volume(self, group, volume):
+        # Sets one channel group's volume (0.0 to 1.0) right away, on top of the overall volume.
+        self.groups[group].set_volume(volume)
+        if group == "ambient":
+            self._set_stream_volume()
 
     # ----- Close/Cleanup Function -----
 
@@ -149,9 +415,11 @@ class USB_SoundController:
         # Set stop event so worker loop exits.
         self.stop_event.set()
         # Purge any remaining tasks.
-        with self.task_queue.mutex:
-            self.task_queue.queue.clear()
+        self._purge_tasks()
         self.worker_thread.join()
+        self.tracker.close()
+        self.cache.close()
+        self.tts.close()
         pygame.quit()
         print("USB_SoundController closed gracefully.")
 
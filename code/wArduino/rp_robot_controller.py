@@ -11,6 +11,8 @@ import time
 from smbus2 import SMBus
 import serial
 import threading
+import logging
+import os
 
 # Setup I2C comms channel for PS5 Controller
 I2C_BUS = 1  # I2C bus number (typically 1 on Raspberry Pi)
@@ -20,6 +22,11 @@ I2C_ADDRESS = 0x08  # I2C address of the Arduino Mega ADK
 serial_port = "/dev/ttyAMA0"    # Points to the serial PINs on Raspberry Pi
 baud_rate = 115200              # Set baud rate
 
+# Per-packet messages are logged at DEBUG; set ROBOT_LOG_LEVEL=DEBUG to see them
+logging.basicConfig(level=os.environ.get("ROBOT_LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(message)s")
+log = logging.getLogger("rp_robot_controller")
+
 # Initialize Pygame and the joystick module
 pygame.init()
 pygame.joystick.init()
@@ -63,9 +70,9 @@ def send_i2c_PS5_data(bus, data):
     try:
         # Convert the string to bytes and send it
         bus.write_i2c_block_data(I2C_ADDRESS, 0x00, [ord(char) for char in data])
-        print(f"Sent via I2C: {data}")
+        log.debug("Sent via I2C: %s", data)
     except Exception as e:
-        print(f"Error sending data: {e}")
+        log.error("Error sending data: %s", e)
 
 # Used to send all non-PS5 data to the Arduino - appends '%' to all messages for consistent terminator
 def send_serial_message(ser, message):
@@ -75,10 +82,10 @@ def send_serial_message(ser, message):
 
         # Send the message over serial
         ser.write(full_message.encode('utf-8'))
-        print(f"Sent via Serial: {full_message}")
+        log.debug("Sent via Serial: %s", full_message)
 
     except serial.SerialException as e:
-        print(f"Error sending message: {e}")
+        log.error("Error sending message: %s", e)
 
 # Used to debounce repeated PS5 controller inputs
 def is_debounced(key):
@@ -95,73 +102,73 @@ def check_controls(joystick):
     # Check buttons
     with SMBus(I2C_BUS) as bus:
         if joystick.get_button(0) and is_debounced(0):
-            print("Button Cross pressed.")
+            log.debug("Button Cross pressed.")
             send_i2c_PS5_data(bus, "BTN00%")
             
         if joystick.get_button(1) and is_debounced(1):
-            print("Button Circle pressed.")
+            log.debug("Button Circle pressed.")
             send_i2c_PS5_data(bus, "BTN01%")
 
         if joystick.get_button(2) and is_debounced(2):
-            print("Button Triangle pressed.")
+            log.debug("Button Triangle pressed.")
             send_i2c_PS5_data(bus, "BTN02%")
             
         if joystick.get_button(3) and is_debounced(3):
-            print("Button Square pressed.")
+            log.debug("Button Square pressed.")
             send_i2c_PS5_data(bus, "BTN03%")
 
         if joystick.get_button(4) and is_debounced(4):
-            print("Button L1 pressed.")
+            log.debug("Button L1 pressed.")
             send_i2c_PS5_data(bus, "BTN04%")
 
         if joystick.get_button(5) and is_debounced(5):
-            print("Button R1 pressed.")
+            log.debug("Button R1 pressed.")
             send_i2c_PS5_data(bus, "BTN05%")
 
         if joystick.get_button(6) and is_debounced(6):
-            print("Button L2 pressed.")
+            log.debug("Button L2 pressed.")
             send_i2c_PS5_data(bus, "BTN06%")
 
         if joystick.get_button(7) and is_debounced(7):
-            print("Button R2 pressed.")
+            log.debug("Button R2 pressed.")
             send_i2c_PS5_data(bus, "BTN07%")
 
         if joystick.get_button(8) and is_debounced(8):
-            print("Button Share pressed.")
+            log.debug("Button Share pressed.")
             send_i2c_PS5_data(bus, "BTN08%")
 
         if joystick.get_button(9) and is_debounced(9):
-            print("Button Options pressed.")
+            log.debug("Button Options pressed.")
             send_i2c_PS5_data(bus, "BTN09%")
 
         if joystick.get_button(10) and is_debounced(10):
-            print("Button PS Button pressed.")
+            log.debug("Button PS Button pressed.")
             send_i2c_PS5_data(bus, "BTN10%")
 
         if joystick.get_button(11) and is_debounced(11):
-            print("Button Left Joystick Button (L3) pressed.")
+            log.debug("Button Left Joystick Button (L3) pressed.")
             send_i2c_PS5_data(bus, "BTN11%")
 
         if joystick.get_button(12) and is_debounced(12):
-            print("Button Right Joystick Button (R3) pressed.")
+            log.debug("Button Right Joystick Button (R3) pressed.")
             send_i2c_PS5_data(bus, "BTN12%")
 
         # Check D-pad (hat switch)
         hat = joystick.get_hat(0)
         if hat == (0, 1) and is_debounced(13):
-            print("Button Arrow_Up pressed.")
+            log.debug("Button Arrow_Up pressed.")
             send_i2c_PS5_data(bus, "BTN13%")
 
         if hat == (0, -1) and is_debounced(14):
-            print("Button Arrow_Down pressed.")
+            log.debug("Button Arrow_Down pressed.")
             send_i2c_PS5_data(bus, "BTN14%")
 
         if hat == (-1, 0) and is_debounced(15):
-            print("Button Arrow_Left pressed.")
+            log.debug("Button Arrow_Left pressed.")
             send_i2c_PS5_data(bus, "BTN15%")
 
         if hat == (1, 0) and is_debounced(16):
-            print("Button Arrow_Right pressed.")
+            log.debug("Button Arrow_Right pressed.")
             send_i2c_PS5_data(bus, "BTN16%")
 
         # Check left joystick
@@ -191,7 +198,7 @@ def check_controls(joystick):
             lyInt = map_integer(lyInt, 0, 100, 0, 127)
             
             sendString = "JL" + signXString + f"{lxInt:03}" + "#" + signYString + f"{lyInt:03}" + "%"
-            print("Joystick Left data sent: " + sendString)
+            log.debug("Joystick Left data sent: %s", sendString)
             send_i2c_PS5_data(bus, sendString)
         
         else:
@@ -199,7 +206,7 @@ def check_controls(joystick):
             if joystickLeftSending == True:
                 joystickLeftSending = False
                 sendString = "JLSTOP%"
-                print("Joystick Left data sent: " + sendString)
+                log.debug("Joystick Left data sent: %s", sendString)
                 send_i2c_PS5_data(bus, sendString)
             
        # Check right joystick
@@ -228,7 +235,7 @@ def check_controls(joystick):
             ryInt = map_integer(ryInt, 0, 100, 0, 127)
 
             sendString = "JR" + signXString + f"{rxInt:03}" + "#" + signYString + f"{ryInt:03}" + "%"
-            print("Joystick Right data sent: " + sendString)
+            log.debug("Joystick Right data sent: %s", sendString)
             send_i2c_PS5_data(bus, sendString)
             
         
@@ -237,7 +244,7 @@ def check_controls(joystick):
             if joystickRightSending == True:
                 joystickRightSending = False
                 sendString = "JRSTOP%"
-                print("Joystick Right data sent: " + sendString)
+                log.debug("Joystick Right data sent: %s", sendString)
                 send_i2c_PS5_data(bus, sendString)
 
 def map_integer(value, old_min, old_max, new_min, new_max):
@@ -281,7 +288,7 @@ def inbound_serial_loop():
             inboundBuffer += data
             # Check if the message ends with '%'
             if inboundBuffer.endswith('%'):
-                print("Received message:", inboundBuffer[:-1])  # Print message without '%'
+                log.debug("Received message: %s", inboundBuffer[:-1])  # Log message without '%'
 
                 # Check for Arduino send back mesage
                 if inboundBuffer[: -1] == "SysLive":